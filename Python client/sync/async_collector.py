@@ -0,0 +1,336 @@
+import asyncio
+import socket
+import sys
+import time
+
+from tcp_mpu6050_client_dual import CAPTURES_PER_PACKET
+from packet_formats import DatagramDecoder, StreamDecoder
+from sequence_tracker import SequenceTracker
+
+# Defaults match the ESP32 firmware (hotspot IP, fixed port)
+DEFAULT_PORT = 12345
+DISCOVER_MSG = b"DISCOVER_VIBS_SERVER"
+KEEP_ALIVE_INTERVAL = 1      # Seconds between DISCOVER messages to each UDP device
+UDP_STALE_TIMEOUT = 3        # Seconds without datagrams before a UDP device counts as disconnected
+CONNECT_TIMEOUT = 3          # Seconds for a TCP connect attempt
+TCP_IDLE_TIMEOUT = 3         # Seconds without data before a TCP connection counts as half-open and is dropped
+IDLE_CHECK_INTERVAL = 0.5    # Seconds between idle checks of a TCP connection
+RECONNECT_MIN_DELAY = 0.1    # First retry delay (s), doubled after every failed attempt
+RECONNECT_MAX_DELAY = 10.0   # Upper bound for the retry delay (s)
+STATUS_INTERVAL = 1          # Seconds between status printouts
+
+
+class DeviceStats:
+    """Per-device counters, reset by the status printer every STATUS_INTERVAL."""
+
+    def __init__(self, name):
+        self.name = name
+        self.connected = False
+        self.packets = 0
+        self.samples = 0
+        self.reconnects = 0
+
+    def reset_rates(self):
+        self.packets = 0
+        self.samples = 0
+
+
+class _TCPDeviceProtocol(asyncio.Protocol):
+    def __init__(self, device):
+        self.device = device
+        self.closed = asyncio.get_running_loop().create_future()
+        self.last_data = time.monotonic()
+
+    def connection_made(self, transport):
+        # Fresh stream state before the first data_received of this connection
+        self.device.decoder.reset()
+        self.device.tracker.reset_stream()
+        if self.device.tap is not None:
+            self.device.tap.mark_reconnect()
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def data_received(self, data):
+        self.last_data = time.monotonic()
+        if self.device.tap is not None:
+            self.device.tap.write(data)
+        decoded = self.device.decoder.feed(data)
+        if decoded is not None:
+            self.device.deliver(*decoded)
+
+    def connection_lost(self, exc):
+        if not self.closed.done():
+            self.closed.set_result(exc)
+
+
+class TCPDevice:
+    """One ESP32 TCP stream server; reconnects with exponential backoff.
+
+    protocol: a packet_formats name ("tcp22", "udp16" for the 16-byte TCP firmware, "text7", "text4")
+    or "auto" to sniff it from the first bytes of every connection.
+    """
+
+    def __init__(self, name, host, port, on_block, protocol="auto", tap=None):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.on_block = on_block
+        self.tap = tap  # Optional wire_capture.WireCaptureWriter
+        self.decoder = StreamDecoder(protocol)
+        self.tracker = SequenceTracker(CAPTURES_PER_PACKET)
+        self.stats = DeviceStats(name)
+
+    def deliver(self, block, raw):
+        packet_format = self.decoder.format
+        if packet_format.has_sequence:
+            self.tracker.update(raw)
+            self.stats.packets += len(raw) // CAPTURES_PER_PACKET
+        else:
+            self.stats.packets += 1
+        self.stats.samples += len(block)
+        self.on_block(self.name, block)
+
+    async def run(self, stop_event):
+        loop = asyncio.get_running_loop()
+        delay = RECONNECT_MIN_DELAY
+        while not stop_event.is_set():
+            try:
+                transport, protocol = await asyncio.wait_for(
+                    loop.create_connection(lambda: _TCPDeviceProtocol(self), self.host, self.port),
+                    timeout=CONNECT_TIMEOUT)
+            except (OSError, asyncio.TimeoutError) as e:
+                print(f"❌ [{self.name}] Connection to {self.host}:{self.port} failed: {e!r}. Retrying in {delay:.1f}s")
+                await _sleep_or_stop(stop_event, delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                continue
+
+            print(f"✅ [{self.name}] Connected to {self.host}:{self.port}")
+            self.stats.connected = True
+            delay = RECONNECT_MIN_DELAY
+            stop_wait = asyncio.ensure_future(stop_event.wait())
+            while True:
+                done, _ = await asyncio.wait([protocol.closed, stop_wait], timeout=IDLE_CHECK_INTERVAL,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if done:
+                    break
+                # A half-open connection (device gone without FIN/RST) never closes by itself
+                if time.monotonic() - protocol.last_data > TCP_IDLE_TIMEOUT:
+                    print(f"⏱️ [{self.name}] No data for {TCP_IDLE_TIMEOUT}s, dropping the connection")
+                    transport.abort()
+                    break
+            stop_wait.cancel()
+            transport.close()
+            self.stats.connected = False
+            if not stop_event.is_set():
+                self.stats.reconnects += 1
+                print(f"🔄 [{self.name}] Connection lost, reconnecting...")
+
+
+class _UDPEndpointProtocol(asyncio.DatagramProtocol):
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+
+    def datagram_received(self, data, addr):
+        self.endpoint.datagram_received(data, addr)
+
+    def error_received(self, exc):
+        print(f"⚠️ UDP error: {exc}")
+
+
+class UDPDevice:
+    """One ESP32 UDP server; state is kept per device so several can share one local port.
+
+    protocol: a packet_formats name ("udp16", "text7", "text4") or "auto" to sniff the first datagram.
+    """
+
+    def __init__(self, name, host, port, on_block, protocol="auto", tap=None):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.on_block = on_block
+        self.tap = tap  # Optional wire_capture.WireCaptureWriter
+        self.decoder = DatagramDecoder(protocol)
+        self.stats = DeviceStats(name)
+        self.last_seen = 0.0
+
+    def decode(self, data):
+        decoded = self.decoder.decode(data)
+        return decoded[0] if decoded is not None else None
+
+    def datagram_received(self, data):
+        if self.tap is not None:
+            self.tap.write(data)
+        if data.startswith(b"SERVER_ACK"):
+            return
+        self.last_seen = time.monotonic()
+        if not self.stats.connected:
+            self.stats.connected = True
+            print(f"✅ [{self.name}] Receiving from {self.host}")
+        block = self.decode(data)
+        if block is not None and len(block):
+            self.stats.packets += 1
+            self.stats.samples += len(block)
+            self.on_block(self.name, block)
+
+
+class UDPEndpoint:
+    """A local UDP socket shared by every device that streams to the same port; demuxes by source address.
+
+    Devices are keyed by (ip, port); a datagram from another port of an IP with a single device still
+    goes to that device.
+    """
+
+    def __init__(self, local_ip, port):
+        self.local_ip = local_ip
+        self.port = port
+        self.devices = {}
+        self.transport = None
+
+    def add_device(self, device):
+        self.devices[(device.host, device.port)] = device
+
+    def datagram_received(self, data, addr):
+        device = self.devices.get(addr[:2])
+        if device is None:
+            same_host = [d for (host, _), d in self.devices.items() if host == addr[0]]
+            device = same_host[0] if len(same_host) == 1 else None
+        if device is not None:
+            device.datagram_received(data)
+
+    async def run(self, stop_event):
+        loop = asyncio.get_running_loop()
+        delay = RECONNECT_MIN_DELAY
+        while not stop_event.is_set():
+            try:
+                self.transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _UDPEndpointProtocol(self), local_addr=(self.local_ip, self.port),
+                    allow_broadcast=True)
+                break
+            except OSError as e:
+                print(f"❌ Failed to bind {self.local_ip}:{self.port}: {e}. Retrying in {delay:.1f}s")
+                await _sleep_or_stop(stop_event, delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+        if self.transport is None:
+            return
+        print(f"Bound to {self.local_ip}:{self.port}")
+
+        # Keep-alive / re-discovery; a device that went quiet gets a DISCOVER with backoff
+        next_discover = {key: 0.0 for key in self.devices}
+        backoff = {key: KEEP_ALIVE_INTERVAL for key in self.devices}
+        while not stop_event.is_set():
+            now = time.monotonic()
+            for key, device in self.devices.items():
+                if device.stats.connected and now - device.last_seen > UDP_STALE_TIMEOUT:
+                    device.stats.connected = False
+                    device.stats.reconnects += 1
+                    device.decoder.reset()
+                    print(f"🔄 [{device.name}] No data for {UDP_STALE_TIMEOUT}s, rediscovering...")
+                if now >= next_discover[key]:
+                    self.transport.sendto(DISCOVER_MSG, key)
+                    if device.stats.connected:
+                        backoff[key] = KEEP_ALIVE_INTERVAL
+                    else:
+                        backoff[key] = min(backoff[key] * 2, RECONNECT_MAX_DELAY)
+                    next_discover[key] = now + backoff[key]
+            await _sleep_or_stop(stop_event, RECONNECT_MIN_DELAY)
+        self.transport.close()
+
+
+async def _sleep_or_stop(stop_event, delay):
+    """Sleep for `delay` seconds, waking up early if the collector is stopping."""
+    try:
+        await asyncio.wait_for(stop_event.wait(), timeout=delay)
+    except asyncio.TimeoutError:
+        pass
+
+
+def discard_block(device_name, block):
+    """Default sink: drops every block (the status printer still reports the rates)."""
+
+
+class MultiDeviceCollector:
+    """Collects from many ESP32 TCP and UDP servers concurrently on a single asyncio event loop.
+
+    `on_block(device_name, block)` is called on the loop thread with each decoded block. Blocks share
+    one layout whatever the firmware (packet_formats: GyX..AcZ int16, timestamp uint32 in µs), so a
+    mixed fleet feeds the same sinks.
+    """
+
+    def __init__(self, on_block=discard_block):
+        self.on_block = on_block
+        self.tcp_devices = []
+        self.udp_endpoints = {}
+        self.stop_event = None
+        self.loop = None
+
+    def add_tcp_device(self, name, host, port=DEFAULT_PORT, protocol="auto", tap=None):
+        device = TCPDevice(name, host, port, self.on_block, protocol, tap)
+        self.tcp_devices.append(device)
+        return device
+
+    def add_udp_device(self, name, host, port=DEFAULT_PORT, local_ip="0.0.0.0", protocol="auto", tap=None,
+                       local_port=None):
+        """local_port: local port to receive on (default: the device's port, as the firmware expects)."""
+        device = UDPDevice(name, host, port, self.on_block, protocol, tap)
+        local_port = local_port or port
+        endpoint = self.udp_endpoints.setdefault((local_ip, local_port), UDPEndpoint(local_ip, local_port))
+        endpoint.add_device(device)
+        return device
+
+    @property
+    def devices(self):
+        udp_devices = [d for endpoint in self.udp_endpoints.values() for d in endpoint.devices.values()]
+        return self.tcp_devices + udp_devices
+
+    async def print_status(self):
+        while not self.stop_event.is_set():
+            await _sleep_or_stop(self.stop_event, STATUS_INTERVAL)
+            for device in self.devices:
+                stats = device.stats
+                status = "🟢" if stats.connected else "🔴"
+                tracker = getattr(device, "tracker", None)
+                if tracker is not None and not tracker.received:
+                    tracker = None  # Format without capture indices
+                print(f"{status} {stats.name}: {stats.packets} packets/s, {stats.samples} samples/s, "
+                      f"{stats.reconnects} reconnects" + (f" | {tracker.summary()}" if tracker else ""))
+                stats.reset_rates()
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.stop_event = asyncio.Event()
+        tasks = [device.run(self.stop_event) for device in self.tcp_devices]
+        tasks += [endpoint.run(self.stop_event) for endpoint in self.udp_endpoints.values()]
+        tasks.append(self.print_status())
+        await asyncio.gather(*tasks)
+
+    def stop(self):
+        """Stop the collector; safe to call from any thread."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stop_event.set)
+
+
+def parse_device(spec):
+    """Parse 'tcp:HOST[:PORT[:FORMAT]]' or 'udp:HOST[:PORT[:FORMAT]]' into (transport, host, port, format)."""
+    parts = spec.split(":")
+    transport, host = parts[0], parts[1]
+    port = int(parts[2]) if len(parts) > 2 and parts[2] else DEFAULT_PORT
+    protocol = parts[3] if len(parts) > 3 else "auto"
+    return transport, host, port, protocol
+
+
+if __name__ == "__main__":
+    specs = sys.argv[1:] or ["tcp:192.168.4.1"]
+    collector = MultiDeviceCollector()
+    for index, spec in enumerate(specs):
+        transport, host, port, protocol = parse_device(spec)
+        name = f"{transport}-{index}-{host}"
+        if transport == "tcp":
+            collector.add_tcp_device(name, host, port, protocol=protocol)
+        else:
+            collector.add_udp_device(name, host, port, protocol=protocol)
+
+    try:
+        asyncio.run(collector.run())
+    except KeyboardInterrupt:
+        print("\n🚪 Exiting collector.")
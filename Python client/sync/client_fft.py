@@ -5,6 +5,8 @@ from scipy import signal
 from scipy.fft import fft, fftfreq
 import os
 
+from csv_loader import load_recording
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -30,10 +32,10 @@ class DataHandler:
 
     def load_data(self):
         try:
-            raw_data = np.loadtxt(self.data_file, delimiter=',')
-            self.gyro_data = raw_data[:, :3]  # Gyro X, Y, Z
-            self.timestamps = raw_data[:, 3] / 1000.0  # Convert ms to seconds
-            self.acc_data = raw_data[:, 4:7]  # Acc X, Y, Z
+            block, _ = load_recording(self.data_file)  # Any CSV layout; timestamps unwrapped, in µs
+            self.gyro_data = np.column_stack([block["GyX"], block["GyY"], block["GyZ"]])  # Gyro X, Y, Z
+            self.timestamps = block["timestamp"] / 1e6  # Convert µs to seconds
+            self.acc_data = np.column_stack([block["AcX"], block["AcY"], block["AcZ"]])  # Acc X, Y, Z
 
             # Ensure timestamps are increasing
             if np.any(np.diff(self.timestamps) <= 0):
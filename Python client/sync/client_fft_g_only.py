@@ -5,6 +5,10 @@ from scipy import signal
 from scipy.fft import fft, fftfreq
 import os
 
+from timestamp_unwrap import mean_sample_rate
+from session_format import is_session, open_session
+from csv_loader import load_recording
+
 # Set up logging for detailed output.
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
@@ -31,20 +35,29 @@ class DataHandler:
 
     def load_data(self):
         try:
-            raw_data = np.loadtxt(self.data_file, delimiter=',')
-            self.timestamps = raw_data[:, 3] / 1000.0  # Convert ms to seconds
-            self.data = raw_data[:, :3]  # X, Y, Z data
+            if is_session(self.data_file):
+                self.load_session()
+                return
+            block, _ = load_recording(self.data_file)  # Timestamps unwrapped, in µs whatever the file used
+            self.timestamps = block["timestamp"] / 1e6
+            self.data = np.column_stack([block["GyX"], block["GyY"], block["GyZ"]])  # X, Y, Z data
 
-            # Compute average sample rate from time differences
-            time_diffs = np.diff(self.timestamps)
-            avg_sample_rate = 1.0 / np.mean(time_diffs)
-            self.sample_rate = avg_sample_rate
+            # Average sample rate over the unwrapped timeline
+            self.sample_rate = mean_sample_rate(block["timestamp"])
 
             logging.info(f"📊 Computed Sample Rate: {self.sample_rate:.2f} Hz")
         except Exception as e:
             logging.error(f"❌ Error loading data: {e}")
             raise
 
+    def load_session(self):
+        """Open a .vibs session (memory-mapped); timestamps there are already unwrapped µs."""
+        session = open_session(self.data_file)
+        self.timestamps = session.timestamps / 1e6
+        self.data = session.values(["GyX", "GyY", "GyZ"])  # X, Y, Z data
+        self.sample_rate = session.sample_rate or mean_sample_rate(session.timestamps)
+        logging.info(f"📊 Session Sample Rate: {self.sample_rate:.2f} Hz")
+
     def detect_speed_intervals(self):
         speed_intervals = []
         start_idx = 0
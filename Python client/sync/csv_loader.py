@@ -0,0 +1,175 @@
+import json
+import os
+import re
+import sys
+import time
+import numpy as np
+
+from session_format import SENSOR_FIELDS
+from timestamp_unwrap import unwrap_timestamps
+
+# One loader for every CSV the clients have written over time:
+#   GyX,GyY,GyZ,timestamp                      gyro-only text protocol (ms)        *_gyro_data.csv
+#   GyX,GyY,GyZ,AcX,AcY,AcZ,timestamp          save_data (µs) / main_client_ga (ms, with a header row)
+#   GyX,GyY,GyZ,timestamp,AcX,AcY,AcZ          client_fft layout
+#   GyX,GyY,GyZ,AcX,AcY,AcZ,timestamp,cps,num  tcp22 captures
+# The text is parsed once by numpy's C reader; the result is kept in a <file>.cache.npz sidecar keyed
+# by the CSV's size and mtime, so later opens of the same recording skip parsing.
+CACHE_SUFFIX = ".cache.npz"
+CACHE_VERSION = 2
+TIMESTAMP_NAMES = ("timestamp", "time", "ts", "t")
+TIMESTAMP_CANDIDATES = (3, 6)  # Besides the last column
+EXTRA_FIELDS = ["cps", "num"]  # Columns after the timestamp in tcp22 exports
+MS_NAME_HINTS = ("ms", "msec", "millis")       # Unit words in a timestamp column name
+US_NAME_HINTS = ("us", "µs", "usec", "micros")
+HEADER_DEFAULT_UNIT = "ms"  # The only client writing a header row (main_client_ga) stores millis()
+MAX_SAMPLE_RATE = 8000      # Hz, the MPU6050's fastest output; faster as µs means the clock is in ms
+
+
+def cache_path(csv_file):
+    return csv_file + CACHE_SUFFIX
+
+
+def _file_key(csv_file):
+    stat = os.stat(csv_file)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "version": CACHE_VERSION}
+
+
+def _read_header(csv_file):
+    """Column names of the first line if it is a header row, else None."""
+    with open(csv_file, newline="") as file:
+        first = file.readline().strip()
+    fields = [field.strip() for field in first.split(",")]
+    try:
+        float(fields[0])
+        return None
+    except ValueError:
+        return fields
+
+
+def _parse(csv_file, skip):
+    try:
+        return np.loadtxt(csv_file, delimiter=",", skiprows=skip, ndmin=2, dtype=np.int64)
+    except ValueError:
+        return np.loadtxt(csv_file, delimiter=",", skiprows=skip, ndmin=2, dtype=np.float64)
+
+
+def _timestamp_score(column):
+    """Fraction of forward steps; close to 1 for a clock, about 0.5 (or 0) for sensor channels."""
+    if len(column) < 2:
+        return 0.0
+    return float(np.mean(np.diff(column) > 0))
+
+
+def _timestamp_unit(column, name=None):
+    """"ms" or "us": from the column name when there is a header row, else from the span of the clock
+    against the number of rows (the rate it would imply in µs)."""
+    if name is not None:
+        words = re.split(r"[^a-zµ]+", name.lower())
+        if any(word in MS_NAME_HINTS for word in words):
+            return "ms"
+        if any(word in US_NAME_HINTS for word in words):
+            return "us"
+        return HEADER_DEFAULT_UNIT
+    steps = np.diff(column.astype(np.int64))
+    span = steps[steps > 0].sum()  # Rollovers of the uint32 clock are left out
+    if not span:
+        return "us"
+    return "ms" if len(steps) / (span / 1_000_000) > MAX_SAMPLE_RATE else "us"
+
+
+def detect_layout(rows, names=None):
+    """Work out which column is the timestamp, its unit, and what the other columns are."""
+    count = rows.shape[1]
+    timestamp_column = None
+    if names is not None:
+        lowered = [name.lower() for name in names]
+        timestamp_column = next((lowered.index(name) for name in TIMESTAMP_NAMES if name in lowered), None)
+    if timestamp_column is None:
+        candidates = sorted({c for c in TIMESTAMP_CANDIDATES if c < count} | {count - 1})
+        timestamp_column = max(candidates, key=lambda c: _timestamp_score(rows[:, c]))
+
+    sensors = [c for c in range(min(count, timestamp_column + len(SENSOR_FIELDS) + 1)) if c != timestamp_column]
+    sensors = sensors[:len(SENSOR_FIELDS)]
+    extras = [c for c in range(count) if c != timestamp_column and c not in sensors]
+    unit = _timestamp_unit(rows[:, timestamp_column], names[timestamp_column] if names is not None else None)
+    return {
+        "columns": count,
+        "header": names is not None,
+        "timestamp_column": timestamp_column,
+        "timestamp_unit": unit,
+        "sensor_columns": sensors,
+        "extra_columns": {(EXTRA_FIELDS[i] if i < len(EXTRA_FIELDS) else f"col{c}"): c for i, c in enumerate(extras)},
+        "gyro_only": len(sensors) <= 3,
+    }
+
+
+def to_block(rows, layout):
+    """Structured block: GyX..AcZ (zeros for missing channels), unwrapped uint64 µs timestamp, extras."""
+    sensor_dtype = "<i2" if rows.dtype.kind == "i" else "<f8"
+    fields = [(name, sensor_dtype) for name in SENSOR_FIELDS] + [("timestamp", "<u8")]
+    fields += [(name, rows.dtype.str) for name in layout["extra_columns"]]
+    block = np.zeros(len(rows), dtype=fields)
+    for name, column in zip(SENSOR_FIELDS, layout["sensor_columns"]):
+        block[name] = rows[:, column]
+    timestamps = unwrap_timestamps(rows[:, layout["timestamp_column"]].astype(np.int64))
+    block["timestamp"] = timestamps * 1000 if layout["timestamp_unit"] == "ms" else timestamps
+    for name, column in layout["extra_columns"].items():
+        block[name] = rows[:, column]
+    return block
+
+
+def _load_cache(csv_file, key):
+    try:
+        with np.load(cache_path(csv_file)) as cache:
+            meta = json.loads(cache["meta"].item())
+            if meta["key"] != key:
+                return None
+            return cache["block"], meta["layout"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _save_cache(csv_file, key, block, layout):
+    temp = cache_path(csv_file) + ".tmp"
+    try:
+        with open(temp, "wb") as file:
+            np.savez(file, block=block, meta=np.array(json.dumps({"key": key, "layout": layout})))
+        os.replace(temp, cache_path(csv_file))
+    except OSError as e:
+        print(f"⚠️ Could not write CSV cache: {e}")
+
+
+def load_recording(csv_file, use_cache=True):
+    """Load a recording CSV of any known layout; returns (block, layout).
+
+    The timestamp is unwrapped and in µs whatever the file used; layout["timestamp_unit"] tells what it was.
+    """
+    key = _file_key(csv_file)
+    if use_cache:
+        cached = _load_cache(csv_file, key)
+        if cached is not None:
+            return cached
+    names = _read_header(csv_file)
+    rows = _parse(csv_file, 0 if names is None else 1)
+    if not len(rows):
+        raise ValueError(f"No samples in {csv_file}")
+    layout = detect_layout(rows, names)
+    block = to_block(rows, layout)
+    if use_cache:
+        _save_cache(csv_file, key, block, layout)
+    return block, layout
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python csv_loader.py CSV_FILE [...]")
+        sys.exit(1)
+    for csv_file in sys.argv[1:]:
+        start = time.perf_counter()
+        cached = os.path.exists(cache_path(csv_file))
+        block, layout = load_recording(csv_file)
+        elapsed = time.perf_counter() - start
+        print(f"📂 {csv_file}: {len(block)} samples in {elapsed * 1000:.1f} ms ({'cache' if cached else 'parsed'})")
+        print(f"   timestamp column {layout['timestamp_column']} ({layout['timestamp_unit']}), "
+              f"{'gyro only' if layout['gyro_only'] else 'gyro + accel'}, header: {layout['header']}")
@@ -44,6 +44,24 @@ def update_fft_data(gyro_data):
 
         fft_curve.setData(positive_freqs, magnitude)  # ✅ Ensure fft_curve exists
 
+def update_fft_block(gyro_block, block_timestamps):
+    """Update the FFT from a block of GyX samples ((n, 3) array) and their device timestamps (µs)."""
+    global sensor_values, timestamps
+
+    if fft_curve is None:
+        return
+
+    sensor_values = (sensor_values + gyro_block[:, 0].tolist())[-N_SAMPLES:]
+    timestamps = (timestamps + block_timestamps.astype(float).tolist())[-N_SAMPLES:]
+    if len(sensor_values) < N_SAMPLES:
+        return
+
+    time_diffs = np.diff(timestamps) / 1e6  # Convert to seconds
+    sample_rate = 1 / np.mean(time_diffs) if np.mean(time_diffs) > 0 else DEF_SAMPLE_RATE
+    magnitude = np.abs(np.fft.rfft(sensor_values))[:N_SAMPLES // 2]
+    freqs = np.fft.rfftfreq(N_SAMPLES, d=1 / sample_rate)[:N_SAMPLES // 2]
+    fft_curve.setData(freqs, magnitude)
+
 def start_fft_visualization():
     """Initialize and start the FFT visualization."""
     global app, win, fft_curve
@@ -0,0 +1,167 @@
+import multiprocessing as mp
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+from ring_buffer import DEFAULT_CAPACITY, SENSOR_CHANNELS, SampleRingBuffer
+from tcp_mpu6050_client_dual import TCPSensorClient
+
+# Shared ring layout: header (published head, claimed head, capacity, channels) as uint64,
+# then int16 values (capacity x channels), padded to 8 bytes, then uint64 timestamps
+HEADER_WORDS = 4
+SUPERVISE_INTERVAL = 0.5   # Seconds between liveness checks of the ingest process
+RESTART_MIN_DELAY = 0.5    # First restart delay (s), doubled after each crash in a row
+RESTART_MAX_DELAY = 10.0
+STABLE_RUN_TIME = 30       # Seconds of uptime after which the restart delay is reset
+NOTIFY_INTERVAL = 0.01     # Seconds between subscriber wake-ups when the producer is another process
+
+
+def _ring_layout(capacity, channels):
+    header = HEADER_WORDS * 8
+    values = capacity * channels * 2
+    values_padded = (values + 7) // 8 * 8
+    return header, values, header + values_padded + capacity * 8
+
+
+def _ring_on_buffer(buf, capacity, channels):
+    """Build a SampleRingBuffer whose arrays are views on `buf` (no copies)."""
+    header, values_bytes, _ = _ring_layout(capacity, channels)
+    head = np.ndarray(2, dtype=np.uint64, buffer=buf)
+    values = np.ndarray((capacity, channels), dtype=np.int16, buffer=buf, offset=header)
+    timestamps_offset = header + (values_bytes + 7) // 8 * 8
+    timestamps = np.ndarray(capacity, dtype=np.uint64, buffer=buf, offset=timestamps_offset)
+    return SampleRingBuffer(capacity, channels, values=values, timestamps=timestamps, head=head)
+
+
+def create_shared_ring(capacity=DEFAULT_CAPACITY, channels=SENSOR_CHANNELS, name=None):
+    """Allocate a shared-memory ring; returns (SharedMemory, SampleRingBuffer). The creator unlinks it."""
+    shm = shared_memory.SharedMemory(name=name, create=True, size=_ring_layout(capacity, channels)[2])
+    meta = np.ndarray(HEADER_WORDS, dtype=np.uint64, buffer=shm.buf)
+    meta[:] = (0, 0, capacity, channels)
+    return shm, _ring_on_buffer(shm.buf, capacity, channels)
+
+
+def attach_shared_ring(name):
+    """Attach to a ring created by another process; returns (SharedMemory, SampleRingBuffer).
+
+    Consumers only read, and must keep the SharedMemory object alive as long as they use the ring.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    meta = np.ndarray(HEADER_WORDS, dtype=np.uint64, buffer=shm.buf)
+    capacity, channels = int(meta[2]), int(meta[3])
+    return shm, _ring_on_buffer(shm.buf, capacity, channels)
+
+
+def ingest_main(shm_name, server_ip, server_port, stop_event):
+    """Entry point of the ingest process: owns the socket and decoder, writes blocks to the shared ring."""
+    shm, ring = attach_shared_ring(shm_name)
+    client = TCPSensorClient(server_ip, server_port)
+    try:
+        while not stop_event.is_set():
+            block = client.receive_block()  # Reconnects in the background when the link is down
+            if block is not None:
+                ring.write_block(block, client.last_timeline)
+    finally:
+        client.close()
+        del ring
+        shm.close()
+
+
+class IngestSupervisor:
+    """Runs ingest_main in a child process and restarts it if it dies.
+
+    The shared ring belongs to the supervisor, not to the ingest process, so consumers attached to it
+    (GUI, recorder, analyzers) keep their cursors across an ingest crash; the restarted producer simply
+    continues from the head stored in shared memory.
+    """
+
+    def __init__(self, server_ip="192.168.4.1", server_port=12345, capacity=DEFAULT_CAPACITY):
+        self.server_ip = server_ip
+        self.server_port = server_port
+        self.shm, self.ring = create_shared_ring(capacity)
+        self.stop_event = mp.Event()
+        self.process = None
+        self.restarts = 0
+        self.supervise_thread = None
+
+    @property
+    def ring_name(self):
+        return self.shm.name
+
+    def _spawn(self):
+        self.process = mp.Process(target=ingest_main, name="vibs-ingest", daemon=True,
+                                  args=(self.shm.name, self.server_ip, self.server_port, self.stop_event))
+        self.process.start()
+        self.started_at = time.monotonic()
+        print(f"🚀 Ingest process started (pid {self.process.pid}), ring '{self.shm.name}'")
+
+    def start(self):
+        self._spawn()
+        self.supervise_thread = threading.Thread(target=self._supervise, daemon=True)
+        self.supervise_thread.start()
+
+    def _supervise(self):
+        delay = RESTART_MIN_DELAY
+        while not self.stop_event.is_set():
+            time.sleep(SUPERVISE_INTERVAL)
+            if self.process.is_alive() or self.stop_event.is_set():
+                continue
+            if time.monotonic() - self.started_at > STABLE_RUN_TIME:
+                delay = RESTART_MIN_DELAY
+            print(f"💥 Ingest process exited with code {self.process.exitcode}, restarting in {delay:.1f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, RESTART_MAX_DELAY)
+            self.restarts += 1
+            self._spawn()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.process is not None:
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+        if self.supervise_thread is not None:
+            self.supervise_thread.join()
+        del self.ring
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A consumer in this process still holds views; the mapping goes away with it
+        self.shm.unlink()
+
+
+def notify_loop(bus, stop_event, interval=NOTIFY_INTERVAL):
+    """Wake a StreamBus's subscribers periodically when the ring is written by another process."""
+    last_head = bus.ring.head
+    while not stop_event.is_set():
+        time.sleep(interval)
+        head = bus.ring.head
+        if head != last_head:
+            last_head = head
+            bus.notify()
+
+
+if __name__ == "__main__":
+    # Ingest in a child process; this process only runs the GUI, attached to the shared ring
+    from stream_bus import StreamBus
+    from visualization_plot import start_sensor_visualization, update_sensor_block
+
+    supervisor = IngestSupervisor()
+    supervisor.start()
+
+    bus = StreamBus(supervisor.ring)
+    bus.subscribe("time-plot", lambda values, timestamps: update_sensor_block(values[:, :3], values[:, 3:]),
+                  block_size=50)
+    gui_stop = threading.Event()
+    threading.Thread(target=notify_loop, args=(bus, gui_stop), daemon=True).start()
+
+    try:
+        start_sensor_visualization()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        gui_stop.set()
+        bus.close()
+        supervisor.stop()
+        print("🚪 Exiting program.")
@@ -0,0 +1,169 @@
+import json
+import os
+import shutil
+import numpy as np
+
+# Level-of-detail pyramid for plotting long recordings: per channel, the min, max and mean of buckets of
+# BASE_BUCKET samples, then of FACTOR times larger buckets, and so on. A viewer asks for a sample range and
+# its width in pixels and gets back about that many buckets from the coarsest level that still has one
+# bucket per pixel, so drawing costs O(pixels) whatever the recording length. Drawing each bucket as a
+# vertical min-max stroke (minmax_line) looks the same as drawing every sample.
+# Sessions keep their pyramid in <name>.vibs/lod/ (one .npy per level, memory-mapped when read).
+BASE_BUCKET = 16      # Samples per bucket at the finest level
+FACTOR = 4            # Bucket growth between levels
+MIN_BUCKETS = 256     # Stop adding levels below this many buckets
+DEFAULT_PIXELS = 2000
+LOD_FOLDER = "lod"
+INFO_FILE = "info.json"
+
+
+def _reduce(starts, values, counts=None, means=None):
+    """min, max and count-weighted mean of the groups of `values` beginning at `starts`."""
+    low = np.minimum.reduceat(values, starts)
+    high = np.maximum.reduceat(values, starts)
+    if counts is None:
+        counts = np.diff(np.append(starts, len(values)))
+        mean = np.add.reduceat(values, starts, dtype=np.float64) / counts
+    else:
+        mean = np.add.reduceat(means * counts, starts, dtype=np.float64) / np.add.reduceat(counts, starts)
+    return low, high, mean.astype(np.float32)
+
+
+def _level_dtype(channels, value_dtypes, with_time):
+    fields = [("count", "<u4")] + ([("t", "<u8")] if with_time else [])
+    for channel in channels:
+        fields += [(f"{channel}_min", value_dtypes[channel]), (f"{channel}_max", value_dtypes[channel]),
+                   (f"{channel}_mean", "<f4")]
+    return np.dtype(fields)
+
+
+class LodPyramid:
+    """min/max/mean levels of a set of equally long channels; `raw` gives the samples for short ranges."""
+
+    def __init__(self, levels, raw, samples):
+        self.levels = levels      # {bucket size: structured array}, finest first
+        self.raw = raw            # {channel: column} (arrays or memmaps)
+        self.samples = samples
+
+    @classmethod
+    def from_columns(cls, columns, timestamps=None, base=BASE_BUCKET, factor=FACTOR):
+        """Build the pyramid in memory in O(samples)."""
+        channels = list(columns)
+        samples = len(columns[channels[0]]) if channels else 0
+        dtype = _level_dtype(channels, {c: np.asarray(columns[c][:0]).dtype.str for c in channels},
+                             timestamps is not None)
+        levels = {}
+        bucket, previous = base, None
+        while samples and (previous is None or len(previous) > MIN_BUCKETS):
+            if previous is None:
+                starts = np.arange(0, samples, bucket)
+                level = np.empty(len(starts), dtype=dtype)
+                level["count"] = np.diff(np.append(starts, samples))
+                if timestamps is not None:
+                    level["t"] = np.asarray(timestamps)[starts]
+                for channel in channels:
+                    low, high, mean = _reduce(starts, np.asarray(columns[channel]))
+                    level[f"{channel}_min"], level[f"{channel}_max"], level[f"{channel}_mean"] = low, high, mean
+            else:
+                starts = np.arange(0, len(previous), factor)
+                level = np.empty(len(starts), dtype=dtype)
+                level["count"] = np.add.reduceat(previous["count"], starts)
+                if timestamps is not None:
+                    level["t"] = previous["t"][starts]
+                counts = previous["count"].astype(np.float64)
+                for channel in channels:
+                    low, high, mean = _reduce(starts, previous[f"{channel}_min"], counts, previous[f"{channel}_mean"])
+                    level[f"{channel}_min"], level[f"{channel}_mean"] = low, mean
+                    level[f"{channel}_max"] = np.maximum.reduceat(previous[f"{channel}_max"], starts)
+            levels[bucket] = level
+            previous = level
+            bucket *= factor
+        return cls(levels, dict(columns), samples)
+
+    @property
+    def channels(self):
+        return list(self.raw)
+
+    def bucket_for(self, count, pixels):
+        """Bucket size to draw `count` samples on `pixels` pixels: the coarsest level that still has a
+        bucket per pixel, or 1 (raw samples) when even the finest level has fewer buckets than pixels."""
+        buckets = [bucket for bucket in self.levels if count / bucket >= pixels]
+        return max(buckets) if buckets else 1
+
+    def fetch(self, channel, start=0, stop=None, pixels=DEFAULT_PIXELS):
+        """(first sample index, min, max, mean) per bucket over [start, stop), about `pixels` buckets long.
+
+        Short ranges come back as raw samples (min = max = mean = the sample).
+        """
+        stop = self.samples if stop is None else min(stop, self.samples)
+        start = max(0, start)
+        bucket = self.bucket_for(stop - start, pixels)
+        if bucket == 1:
+            values = np.asarray(self.raw[channel][start:stop])
+            return np.arange(start, stop), values, values, values
+        level = self.levels[bucket]
+        first, last = start // bucket, -(-stop // bucket)
+        part = level[first:last]
+        return (np.arange(first, last) * bucket, part[f"{channel}_min"], part[f"{channel}_max"],
+                part[f"{channel}_mean"])
+
+    def save(self, folder, info=None):
+        """Write the levels to `folder` (replaced atomically as a whole)."""
+        temp = folder + ".tmp"
+        shutil.rmtree(temp, ignore_errors=True)
+        os.makedirs(temp)
+        for bucket, level in self.levels.items():
+            np.save(os.path.join(temp, f"{bucket}.npy"), level)
+        with open(os.path.join(temp, INFO_FILE), "w") as file:
+            json.dump(dict(info or {}, samples=self.samples, channels=self.channels, buckets=list(self.levels)), file)
+        shutil.rmtree(folder, ignore_errors=True)
+        os.replace(temp, folder)
+
+    @classmethod
+    def load(cls, folder, raw):
+        """Open saved levels memory-mapped; None if they are missing or were built for other data."""
+        try:
+            with open(os.path.join(folder, INFO_FILE)) as file:
+                info = json.load(file)
+            samples = len(next(iter(raw.values()))) if raw else 0
+            if info["samples"] != samples or info["channels"] != list(raw):
+                return None
+            levels = {bucket: np.load(os.path.join(folder, f"{bucket}.npy"), mmap_mode="r") for bucket in info["buckets"]}
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(levels, raw, samples)
+
+
+def session_pyramid(session, channels=None):
+    """Pyramid of a .vibs session: loaded from <session>/lod, or built and saved there on first use."""
+    channels = channels or [name for name in session.columns if name != "timestamp"]
+    raw = {channel: session[channel] for channel in channels}
+    folder = os.path.join(session.path, LOD_FOLDER)
+    pyramid = LodPyramid.load(folder, raw)
+    if pyramid is None:
+        pyramid = LodPyramid.from_columns(raw, session.timestamps)
+        try:
+            pyramid.save(folder)
+        except OSError as e:
+            print(f"⚠️ Could not save the plot pyramid: {e}")
+    return pyramid
+
+
+def envelope(values, pixels=DEFAULT_PIXELS):
+    """One-off min/max reduction of an in-memory series to about `pixels` buckets (for derived data
+    such as a filtered signal, which has no stored pyramid)."""
+    values = np.asarray(values)
+    bucket = max(1, len(values) // pixels)
+    if bucket == 1:
+        return np.arange(len(values)), values, values
+    starts = np.arange(0, len(values), bucket)
+    return starts, np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts)
+
+
+def minmax_line(index, low, high):
+    """x, y of a single polyline drawing each bucket as a vertical stroke from its min to its max."""
+    x = np.repeat(index, 2)
+    y = np.empty(2 * len(low), dtype=np.result_type(low, high))
+    y[0::2] = low
+    y[1::2] = high
+    return x, y
@@ -6,16 +6,21 @@ import time
 import numpy as np
 import os
 import csv
-from udp_mpu6050_client import UDPSensorClient
+
+from udp_mpu6050_client import UDPSensorClient, SAMPLE_DTYPE
+from ring_buffer import SampleRingBuffer
 from visualization3d import start_visualization, update_gyro_data
-from save_data import create_new_folder, save_to_csv, generate_plots, process_realtime_wav
+from save_data import create_new_folder
+from session_recorder import SessionRecorder
+from postprocess_queue import PostProcessQueue
+from segment_journal import recover_recordings
 
 # Global variables
-gyroscope_data = [0, 0, 0]
-acceleration_data = [0, 0, 0]
+sample_ring = SampleRingBuffer()  # Live stream, read lock-free by the other threads
 stop_thread = False
 capture_data = False
-collected_data = []
+recorder = None  # Streams the current capture to disk
+postprocess = None  # Post-capture processing in worker processes
 
 gyro_offset = [0, 0, 0]
 accel_offset = [0, 0, 0]
@@ -30,36 +35,35 @@ def calibrate_sensors(client):
     print("⏳ Calibrating sensors... Keep the device **STILL**!")
     
     for _ in range(100):
-        gyro_data, accel_data, _ = client.receive_data()
-        if gyro_data and accel_data:
-            gyro_samples.append(gyro_data)
-            accel_samples.append(accel_data)
-    
-    gyro_offset = np.mean(gyro_samples, axis=0)
-    accel_offset = np.mean(accel_samples, axis=0)
+        block = client.receive_block()
+        if block is not None:
+            gyro_samples.append(np.column_stack((block["GyX"], block["GyY"], block["GyZ"])))
+            accel_samples.append(np.column_stack((block["AcX"], block["AcY"], block["AcZ"])))
     
-    print(f"✅ Gyro Offset: {gyro_offset}")
-    print(f"✅ Accel Offset: {accel_offset}")
+    if gyro_samples and accel_samples:
+        gyro_offset = np.concatenate(gyro_samples).mean(axis=0)
+        accel_offset = np.concatenate(accel_samples).mean(axis=0)
+        print(f"✅ Gyro Offset: {gyro_offset}")
+        print(f"✅ Accel Offset: {accel_offset}")
+    else:
+        print("⚠️ Calibration failed due to missing data.")
 
 def receive_data(client):
     """Thread function to receive sensor data."""
-    global gyroscope_data, acceleration_data, collected_data, capture_data
-
     while not stop_thread:
-        gyro_data, accel_data, timestamp = client.receive_data()
-        if gyro_data and accel_data:
-            # Use calibrated data for visualization
-            gyroscope_data = [gyro_data[i] - gyro_offset[i] for i in range(3)]
-            acceleration_data = [accel_data[i] - accel_offset[i] for i in range(3)]
-            update_gyro_data(acceleration_data)
-            # Save raw data only
+        block = client.receive_block()
+        if block is not None:
+            sample_ring.write_block(block)
+            # Visualization only needs the latest calibrated sample of the batch
+            update_gyro_data(get_sensor_data()[3:])
+            # Save raw data only (the recorder copies it: the block is a view on the client's receive buffer)
             if capture_data:
-                collected_data.append([*gyro_data, *accel_data, timestamp])
+                recorder.append(block)
 
-def start_capture():
-    """Start capturing data."""
-    global capture_data, collected_data
-    collected_data = []
+def start_capture(device=None):
+    """Start capturing data; device ("udp:HOST:PORT") goes into the session header."""
+    global capture_data, recorder
+    recorder = SessionRecorder(create_new_folder(), SAMPLE_DTYPE, device=device)
     capture_data = True
     print("▶️ Data capture started...")
 
@@ -68,7 +72,9 @@ def stop_capture():
     global capture_data
     capture_data = False
     print("⏹️ Data capture stopped.")
-    
+
+    recorder.close()  # Everything is on disk before we wait for the session name
+
     session_name = input("Enter a name for this recording session: ").strip()
     if not session_name:
         session_name = time.strftime("%Y%m%d_%H%M%S")
@@ -77,24 +83,27 @@ def stop_capture():
     session_folder = os.path.join(rec_folder, session_name)
     os.makedirs(session_folder, exist_ok=True)
     
-    csv_filename = os.path.join(session_folder, f"{session_name}_raw_data.csv")
-    save_to_csv(csv_filename, collected_data)
-    generate_plots(session_folder, session_name, collected_data)
-    process_realtime_wav(csv_filename, session_folder, session_name)
+    session_path = recorder.finish(session_folder, session_name)
+    postprocess.submit(session_path, session_folder, session_name)  # CSV, plots, WAVs, catalog in the background
     print(f"🎉 Data saved as {session_name}!")
     
     
 def get_sensor_data():
-    """Return gyroscope and accelerometer raw data for visualization."""
-    if not gyroscope_data or not acceleration_data:
+    """Return the latest calibrated gyroscope and accelerometer sample for visualization."""
+    values, _ = sample_ring.latest(1)
+    if not len(values):
         return (0, 0, 0, 0, 0, 0)  # Ensure the correct structure
-    return (*gyroscope_data, *acceleration_data)
+    return tuple(values[0] - np.concatenate((gyro_offset, accel_offset)))
 
 
 def main():
     """Main function to start the UDP client and visualization."""
-    global stop_thread
+    global stop_thread, postprocess
     
+    postprocess = PostProcessQueue(create_new_folder())
+    postprocess.resume()
+    for session_path, session_folder, session_name in recover_recordings(create_new_folder()):
+        postprocess.submit(session_path, session_folder, session_name)
     client = UDPSensorClient(local_ip="192.168.42.2", server_ip="192.168.4.1", server_port=12345)
     
     if not client.discover_server():
@@ -115,12 +124,13 @@ def main():
             if capture_data:
                 stop_capture()
             else:
-                start_capture()
+                start_capture(f"udp:{client.server_ip}:{client.server_port}")
     except KeyboardInterrupt:
         print("🚪 Exiting program.")
         stop_thread = True
         udp_thread.join()
         client.close()
+        postprocess.shutdown(wait=False)
 
 if __name__ == "__main__":
     main()
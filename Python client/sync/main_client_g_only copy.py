@@ -14,6 +14,8 @@ from client_fft_g_only import DataHandler
 
 import pandas as pd
 
+from text_protocol import GYRO_ONLY_FIELDS, parse_csv_datagrams, receive_datagram_batch
+
 
 # Default sample rate (adjust as needed)
 DEFAULT_SAMPLE_RATE = 16000 
@@ -33,6 +35,7 @@ connection_status = "🔴 Disconnected"
 data_rate = 0
 last_data_time = 0
 last_timestamp = None
+malformed_lines = 0
 collected_data = []
 stop_thread = False
 capture_data = False
@@ -58,34 +61,26 @@ def keepConnected():
 
 # Receive Data Function
 def receive_data():
-    global connection_status, last_timestamp, data_rate, last_data_time, capture_data
+    global connection_status, last_timestamp, data_rate, last_data_time, capture_data, malformed_lines
     total_data_received = 0
     start_time = time.time()
 
     while not stop_thread:
         try:
-            data, addr = sock.recvfrom(4096) # 1024 -> 4096 to avoid packet loss
+            datagrams, addr = receive_datagram_batch(sock)
             connection_status = "🟢 Connected"
-            packets = data.decode().strip().split('\n')
-
-            for packet in packets:
-                values = packet.strip().split(',')
-                if len(values) == 6:  # Expect 6 values now (GyX, GyY, GyZ, AcX, AcY, AcZ)
-                    try:
-                        gx, gy, gz, acx, acy, acz = map(int, values)
-                        if capture_data:
-                            collected_data.append([gx, gy, gz, acx, acy, acz, ts])  # Include accelerometer data
-
-                        total_data_received += 1
-                        elapsed = time.time() - start_time
-                        if elapsed >= 1.0:
-                            data_rate = total_data_received / elapsed
-                            total_data_received = 0
-                            start_time = time.time()
-
-                    except ValueError:
-                        continue
+            rows, malformed = parse_csv_datagrams(datagrams, GYRO_ONLY_FIELDS)  # GyX, GyY, GyZ, timestamp
+            malformed_lines += malformed
 
+            if capture_data:
+                collected_data.extend(rows.tolist())
+
+            total_data_received += len(rows)
+            elapsed = time.time() - start_time
+            if elapsed >= 1.0:
+                data_rate = total_data_received / elapsed
+                total_data_received = 0
+                start_time = time.time()
 
         except Exception as e:
             print(f"Error: {e}")
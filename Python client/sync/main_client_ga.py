@@ -9,6 +9,8 @@ import matplotlib.pyplot as plt
 import sounddevice as sd
 import pandas as pd
 
+from text_protocol import parse_csv_datagrams, receive_datagram_batch
+
 # -----------------------------
 # Global Constants and Variables
 # -----------------------------
@@ -28,6 +30,7 @@ connection_status = "🔴 Disconnected"
 data_rate = 0
 last_data_time = 0
 last_timestamp = None
+malformed_lines = 0  # Lines rejected by the parser since start
 collected_data = []  # Will hold rows of data: [GyX, GyY, GyZ, AcX, AcY, AcZ, timestamp]
 stop_thread = False
 capture_data = False
@@ -75,35 +78,29 @@ def stop_data_collection():
 stop_event = threading.Event()
 
 def receive_data():
-    global connection_status, last_timestamp, data_rate, last_data_time, capture_data
+    global connection_status, last_timestamp, data_rate, last_data_time, capture_data, malformed_lines
     total_data_received = 0
     start_time = time.time()
 
     while not stop_event.is_set():
         try:
-            data, addr = sock.recvfrom(4096)  # Use a large buffer size
+            # Everything already queued is parsed as one batch
+            datagrams, addr = receive_datagram_batch(sock)
             connection_status = "🟢 Connected"
-            packets = data.decode().strip().split('\n')
-
-            for packet in packets:
-                values = packet.strip().split(',')
-                if len(values) != 7:
-                    #print(f"Skipping malformed packet: {packet}")
-                    continue
-
-                try:
-                    gx, gy, gz, acx, acy, acz, ts = map(int, values)
-                    if capture_data:
-                        with data_lock:  # Ensure thread-safe appending of data
-                            collected_data.append([gx, gy, gz, acx, acy, acz, ts])
-                    total_data_received += 1
-                    elapsed = time.time() - start_time
-                    if elapsed >= 1.0:
-                        data_rate = total_data_received / elapsed
-                        total_data_received = 0
-                        start_time = time.time()
-                except ValueError:
-                    continue
+            rows, malformed = parse_csv_datagrams(datagrams)
+            malformed_lines += malformed
+            if DEBUG and malformed:
+                print(f"Skipped {malformed} malformed lines")
+
+            if capture_data and len(rows):
+                with data_lock:  # One lock acquisition per batch
+                    collected_data.extend(rows.tolist())
+            total_data_received += len(rows)
+            elapsed = time.time() - start_time
+            if elapsed >= 1.0:
+                data_rate = total_data_received / elapsed
+                total_data_received = 0
+                start_time = time.time()
         except Exception as e:
             print(f"Error: {e}")
             connection_status = "🔴 Disconnected"
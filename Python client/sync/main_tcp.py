@@ -6,20 +6,37 @@ import os
 import struct
 import msvcrt  # Windows-only module for non-blocking keyboard input
 
-from tcp_mpu6050_client_dual import TCPSensorClient  # Updated TCP client
-from save_data import create_new_folder, save_to_csv, generate_plots, process_realtime_wav
-from visualization_plot import start_sensor_visualization, update_sensor_data  # Import the real-time plotting function
+
+from tcp_mpu6050_client_dual import TCPSensorClient, CAPTURE_DTYPE  # Updated TCP client
+from ring_buffer import SampleRingBuffer
+from stream_bus import StreamBus, ON_OVERFLOW_DETACH, ON_OVERFLOW_DROP
+from save_data import create_new_folder
+from session_recorder import SessionRecorder
+from postprocess_queue import PostProcessQueue
+from segment_journal import recover_recordings
+from visualization_plot import start_sensor_visualization, update_sensor_block  # Import the real-time plotting function
 from visualization3d import start_visualization3d, update_gyro_data
-from fft_visualization import start_fft_visualization, update_fft_data
+from fft_visualization import start_fft_visualization, update_fft_block
+from wav_streamer import WAVStreamer
+from wire_capture import WireCaptureWriter
 
 
 
-# Global variables for sensor data
-gyroscope_data = [0, 0, 0]
-acceleration_data = [0, 0, 0]
+# Live sensor stream: bounded ring written by the receive thread, read lock-free by everyone else.
+# Each visualization subscribes to the bus with its own block size / decimation on its own thread.
+sample_ring = SampleRingBuffer()
+stream_bus = StreamBus(sample_ring)
 stop_thread = False
 capture_data = False
-collected_data = []
+recorder = None  # Streams the current capture to disk (session_recorder.py)
+CAPTURE_WIRE = False  # Also keep the raw socket bytes of each capture (replay with wire_capture.py)
+SHOW_FFT = False  # Live FFT window (fft_visualization.py), fed from the bus
+STREAM_WAV = False  # Also stream each capture to a 6-channel WAV from the bus (wav_streamer.py)
+DEFAULT_WAV_RATE = 1000  # Hz, used until the device rate is known
+sensor_client = None
+wire_tap = None
+wav_streamer = None
+postprocess = None  # CSV / plots / WAV / catalog of saved captures, in worker processes (postprocess_queue.py)
 
 gyro_offset = [0, 0, 0]
 accel_offset = [0, 0, 0]
@@ -33,51 +50,68 @@ def calibrate_sensors(client):
     print("⏳ Calibrating sensors... Keep the device **STILL**!")
     
     for _ in range(100):  # Collect 500 packets
-        captures = client.receive_data()
-        if captures is None:
+        block = client.receive_block()
+        if block is None:
             continue
 
-        for capture in captures:
-            GyX, GyY, GyZ, AcX, AcY, AcZ, timestamp, cps, num = capture
-            gyro_samples.append([GyX, GyY, GyZ])
-            accel_samples.append([AcX, AcY, AcZ])
+        gyro_samples.append(np.column_stack((block["GyX"], block["GyY"], block["GyZ"])))
+        accel_samples.append(np.column_stack((block["AcX"], block["AcY"], block["AcZ"])))
     
     if gyro_samples and accel_samples:
-        gyro_offset = np.mean(gyro_samples, axis=0)
-        accel_offset = np.mean(accel_samples, axis=0)
+        gyro_offset = np.concatenate(gyro_samples).mean(axis=0)
+        accel_offset = np.concatenate(accel_samples).mean(axis=0)
         print(f"✅ Gyro Offset: {gyro_offset}")
         print(f"✅ Accel Offset: {accel_offset}")
     else:
         print("⚠️ Calibration failed due to missing data.")
 
 def receive_data_thread(client):
-    """Continuously receive data and update global sensor values."""
-    global gyroscope_data, acceleration_data, collected_data
+    """Continuously receive packets and publish them; sinks consume from the bus at their own rate."""
     while not stop_thread:
-        captures = client.receive_data()
-        if captures is not None:
-            for capture in captures:
-                GyX, GyY, GyZ, AcX, AcY, AcZ, timestamp, cps, num = capture
-                
-                # Apply calibration offsets
-                gyroscope_data = [GyX - gyro_offset[0], GyY - gyro_offset[1], GyZ - gyro_offset[2]]
-                acceleration_data = [AcX - accel_offset[0], AcY - accel_offset[1], AcZ - accel_offset[2]]
-
-                update_gyro_data(gyroscope_data)  # ✅ Update visualization
-                #update_fft_data([GyX, GyY, GyZ])
-                
-                #update_sensor_data([GyX, GyY, GyZ], [AcX, AcY, AcZ])
-
-                update_sensor_data(gyroscope_data, acceleration_data)
-
-                # If capture is enabled, store the raw data
-                if capture_data:
-                    collected_data.append([GyX, GyY, GyZ, AcX, AcY, AcZ, timestamp, cps, num])
+        block = client.receive_block()
+        if block is None:
+            continue
+
+        stream_bus.publish(block, client.last_timeline)
+
+        # If capture is enabled, the recorder copies the packet into its current chunk
+        if capture_data:
+            recorder.append(block)
+
+def calibrated(values):
+    """Apply calibration offsets to an (n, 6) block of raw samples."""
+    return values - np.concatenate((gyro_offset, accel_offset))
+
+def gyro_view_sink(values, timestamps):
+    update_gyro_data(calibrated(values)[:, :3])  # ✅ Whole block in one call
+
+def time_plot_sink(values, timestamps):
+    block = calibrated(values)
+    update_sensor_block(block[:, :3], block[:, 3:])
 
+def fft_sink(values, timestamps):
+    update_fft_block(calibrated(values)[:, :3], timestamps)
+
+def wav_sink(values, timestamps):
+    wav_streamer.add_block(values)  # Raw counts, fixed gain
+
+def subscribe_visualizations():
+    """Attach the live views; slow ones are decimated (or detached) instead of slowing the receiver."""
+    stream_bus.subscribe("3d-view", gyro_view_sink, block_size=20, decimation=5)
+    stream_bus.subscribe("time-plot", time_plot_sink, block_size=50)
+    if SHOW_FFT:
+        stream_bus.subscribe("fft", fft_sink, block_size=256, on_overflow=ON_OVERFLOW_DETACH)
+
+def get_sensor_data():
+    """Latest calibrated (GyX, GyY, GyZ, AcX, AcY, AcZ) sample, read from the ring without locking."""
+    values, _ = sample_ring.latest(1)
+    if not len(values):
+        return (0, 0, 0, 0, 0, 0)
+    return tuple(calibrated(values)[0])
 
 
 def keyboard_listener():
-    """Listen for Enter key to toggle data capture."""
+    """Listen for Enter key to toggle data capture; p/c/r show, cancel and retry post-processing jobs."""
     global capture_data
     while not stop_thread:
         if msvcrt.kbhit():
@@ -87,21 +121,49 @@ def keyboard_listener():
                     stop_capture()
                 else:
                     start_capture()
+            elif key == b'p':
+                postprocess.print_status()
+            elif key == b'c':
+                postprocess.cancel_latest()
+            elif key == b'r':
+                postprocess.retry_failed()
         time.sleep(0.1)
 
 def start_capture():
     """Start capturing data."""
-    global capture_data, collected_data
-    collected_data = []  # Reset data
+    global capture_data, recorder, wire_tap, wav_streamer
+    device = f"tcp:{sensor_client.server_ip}:{sensor_client.server_port}" if sensor_client is not None else None
+    recorder = SessionRecorder(create_new_folder(), CAPTURE_DTYPE, device=device)
+    if STREAM_WAV:
+        sample_rate = (sensor_client.timeline.sample_rate() if sensor_client is not None else None) or DEFAULT_WAV_RATE
+        wav_streamer = WAVStreamer(sample_rate, output_file=os.path.join(create_new_folder(), "current_stream.wav"))
+        wav_streamer.start()
+        # Never decimated: dropping samples keeps the WAV at its sample rate
+        stream_bus.subscribe("wav", wav_sink, on_overflow=ON_OVERFLOW_DROP)
+    if CAPTURE_WIRE and sensor_client is not None:
+        wire_tap = WireCaptureWriter(os.path.join(create_new_folder(), "current_wire.vcap"), "tcp", "tcp22",
+                                     f"{sensor_client.server_ip}:{sensor_client.server_port}")
+        sensor_client.set_tap(wire_tap)
     capture_data = True
     print("▶️ Data capture started...")
 
 def stop_capture():
     """Stop capturing data and save it."""
-    global capture_data
+    global capture_data, wire_tap, wav_streamer
     capture_data = False
     print("⏹️ Data capture stopped.")
-    
+    if wire_tap is not None:
+        sensor_client.set_tap(None)
+        wire_tap.close()
+    if wav_streamer is not None:
+        subscriber = stream_bus.subscribers.get("wav")
+        stream_bus.unsubscribe("wav")
+        if subscriber is not None:
+            subscriber.thread.join()  # No add_block() after finalize
+        wav_streamer.finalize()
+
+    recorder.close()  # Everything is on disk before we wait for the session name
+
     session_name = input("Enter a name for this recording session: ").strip()
     if not session_name:
         session_name = time.strftime("%Y%m%d_%H%M%S")
@@ -110,22 +172,27 @@ def stop_capture():
     session_folder = os.path.join(rec_folder, session_name)
     os.makedirs(session_folder, exist_ok=True)
     
-    csv_filename = os.path.join(session_folder, f"{session_name}_raw_data.csv")
-    save_to_csv(csv_filename, collected_data)
-
-    if len(collected_data) >= 12:  # Ensure enough data for filtering
-        generate_plots(session_folder, session_name, collected_data)
-        process_realtime_wav(csv_filename, session_folder, session_name)
-    else:
-        print("⚠️ Not enough data for filtering, skipping processing.")
+    session_path = recorder.finish(session_folder, session_name)
+    if wire_tap is not None:
+        os.replace(wire_tap.path, os.path.join(session_folder, f"{session_name}_wire.vcap"))
+        wire_tap = None
+    if wav_streamer is not None:
+        os.replace(wav_streamer.output_file, os.path.join(session_folder, f"{session_name}_stream.wav"))
+        wav_streamer = None
 
-    print(f"🎉 Data saved as {session_name}!")
+    # CSV, plots, WAVs and the catalog entry are made in the background; capture can restart right away
+    postprocess.submit(session_path, session_folder, session_name)
+    print(f"🎉 Data saved as {session_name}! (press p for processing status)")
 
 
 
 def main():
-    global stop_thread
+    global stop_thread, sensor_client, postprocess
     client = None
+    postprocess = PostProcessQueue(create_new_folder())
+    postprocess.resume()  # Jobs left unfinished by the last run
+    for session_path, session_folder, session_name in recover_recordings(create_new_folder()):
+        postprocess.submit(session_path, session_folder, session_name)  # Captures cut short by a crash
 
     while client is None:
         try:
@@ -138,9 +205,11 @@ def main():
             time.sleep(5)
 
     # Calibrate sensors before enabling capture
+    sensor_client = client
     calibrate_sensors(client)
 
     # Start the data receiving thread
+    subscribe_visualizations()
     tcp_thread = threading.Thread(target=receive_data_thread, args=(client,), daemon=True)
     tcp_thread.start()
    
@@ -153,8 +222,9 @@ def main():
     kb_thread.start()
 
     # Start FFT visualization 
-    ##fft_thread = threading.Thread(target=start_fft_visualization, daemon=True)
-    #fft_thread.start()
+    if SHOW_FFT:
+        fft_thread = threading.Thread(target=start_fft_visualization, daemon=True)
+        fft_thread.start()
     
     analizer_thread = threading.Thread(target=start_sensor_visualization, daemon=True)
     analizer_thread.start()
@@ -166,7 +236,9 @@ def main():
         print("🚪 Exiting program.")
         stop_thread = True
         tcp_thread.join()
+        stream_bus.close()
         client.close()
+        postprocess.shutdown(wait=False)  # Unfinished jobs stay in the journal and resume next time
 
 
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+import numpy as np
+
+from tcp_mpu6050_client_dual import CAPTURE_DTYPE, CAPTURES_PER_PACKET, PACKET_SIZE as TCP22_SIZE
+from udp_mpu6050_client import SAMPLE_DTYPE, BUFFER_SIZE as SAMPLE16_SIZE
+from text_protocol import FULL_FIELDS, GYRO_ONLY_FIELDS, parse_csv_datagrams
+
+# Every firmware format decodes to the same block: a SAMPLE_DTYPE structured array (GyX..AcZ int16,
+# timestamp uint32 in µs). Gyro-only formats leave the accel columns at 0; millisecond timestamps are
+# scaled to µs (still wrapping at 2^32 like micros()).
+SENSOR_FIELDS = ["GyX", "GyY", "GyZ", "AcX", "AcY", "AcZ"]
+TEXT_CHARS = frozenset(b"0123456789-,\r\n")
+SNIFF_CAPTURES = 3  # 22-byte captures whose index must count up before a TCP stream is called tcp22
+
+
+class PacketFormat:
+    """A firmware wire format: how to recognise it, how to cut a stream into frames and decode them."""
+
+    def __init__(self, name, description, decode, sample_size=None, frame_size=None, line_based=False,
+                 gyro_only=False, has_sequence=False):
+        self.name = name
+        self.description = description
+        self.decode_raw = decode          # bytes -> structured array in the wire layout
+        self.sample_size = sample_size    # Bytes per sample for binary formats; a datagram holds whole samples
+        self.frame_size = frame_size or sample_size  # Stream framing: decode whole multiples of this many bytes
+        self.line_based = line_based      # Stream framing: decode up to the last newline
+        self.gyro_only = gyro_only
+        self.has_sequence = has_sequence  # Raw blocks carry `num` for SequenceTracker
+
+    def decode(self, data):
+        """Decode bytes into (common block, raw block); raw keeps format-specific fields such as `num`."""
+        raw = self.decode_raw(data)
+        return to_common_block(raw), raw
+
+    def complete_length(self, buffer):
+        """Number of leading bytes of a stream buffer that hold whole frames."""
+        if self.line_based:
+            return buffer.rfind(b"\n") + 1
+        return len(buffer) - len(buffer) % self.frame_size
+
+
+FORMATS = {}
+
+
+def register_format(packet_format):
+    """Add a format to the registry (replaces one with the same name)."""
+    FORMATS[packet_format.name] = packet_format
+    return packet_format
+
+
+def get_format(name):
+    try:
+        return FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown packet format '{name}', expected one of {sorted(FORMATS)}") from None
+
+
+def to_common_block(raw):
+    """Convert any decoded block to the common SAMPLE_DTYPE layout (no copy if it already is one)."""
+    if raw.dtype == SAMPLE_DTYPE:
+        return raw
+    block = np.zeros(len(raw), dtype=SAMPLE_DTYPE)
+    for field in SENSOR_FIELDS + ["timestamp"]:
+        if field in raw.dtype.names:
+            block[field] = raw[field]
+    return block
+
+
+def _decode_tcp22(data):
+    return np.frombuffer(data, dtype=CAPTURE_DTYPE, count=len(data) // TCP22_SIZE)
+
+
+def _decode_sample16(data):
+    return np.frombuffer(data, dtype=SAMPLE_DTYPE, count=len(data) // SAMPLE16_SIZE)
+
+
+def _text_decoder(num_fields):
+    fields = SENSOR_FIELDS[:num_fields - 1]
+    text_dtype = np.dtype([(field, "<i2") for field in fields] + [("timestamp", "<u4")])
+
+    def decode(data):
+        rows, _ = parse_csv_datagrams(bytes(data), num_fields)
+        block = np.empty(len(rows), dtype=text_dtype)
+        for column, field in enumerate(fields):
+            block[field] = rows[:, column]
+        block["timestamp"] = rows[:, -1] * 1000 % (1 << 32)  # millis() -> µs
+        return block
+    return decode
+
+
+TCP22 = register_format(PacketFormat(
+    "tcp22", "server_tcp.Raw_Threads: 100 x 22-byte <hhhhhhIIh captures per packet",
+    _decode_tcp22, sample_size=TCP22_SIZE, frame_size=TCP22_SIZE * CAPTURES_PER_PACKET, has_sequence=True))
+SAMPLE16 = register_format(PacketFormat(
+    "udp16", "main_server (UDP) / main_server_tcp_threads (TCP): 16-byte <6hI samples",
+    _decode_sample16, sample_size=SAMPLE16_SIZE))
+TEXT7 = register_format(PacketFormat(
+    "text7", "main_server.stringPackets: GyX,GyY,GyZ,AcX,AcY,AcZ,millis lines",
+    _text_decoder(FULL_FIELDS), line_based=True))
+TEXT4 = register_format(PacketFormat(
+    "text4", "gyro-only build: GyX,GyY,GyZ,millis lines",
+    _text_decoder(GYRO_ONLY_FIELDS), line_based=True, gyro_only=True))
+
+
+def _sniff_text(data):
+    """text7/text4 from the comma count of the first complete line, None if it is not text."""
+    if not TEXT_CHARS.issuperset(data):
+        return None
+    newline = data.find(b"\n")
+    if newline < 0:
+        return None
+    commas = data[:newline].count(b",")
+    return {FULL_FIELDS - 1: "text7", GYRO_ONLY_FIELDS - 1: "text4"}.get(commas)
+
+
+def sniff_datagram(data):
+    """Pick the format of one UDP datagram: text by its characters, binary by its length."""
+    data = bytes(data)
+    if not data or data.startswith(b"SERVER_ACK"):
+        return None
+    text = _sniff_text(data)
+    if text is not None:
+        return text
+    if len(data) % SAMPLE16_SIZE == 0:
+        return "udp16"
+    if len(data) % TCP22_SIZE == 0:
+        return "tcp22"
+    return None
+
+
+def sniff_stream(data):
+    """Pick the format of a TCP stream from its first bytes; None until there are enough to decide.
+
+    A tcp22 stream starts with captures whose index field counts 0, 1, 2...; a stream of 16-byte samples
+    does not, so it is recognised once that check fails with enough bytes buffered.
+    """
+    data = bytes(data)
+    newline = data.find(b"\n")
+    text = _sniff_text(data[:newline + 1]) if newline >= 0 else None
+    if text is not None:
+        return text
+    needed = TCP22_SIZE * SNIFF_CAPTURES
+    if len(data) < needed:
+        return None
+    num = _decode_tcp22(data[:needed])["num"]
+    if np.array_equal(num, np.arange(SNIFF_CAPTURES)):
+        return "tcp22"
+    return "udp16"
+
+
+class StreamDecoder:
+    """Per-connection reassembly of frames from arbitrary TCP chunks for a fixed or sniffed format."""
+
+    def __init__(self, format_name="auto"):
+        self.auto = format_name == "auto"
+        self.format = None if self.auto else get_format(format_name)
+        self.pending = bytearray()
+
+    def reset(self):
+        self.pending.clear()
+        if self.auto:
+            self.format = None  # The device may come back with another firmware
+
+    def feed(self, data):
+        """Append received bytes; returns (common block, raw block) with every complete frame, or None."""
+        self.pending += data
+        if self.format is None:
+            name = sniff_stream(self.pending)
+            if name is None:
+                return None
+            self.format = get_format(name)
+            print(f"🔎 Detected {self.format.name} stream ({self.format.description})")
+        usable = self.format.complete_length(self.pending)
+        if not usable:
+            return None
+        decoded = self.format.decode(bytes(self.pending[:usable]))
+        del self.pending[:usable]
+        return decoded
+
+
+class DatagramDecoder:
+    """Decodes datagrams of a fixed or sniffed format (sniffed from the first data datagram)."""
+
+    def __init__(self, format_name="auto"):
+        self.auto = format_name == "auto"
+        self.format = None if self.auto else get_format(format_name)
+
+    def reset(self):
+        if self.auto:
+            self.format = None
+
+    def decode(self, data):
+        """Returns (common block, raw block), or None for datagrams that carry no samples."""
+        if self.format is None:
+            name = sniff_datagram(data)
+            if name is None:
+                return None
+            self.format = get_format(name)
+            print(f"🔎 Detected {self.format.name} datagrams ({self.format.description})")
+        if not self.format.line_based and len(data) % self.format.sample_size:
+            return None  # Not whole frames of this format (e.g. SERVER_ACK)
+        return self.format.decode(data)
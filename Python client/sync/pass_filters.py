@@ -7,11 +7,12 @@ from scipy.fftpack import fft
 from matplotlib.widgets import RadioButtons, CheckButtons
 from matplotlib.widgets import Slider
 
+from timestamp_unwrap import mean_sample_rate, unwrap_timestamps
+from session_format import Session
+from lod_pyramid import LodPyramid, minmax_line, session_pyramid
+
 def compute_sampling_rate(timestamps):
-    timestamps_sec = timestamps / 1e6
-    dt = np.diff(timestamps_sec)
-    fs = 1 / np.mean(dt)
-    return fs
+    return mean_sample_rate(timestamps)
 
 def butter_bandpass(lowcut, highcut, fs, order=4):
     nyquist = 0.5 * fs
@@ -38,7 +39,7 @@ def wavelet_denoise(data, wavelet='db4', level=1):
     denoised = pywt.waverec(coeffs, wavelet)
     return denoised[:len(data)]
 
-def interactive_plot(time_data, data, fs):
+def interactive_plot(time_data, data, fs, pyramid=None):
     fig, ax = plt.subplots(figsize=(10, 6))
     plt.subplots_adjust(bottom=0.25)
     
@@ -50,18 +51,47 @@ def interactive_plot(time_data, data, fs):
     colors = ["red", "green", "blue", "purple", "orange", "brown"]
     active_axis = 0
     active_filter = 'Raw'
+
+    # Only the visible range is drawn, at about one min/max pair per pixel; zooming fetches finer levels
+    pyramid = pyramid or LodPyramid.from_columns({label: data[:, i] for i, label in enumerate(axis_labels)})
+    filtered_pyramids = {}  # (filter, axis) -> pyramid of the filtered series, built on first use
+    raw_line, = ax.plot([], [], linestyle="solid", linewidth=0.2, alpha=0.5, color="black")
+    filtered_line, = ax.plot([], [], linestyle="solid", linewidth=0.2)
+    ax.grid(True, linestyle="dotted", linewidth=0.3)
+    ax.set_xlabel("Time (s)")
+    ax.set_xlim(time_data[0], time_data[-1])
+
+    def filtered_pyramid():
+        key = (active_filter, active_axis)
+        if key not in filtered_pyramids:
+            series = filters[active_filter](data[:, active_axis])
+            filtered_pyramids[key] = LodPyramid.from_columns({"value": series})
+        return filtered_pyramids[key]
+
+    def draw_visible(_=None):
+        left, right = ax.get_xlim()
+        start = max(0, int(np.searchsorted(time_data, left)) - 1)
+        stop = min(len(time_data), int(np.searchsorted(time_data, right)) + 1)
+        pixels = max(1, int(ax.bbox.width))
+        index, low, high, _ = pyramid.fetch(axis_labels[active_axis], start, stop, pixels)
+        x, y = minmax_line(index, low, high)
+        raw_line.set_data(time_data[x], y)
+        index, low, high, _ = filtered_pyramid().fetch("value", start, stop, pixels)
+        x, y = minmax_line(index, low, high)
+        filtered_line.set_data(time_data[x], y)
+        fig.canvas.draw_idle()
     
     def update_plot(label):
         nonlocal active_filter
         active_filter = label
-        filtered_data = filters[active_filter](data[:, active_axis])
-        ax.clear()
-        ax.plot(time_data, data[:, active_axis], linestyle="solid", linewidth=0.2, alpha=0.5, color="black", label=f"{axis_labels[active_axis]} (Raw)")
-        ax.plot(time_data, filtered_data, linestyle="solid", linewidth=0.2, color=colors[active_axis], label=f"{axis_labels[active_axis]} ({active_filter})")
+        raw_line.set_label(f"{axis_labels[active_axis]} (Raw)")
+        filtered_line.set_label(f"{axis_labels[active_axis]} ({active_filter})")
+        filtered_line.set_color(colors[active_axis])
+        draw_visible()
+        ax.relim()
+        ax.autoscale_view(scalex=False)
         ax.legend()
-        ax.grid(True, linestyle="dotted", linewidth=0.3)
         ax.set_ylabel(f"{axis_labels[active_axis]} Value")
-        ax.set_xlabel("Time (s)")
         plt.draw()
     
     def toggle_axis(label):
@@ -77,16 +107,23 @@ def interactive_plot(time_data, data, fs):
     check = RadioButtons(ax_check, axis_labels)
     check.on_clicked(toggle_axis)
     
+    ax.callbacks.connect('xlim_changed', draw_visible)  # Zoom and pan
     update_plot(active_filter)
     plt.show()
 
 def process_data(session_folder, session_name, data):
 
-    data = np.array(data)
-    timestamps = data[:, -1]
-
-    fs = compute_sampling_rate(timestamps)
+    pyramid = None
+    if isinstance(data, Session):
+        timestamps = data.timestamps  # Memory-mapped, already unwrapped
+        fs = data.sample_rate or compute_sampling_rate(timestamps)
+        pyramid = session_pyramid(data, ["GyX", "GyY", "GyZ", "AcX", "AcY", "AcZ"])  # Saved with the session
+        data = data.values()
+    else:
+        data = np.array(data)
+        timestamps = unwrap_timestamps(data[:, -1])
+        fs = compute_sampling_rate(timestamps)
     time_shifted = (timestamps - timestamps[0]) / 1e6
     
-    interactive_plot(time_shifted, data, fs)
+    interactive_plot(time_shifted, data, fs, pyramid)
     print("🎉 Interactive visualization complete!")
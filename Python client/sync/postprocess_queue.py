@@ -0,0 +1,226 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+
+# Post-capture processing (CSV export, plot pyramid, plots, WAVs, catalog) runs in a small process pool so that
+# stop_capture() returns as soon as the recording is on disk and the next capture can start at once.
+# A job is a list of steps run one after another; every step is a separate pool task, which gives
+# progress per step, lets a queued job be cancelled, and retries a failed step before giving up.
+# Jobs are journaled to rec/postprocess_jobs.json so unfinished ones can be resumed after a restart.
+JOURNAL_FILE = "postprocess_jobs.json"
+DEFAULT_STEPS = ["csv", "lod", "plots", "wav", "catalog"]
+DEFAULT_WORKERS = 1      # Keep cores free for the receive thread and the live views
+MAX_ATTEMPTS = 2         # Tries per step before the job is marked failed
+MIN_PLOT_SAMPLES = 12    # Fewer samples cannot be filtered (filtfilt padding)
+WORKER_NICENESS = 10     # Lower priority of the workers, where the OS supports it
+KEEP_FINISHED_JOBS = 50   # Finished jobs kept in the journal
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+def _init_worker():
+    # Workers only save figures. The spawned worker has already re-imported the main script (and with it
+    # pyplot) when this runs, so the environment variable would be too late; switch the backend instead.
+    import matplotlib
+    matplotlib.use("Agg")
+    if hasattr(os, "nice"):
+        os.nice(WORKER_NICENESS)
+
+
+def run_step(step, session_path, session_folder, session_name, rec_folder):
+    """Run one post-processing step in a worker process; returns a short result message."""
+    from session_format import SENSOR_FIELDS, open_session
+
+    session = open_session(session_path)
+    if step == "csv":
+        from session_recorder import export_csv
+        return export_csv(session, os.path.join(session_folder, f"{session_name}_raw_data.csv"))
+    if step == "lod":
+        from lod_pyramid import session_pyramid
+        pyramid = session_pyramid(session, SENSOR_FIELDS)
+        return f"{len(pyramid.levels)} levels"
+    if step == "plots":
+        if len(session) < MIN_PLOT_SAMPLES:
+            return "skipped: not enough data"
+        from save_data import generate_plots
+        generate_plots(session_folder, session_name, session)
+        return "plots saved"
+    if step == "wav":
+        if len(session) < MIN_PLOT_SAMPLES:
+            return "skipped: not enough data"
+        from wav_export import export_session_wavs
+        export_session_wavs(session_path, session_folder, session_name)
+        return "wav saved"
+    if step == "catalog":
+        from session_catalog import update_catalog
+        update_catalog(session_folder, rec_folder)
+        return "indexed"
+    raise ValueError(f"Unknown post-processing step '{step}'")
+
+
+class PostProcessQueue:
+    """Runs post-processing jobs in a process pool; every method returns immediately."""
+
+    def __init__(self, rec_folder="rec", workers=DEFAULT_WORKERS):
+        self.rec_folder = rec_folder
+        self.journal_path = os.path.join(rec_folder, JOURNAL_FILE)
+        self.lock = threading.RLock()  # Done callbacks can run inside submit()/cancel() on this thread
+        self.jobs = self._load_journal()
+        self.futures = {}  # job id -> future of its current step
+        self.next_id = max((job["id"] for job in self.jobs.values()), default=0) + 1
+        # spawn: workers start clean instead of inheriting the GUI threads and Tk state of this process
+        self.pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker)
+
+    def submit(self, session_path, session_folder, session_name, steps=DEFAULT_STEPS):
+        """Queue a job for a saved session; returns its id."""
+        with self.lock:
+            job = {
+                "id": self.next_id,
+                "session_path": session_path,
+                "session_folder": session_folder,
+                "session_name": session_name,
+                "steps": list(steps),
+                "done": [],
+                "status": QUEUED,
+                "attempts": {},
+                "errors": [],
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "finished": None,
+            }
+            self.next_id += 1
+            self.jobs[job["id"]] = job
+            self._start_next_step(job)
+            self._save_journal()
+        print(f"⚙️ Post-processing job {job['id']} queued for {session_name}")
+        return job["id"]
+
+    def _start_next_step(self, job):
+        """Submit the job's next step (lock held); finishes the job when there is none."""
+        remaining = [step for step in job["steps"] if step not in job["done"]]
+        if not remaining:
+            job["status"] = DONE
+            job["finished"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            self.futures.pop(job["id"], None)
+            print(f"✅ Post-processing job {job['id']} ({job['session_name']}) finished")
+            return
+        step = remaining[0]
+        job["status"] = RUNNING
+        job["attempts"][step] = job["attempts"].get(step, 0) + 1
+        future = self.pool.submit(run_step, step, job["session_path"], job["session_folder"],
+                                  job["session_name"], self.rec_folder)
+        self.futures[job["id"]] = future
+        future.add_done_callback(lambda done, job_id=job["id"], step=step: self._step_finished(job_id, step, done))
+
+    def _step_finished(self, job_id, step, future):
+        with self.lock:
+            job = self.jobs[job_id]
+            if job["status"] == CANCELLED:
+                self.futures.pop(job_id, None)
+            else:
+                try:
+                    future.result()
+                    job["done"].append(step)
+                    print(f"⚙️ Job {job_id}: {step} done ({len(job['done'])}/{len(job['steps'])})")
+                    self._start_next_step(job)
+                except CancelledError:
+                    pass
+                except Exception as e:
+                    job["errors"].append({"step": step, "attempt": job["attempts"][step], "error": f"{type(e).__name__}: {e}",
+                                          "time": time.strftime("%Y-%m-%d %H:%M:%S")})
+                    if job["attempts"][step] < MAX_ATTEMPTS:
+                        print(f"🔁 Job {job_id}: {step} failed ({e}), retrying")
+                        self._start_next_step(job)
+                    else:
+                        job["status"] = FAILED
+                        job["finished"] = time.strftime("%Y-%m-%d %H:%M:%S")
+                        self.futures.pop(job_id, None)
+                        print(f"❌ Job {job_id}: {step} failed after {MAX_ATTEMPTS} attempts: {e}")
+            self._save_journal()
+
+    def cancel(self, job_id):
+        """Cancel a job: its queued step is dropped, a running step is finished but nothing after it runs."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] not in (QUEUED, RUNNING):
+                return False
+            job["status"] = CANCELLED
+            job["finished"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            future = self.futures.get(job_id)
+            if future is not None:
+                future.cancel()
+            self._save_journal()
+        print(f"🛑 Post-processing job {job_id} cancelled")
+        return True
+
+    def cancel_latest(self):
+        """Cancel the most recent job that has not finished; returns its id or None."""
+        with self.lock:
+            pending = [job["id"] for job in self.jobs.values() if job["status"] in (QUEUED, RUNNING)]
+        if pending and self.cancel(pending[-1]):
+            return pending[-1]
+        return None
+
+    def retry(self, job_id):
+        """Run a failed or cancelled job again from its first unfinished step."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] not in (FAILED, CANCELLED):
+                return False
+            job["status"] = QUEUED
+            job["finished"] = None
+            job["attempts"] = {step: 0 for step in job["attempts"]}  # errors keep the history
+            self._start_next_step(job)
+            self._save_journal()
+        print(f"🔁 Post-processing job {job_id} queued again")
+        return True
+
+    def retry_failed(self):
+        with self.lock:
+            failed = [job["id"] for job in self.jobs.values() if job["status"] == FAILED]
+        return [job_id for job_id in failed if self.retry(job_id)]
+
+    def resume(self):
+        """Restart jobs the journal shows as unfinished (the program stopped while they were pending)."""
+        with self.lock:
+            for job in self.jobs.values():
+                if job["status"] in (QUEUED, RUNNING) and job["id"] not in self.futures:
+                    print(f"🔁 Resuming post-processing job {job['id']} ({job['session_name']})")
+                    self._start_next_step(job)
+            self._save_journal()
+
+    def status(self):
+        """Copies of all jobs, oldest first."""
+        with self.lock:
+            return [json.loads(json.dumps(job)) for job in self.jobs.values()]
+
+    def print_status(self):
+        jobs = self.status()
+        if not jobs:
+            print("⚙️ No post-processing jobs")
+        for job in jobs:
+            errors = f", last error: {job['errors'][-1]['error']}" if job["errors"] and job["status"] == FAILED else ""
+            print(f"⚙️ Job {job['id']} {job['session_name']}: {job['status']} "
+                  f"({len(job['done'])}/{len(job['steps'])} steps{errors})")
+
+    def shutdown(self, wait=True):
+        """Stop the pool; with wait=False queued steps are dropped and stay unfinished in the journal."""
+        self.pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _load_journal(self):
+        try:
+            with open(self.journal_path) as file:
+                return {job["id"]: job for job in json.load(file)}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_journal(self):
+        done = [job_id for job_id, job in self.jobs.items() if job["status"] == DONE]
+        for job_id in done[:-KEEP_FINISHED_JOBS]:
+            del self.jobs[job_id]
+        temp = self.journal_path + ".tmp"
+        with open(temp, "w") as file:
+            json.dump(list(self.jobs.values()), file, indent=2)
+        os.replace(temp, self.journal_path)
@@ -0,0 +1,115 @@
+import numpy as np
+
+DEFAULT_CAPACITY = 1 << 16  # ~65 s of one sensor at 1 kHz
+SENSOR_CHANNELS = 6         # GyX, GyY, GyZ, AcX, AcY, AcZ
+SENSOR_FIELDS = ["GyX", "GyY", "GyZ", "AcX", "AcY", "AcZ"]
+MAX_READ_RETRIES = 8
+
+
+class SampleRingBuffer:
+    """Fixed-capacity ring of int16 sensor columns plus uint64 timestamps.
+
+    One producer thread calls write(); any number of readers call latest() or use a RingReader cursor.
+    Readers never take a lock: the producer first claims the slots it is about to overwrite, then
+    publishes the write position (`head`, total samples ever written) once the data is in place. A
+    reader re-checks the claim after copying to detect that the producer lapped it (seqlock style).
+    Memory is fixed at construction.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, channels=SENSOR_CHANNELS, values=None, timestamps=None,
+                 head=None):
+        self.capacity = capacity
+        self.channels = channels
+        # Backing arrays may be passed in (e.g. views on shared memory); otherwise they are allocated here
+        self.values = values if values is not None else np.zeros((capacity, channels), dtype=np.int16)
+        self.timestamps = timestamps if timestamps is not None else np.zeros(capacity, dtype=np.uint64)
+        # [published head, claimed head]; claimed runs ahead of published while a write is in progress
+        self._head = head if head is not None else np.zeros(2, dtype=np.uint64)
+
+    @property
+    def head(self):
+        return int(self._head[0])
+
+    def write(self, values, timestamps):
+        """Append an (n, channels) block and its n timestamps (producer side only)."""
+        n = len(values)
+        if n > self.capacity:  # Only the newest `capacity` samples can be kept anyway
+            values, timestamps = values[-self.capacity:], timestamps[-self.capacity:]
+            skipped, n = n - self.capacity, self.capacity
+        else:
+            skipped = 0
+        head = self.head + skipped
+        start = head % self.capacity
+        first = min(n, self.capacity - start)
+        self._head[1] = head + n  # Claim the slots before touching them
+        self.values[start:start + first] = values[:first]
+        self.timestamps[start:start + first] = timestamps[:first]
+        if first < n:
+            self.values[:n - first] = values[first:]
+            self.timestamps[:n - first] = timestamps[first:]
+        self._head[0] = head + n  # Publish only once the data is in place
+
+    def write_block(self, block, timestamps=None):
+        """Append a decoded structured block (fields GyX..AcZ and timestamp).
+
+        timestamps: unwrapped uint64 timestamps to store instead of the block's raw uint32 ones.
+        """
+        values = np.column_stack([block[field] for field in SENSOR_FIELDS])
+        if timestamps is None:
+            timestamps = block["timestamp"].astype(np.uint64)
+        self.write(values, timestamps)
+
+    def _copy(self, begin, end):
+        """Copy samples [begin, end) in absolute positions; caller validates against overwrite."""
+        n = end - begin
+        start = begin % self.capacity
+        if start + n <= self.capacity:
+            return self.values[start:start + n].copy(), self.timestamps[start:start + n].copy()
+        idx = (np.arange(begin, end) % self.capacity)
+        return self.values[idx], self.timestamps[idx]
+
+    def read(self, begin, end):
+        """Consistent copy of samples [begin, end); returns (values, timestamps, begin) where begin may
+        have moved forward if the oldest requested samples were overwritten meanwhile."""
+        for _ in range(MAX_READ_RETRIES):
+            begin = max(begin, self.head - self.capacity)
+            if begin >= end:
+                break
+            values, timestamps = self._copy(begin, end)
+            # Anything the producer claimed while we copied may be torn; retry from the new tail
+            if int(self._head[1]) - self.capacity <= begin:
+                return values, timestamps, begin
+        return (np.empty((0, self.channels), dtype=self.values.dtype),
+                np.empty(0, dtype=self.timestamps.dtype), end)
+
+    def latest(self, n=1):
+        """Snapshot of the newest n samples (fewer if the ring holds less)."""
+        head = self.head
+        values, timestamps, _ = self.read(max(head - n, 0), head)
+        return values, timestamps
+
+    def reader(self, from_start=False):
+        """Create an independent cursor; by default it only sees samples written from now on."""
+        return RingReader(self, 0 if from_start else self.head)
+
+
+class RingReader:
+    """A consumer cursor on a SampleRingBuffer; each consumer keeps its own."""
+
+    def __init__(self, ring, cursor):
+        self.ring = ring
+        self.cursor = cursor
+        self.lost = 0  # Samples overwritten before this reader got to them
+
+    def available(self):
+        return self.ring.head - self.cursor
+
+    def read(self, max_samples=None):
+        """Return (values, timestamps) written since the last call."""
+        end = self.ring.head
+        if max_samples is not None:
+            end = min(end, self.cursor + max_samples)
+        values, timestamps, begin = self.ring.read(self.cursor, end)
+        self.lost += begin - self.cursor
+        self.cursor = begin + len(values)
+        return values, timestamps
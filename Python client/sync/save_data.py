@@ -2,15 +2,19 @@ import os
 import csv
 import wave
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 from scipy.signal import butter, filtfilt
 
 from scipy.signal import resample
 
+from timestamp_unwrap import mean_sample_rate, unwrap_timestamps
+from session_format import Session
+from wav_export import STANDARD_SAMPLE_RATES, export_wavs, load_axes
+from lod_pyramid import LodPyramid, envelope, minmax_line, session_pyramid
+
 # Constants
 BUFFER_SIZE = 1100  # How many samples to process per write
-STANDARD_SAMPLE_RATES = [ 16000, 22050, 32000, 44100, 48000, 96000]
+COMBINED_PLOT_DPI = 300  # Saved resolution of the combined plot; sets how many buckets are drawn
+AXIS_PLOT_DPI = 200      # Saved resolution of the per-axis plots
 
 
 
@@ -37,9 +41,8 @@ def normalize_to_16bit(data):
     return np.int16((data / max_val) * 32767)
 
 def estimate_sample_rate(timestamps):
-    """Estimate the closest valid sample rate from timestamps (in microseconds)."""
-    time_diffs = np.diff(timestamps) / 1_000_000.0  # Convert µs to seconds
-    avg_sample_rate = 1.0 / np.mean(time_diffs)  # Hz
+    """Estimate the closest valid sample rate from timestamps (in microseconds, may wrap around)."""
+    avg_sample_rate = mean_sample_rate(timestamps)  # Hz
     return min(STANDARD_SAMPLE_RATES, key=lambda x: abs(x - avg_sample_rate))
 
 def resample_to_uniform_timing(data, timestamps, target_sample_rate):
@@ -59,18 +62,18 @@ def resample_to_uniform_timing(data, timestamps, target_sample_rate):
 def save_wav(filename, data, sample_rate):
     """Writes resampled sensor data to a WAV file."""
     with wave.open(filename, "wb") as wav_file:
-        wav_file.setnchannels(2)
+        wav_file.setnchannels(1 if data.ndim == 1 else data.shape[1])
         wav_file.setsampwidth(2) #
         wav_file.setframerate(sample_rate)
         wav_file.writeframes(data.tobytes())
     print(f"✅ Saved WAV: {filename} at {sample_rate} Hz")
 
-def process_realtime_wav(csv_file, session_folder, session_name):
-    """Reads CSV, synchronizes timestamps, and saves WAV files in real-time."""
-    os.makedirs(session_folder, exist_ok=True)
-    
-    df = pd.read_csv(csv_file, delimiter=",")
-    timestamps = df.iloc[:, 6].values  # Extract timestamps (column 6)
+def process_realtime_wav(source, session_folder, session_name, mode="per-axis"):
+    """Reads a session (or CSV) once, resamples all axes in one pass and saves the WAV file(s).
+
+    mode: "per-axis" (one mono file per axis) or "multichannel" (one interleaved 6-channel file).
+    """
+    timestamps, axes = load_axes(source)
     
     if len(timestamps) < 2:
         print("❌ Error: Not enough data to estimate sample rate.")
@@ -80,14 +83,7 @@ def process_realtime_wav(csv_file, session_folder, session_name):
     sample_rate = estimate_sample_rate(timestamps)
     print(f"📊 Estimated Sample Rate: {sample_rate} Hz")
 
-    # Process & save WAV files for each axis
-    axis_labels = ["GyX", "GyY", "GyZ", "AcX", "AcY", "AcZ"]
-    for i, label in enumerate(axis_labels):
-        sensor_data = df.iloc[:, i].values  # Extract column data
-        resampled_data = resample_to_uniform_timing(sensor_data, timestamps, sample_rate)
-        
-        wav_filename = os.path.join(session_folder, f"{session_name}_{label}.wav")
-        save_wav(wav_filename, resampled_data, sample_rate)
+    export_wavs(timestamps, axes, session_folder, session_name, mode, sample_rate)
 
     print("🎉 All WAV files are synchronized and saved successfully!")
 
@@ -101,49 +97,59 @@ def butter_lowpass_filter(data, cutoff=5, fs=50, order=3):
     return filtfilt(b, a, data)
 
 def generate_plots(session_folder, session_name, collected_data):
-    if not collected_data:
+    import matplotlib.pyplot as plt  # Imported on use, so importing save_data does not pick a backend
+
+    if len(collected_data) == 0:
         print("⚠️ No data to plot.")
         return
 
-    data = np.array(collected_data)
-    timestamps = data[:, -1] / 1_000_000.0  # Convert µs to seconds
-    time_data = np.arange(len(data))  # Sample indices
+    axis_labels = ["GyX", "GyY", "GyZ", "AcX", "AcY", "AcZ"]
+    if isinstance(collected_data, Session):
+        columns = [collected_data[label] for label in axis_labels]
+        timestamps = collected_data.timestamps / 1_000_000.0  # Already unwrapped µs
+        pyramid = session_pyramid(collected_data, axis_labels)  # Stored next to the columns (built once)
+    else:
+        data = np.array(collected_data)
+        columns = [data[:, i] for i in range(len(axis_labels))]
+        timestamps = unwrap_timestamps(data[:, -1]) / 1_000_000.0  # Convert µs to seconds
+        pyramid = LodPyramid.from_columns(dict(zip(axis_labels, columns)))
+    samples = len(timestamps)
     time_shifted = timestamps - timestamps[0]  # Start time from 0
+    # The filter still runs over every sample, but only about one min/max pair per pixel is drawn
+    filtered = [butter_lowpass_filter(column) for column in columns]
 
-    axis_labels = ["GyX", "GyY", "GyZ", "AcX", "AcY", "AcZ"]
     colors = ["red", "green", "blue"] * 2  # Keep same color scheme
 
     # Create combined plot (all axes in one figure)
     fig, axs = plt.subplots(6, 1, figsize=(14, 12), dpi=600)  # Reduced resolution
+    pixels = 14 * COMBINED_PLOT_DPI
     for i, label in enumerate(axis_labels):
-        raw_data = data[:, i]
-        filtered_data = butter_lowpass_filter(raw_data)
-
-        axs[i].plot(time_data, raw_data, linestyle="solid", linewidth=0.2, alpha=0.5, color=colors[i], label=f"{label} (Raw)")
-        axs[i].plot(time_data, filtered_data, linestyle="dashed", linewidth=0.2, color=colors[i], label=f"{label} (Filtered)")
+        index, low, high, _ = pyramid.fetch(label, pixels=pixels)
+        axs[i].plot(*minmax_line(index, low, high), linestyle="solid", linewidth=0.2, alpha=0.5, color=colors[i], label=f"{label} (Raw)")
+        axs[i].plot(*minmax_line(*envelope(filtered[i], pixels)), linestyle="dashed", linewidth=0.2, color=colors[i], label=f"{label} (Filtered)")
 
         axs[i].legend(loc="upper right")
         axs[i].grid(True, linestyle="dotted", linewidth=0.3)
         axs[i].set_ylabel(f"{label} Value")
 
     axs[-1].set_xlabel("Time (s)")
-    axs[-1].set_xticks(np.linspace(0, len(time_data), num=6))
+    axs[-1].set_xticks(np.linspace(0, samples, num=6))
     axs[-1].set_xticklabels(np.round(np.linspace(0, time_shifted[-1], num=6), 2))
 
     plt.tight_layout()
     combined_plot_filename = os.path.join(session_folder, f"{session_name}_filtered_plot.png")
-    plt.savefig(combined_plot_filename, dpi=300)  # High resolution for full plot
+    plt.savefig(combined_plot_filename, dpi=COMBINED_PLOT_DPI)  # High resolution for full plot
     plt.close()
     print(f"✅ Combined plot saved to {combined_plot_filename}")
 
     # Create separate plots for each axis
+    pixels = 8 * AXIS_PLOT_DPI
     for i, label in enumerate(axis_labels):
         fig, ax = plt.subplots(figsize=(8, 6), dpi=600)
-        raw_data = data[:, i]
-        filtered_data = butter_lowpass_filter(raw_data)
+        index, low, high, _ = pyramid.fetch(label, pixels=pixels)
 
-        ax.plot(time_data, raw_data, linestyle="solid", linewidth=0.2, alpha=0.5, color="red", label=f"{label} (Raw)")
-        ax.plot(time_data, filtered_data, linestyle="dashed", linewidth=0.2, color="blue", label=f"{label} (Filtered)")
+        ax.plot(*minmax_line(index, low, high), linestyle="solid", linewidth=0.2, alpha=0.5, color="red", label=f"{label} (Raw)")
+        ax.plot(*minmax_line(*envelope(filtered[i], pixels)), linestyle="dashed", linewidth=0.2, color="blue", label=f"{label} (Filtered)")
 
         ax.legend(loc="upper right")
         ax.grid(True, linestyle="dotted", linewidth=0.3)
@@ -152,7 +158,7 @@ def generate_plots(session_folder, session_name, collected_data):
         ax.set_title(f"{label} Data Plot")
 
         plot_filename = os.path.join(session_folder, f"{session_name}_{label}_plot.png")
-        plt.savefig(plot_filename, dpi=200)
+        plt.savefig(plot_filename, dpi=AXIS_PLOT_DPI)
         plt.close()
         print(f"✅ Plot saved to {plot_filename}")
 
@@ -0,0 +1,195 @@
+import json
+import os
+import shutil
+import sys
+import time
+import numpy as np
+
+from session_format import HEADER_FILE, column_file, is_session, open_session, session_path, write_header
+from timestamp_unwrap import mean_sample_rate
+
+# Crash safety for recordings in progress. A session's column files only grow, so the recording is cut
+# into segments by commit points: every SEGMENT_SECONDS the writer thread flushes and fsyncs the column
+# files, then atomically replaces journal.json with the number of samples now known to be on disk.
+# A crash or power loss can therefore cost at most the segment being written; the data itself is still
+# written in whole chunks and fsync runs once per segment, off the receive thread.
+# A folder with a journal but no header.json is an interrupted recording: recover() truncates the
+# columns to whole rows and writes the header, which makes it a normal session again.
+JOURNAL_FILE = "journal.json"
+JOURNAL_VERSION = 1
+SEGMENT_SECONDS = 1.0        # Time between commits (the most a crash can lose)
+RECORDING_PREFIX = ".recording_"
+RECOVERED_SUFFIX = "_recovered"
+
+
+def fsync_dir(path):
+    """Make a rename inside `path` durable (not possible on Windows, where os.replace is enough)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_manifest(path, manifest):
+    """Replace <path>/journal.json atomically and durably."""
+    temp = os.path.join(path, JOURNAL_FILE + ".tmp")
+    with open(temp, "w") as file:
+        json.dump(manifest, file, indent=2)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, os.path.join(path, JOURNAL_FILE))
+    fsync_dir(path)
+
+
+def read_manifest(path):
+    with open(os.path.join(path, JOURNAL_FILE)) as file:
+        return json.load(file)
+
+
+class SegmentJournal:
+    """Commits a SessionWriter's column files segment by segment; used from the thread that writes."""
+
+    def __init__(self, session, interval=SEGMENT_SECONDS, extra=None):
+        self.session = session
+        self.interval = interval
+        self.extra = extra or {}
+        self.segments = 0
+        self.committed = 0
+        self.last_commit = time.monotonic()
+        self._write()
+
+    def _write(self):
+        write_manifest(self.session.path, {
+            "version": JOURNAL_VERSION,
+            "fields": self.session.fields,
+            "committed_samples": self.committed,
+            "segments": self.segments,
+            "ranges": self.session.ranges,
+            "device": self.session.device,
+            "extra": self.extra,
+            "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+    def maybe_commit(self):
+        """Commit if the current segment is SEGMENT_SECONDS old."""
+        if time.monotonic() - self.last_commit >= self.interval:
+            self.commit()
+
+    def commit(self):
+        """fsync everything written so far, then record it in the journal."""
+        self.last_commit = time.monotonic()
+        if self.session.samples == self.committed:
+            return
+        for file in self.session.files.values():
+            file.flush()
+            os.fsync(file.fileno())
+        self.committed = self.session.samples
+        self.segments += 1
+        self._write()
+
+    def discard(self):
+        """Remove the journal once the session header is written (the session is complete)."""
+        try:
+            os.remove(os.path.join(self.session.path, JOURNAL_FILE))
+        except OSError:
+            pass
+
+
+def recover(path):
+    """Rebuild the header of an interrupted recording at `path` (a .vibs folder); returns the header.
+
+    Rows up to the last commit are kept. Rows written after it are kept too when every column has them
+    and their timestamps keep increasing (after a crash of the program they usually survive; after a
+    power loss they may be missing or zeroed).
+    """
+    manifest = read_manifest(path)
+    fields = [tuple(field) for field in manifest["fields"] or []]
+    committed = manifest["committed_samples"]
+    rows = None
+    for name, dtype in fields:
+        file_name, stored_dtype = column_file(name, dtype)
+        size = os.path.getsize(os.path.join(path, file_name)) if os.path.exists(os.path.join(path, file_name)) else 0
+        rows = size // stored_dtype.itemsize if rows is None else min(rows, size // stored_dtype.itemsize)
+    rows = rows or 0
+    if rows < committed:
+        print(f"⚠️ {path}: {committed - rows} committed samples are missing")
+    timestamps = None
+    if rows and any(name == "timestamp" for name, _ in fields):
+        file_name, stored_dtype = column_file("timestamp", None)
+        timestamps = np.fromfile(os.path.join(path, file_name), dtype=stored_dtype, count=rows)
+        if rows > committed:
+            tail = timestamps[committed:rows].astype(np.int64)
+            previous = int(timestamps[committed - 1]) if committed else int(tail[0]) - 1
+            bad = np.flatnonzero(np.diff(tail, prepend=previous) <= 0)  # Zeroed or stale rows
+            if len(bad):
+                rows = committed + int(bad[0])
+    for name, dtype in fields:
+        file_name, stored_dtype = column_file(name, dtype)
+        column_path = os.path.join(path, file_name)
+        if os.path.exists(column_path):
+            os.truncate(column_path, rows * stored_dtype.itemsize)
+    sample_rate = mean_sample_rate(timestamps[:rows]) if timestamps is not None and rows > 1 else None
+    extra = dict(manifest["extra"], recovered=True, committed_samples=committed, recovered_samples=rows)
+    header = write_header(path, fields, rows, sample_rate, manifest["ranges"], manifest["device"], extra)
+    os.remove(os.path.join(path, JOURNAL_FILE))
+    fsync_dir(path)
+    print(f"🩹 Recovered {rows} samples in {path} ({max(rows - committed, 0)} after the last commit)")
+    return header
+
+
+def recover_recordings(rec_folder="rec"):
+    """Recover the interrupted recordings left under rec_folder.
+
+    That covers recordings cut short (journal, no header) and complete ones that were never moved to
+    their session folder (the program stopped at the name prompt). Each becomes
+    rec/<start time>_recovered/<start time>_recovered.vibs; returns (session path, session folder,
+    session name) for each, ready for post-processing.
+    """
+    recovered = []
+    if not os.path.isdir(rec_folder):
+        return recovered
+    for entry in sorted(os.scandir(rec_folder), key=lambda entry: entry.name):
+        if not (entry.is_dir() and entry.name.startswith(RECORDING_PREFIX)):
+            continue
+        name = entry.name[len(RECORDING_PREFIX):]
+        path = session_path(entry.path, name)
+        if os.path.exists(os.path.join(path, JOURNAL_FILE)):
+            header = recover(path)
+        elif is_session(path):
+            header = open_session(path).header
+            print(f"🩹 {path} is complete but was never named")
+        else:
+            print(f"⚠️ {entry.path} has no journal, leaving it as is")
+            continue
+        if not header["samples"]:
+            shutil.rmtree(entry.path)
+            continue
+        session_name = name + RECOVERED_SUFFIX
+        session_folder = os.path.join(rec_folder, session_name)
+        os.makedirs(session_folder, exist_ok=True)
+        target = session_path(session_folder, session_name)
+        os.replace(path, target)
+        os.rmdir(entry.path)
+        recovered.append((target, session_folder, session_name))
+    return recovered
+
+
+if __name__ == "__main__":
+    # python segment_journal.py [REC_FOLDER | SESSION.vibs]
+    target = sys.argv[1].rstrip("/\\") if len(sys.argv) > 1 else "rec"
+    if os.path.exists(os.path.join(target, JOURNAL_FILE)):
+        recover(target)
+    elif os.path.exists(os.path.join(target, HEADER_FILE)):
+        print(f"✅ {target} is a complete session")
+    else:
+        sessions = recover_recordings(target)
+        for session, _, _ in sessions:
+            print(f"✅ {session}")
+        if not sessions:
+            print(f"✅ Nothing to recover in {target}")
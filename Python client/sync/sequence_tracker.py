@@ -0,0 +1,140 @@
+import numpy as np
+
+TIMESTAMP_MODULO = 1 << 32  # Device timestamp is a uint32 of micros()
+PERIOD_SMOOTHING = 0.1      # EMA weight for the capture period estimate
+SEEN_WINDOW = 4096          # Recent capture timestamps kept to tell duplicates from late captures
+
+
+class SequenceTracker:
+    """Detects dropped, duplicated and late (out-of-order) captures from the `num` and `timestamp` fields.
+
+    `num` is the capture index inside a packet (0..captures_per_packet-1), so it pins down the exact
+    number of captures lost inside a packet; the device timestamp tells how many whole packets went
+    missing on top of that. Gaps are measured from the newest capture seen so far; a capture at or
+    behind it is a duplicate if its timestamp was already seen, otherwise a late capture that fills
+    part of an earlier gap. Everything is computed per block with NumPy; only the newest capture and
+    the timestamps of the last SEEN_WINDOW captures are carried over.
+    """
+
+    def __init__(self, captures_per_packet=100, expected_period_us=None):
+        self.captures_per_packet = captures_per_packet
+        self.period_us = expected_period_us  # Estimated from the data when None
+        self.reset_stream()
+        self.received = 0
+        self.dropped = 0
+        self.duplicated = 0
+        self.reordered = 0
+        self.gaps = 0
+
+    def reset_stream(self):
+        """Forget the previous captures (e.g. after a reconnect) so the restart is not counted as a gap."""
+        self.last_timestamp = None  # Raw uint32 timestamp of the last capture received
+        self.last_time = None       # Its unwrapped timestamp
+        self.high_time = None       # Newest unwrapped timestamp seen
+        self.high_num = None        # `num` of that capture
+        self.recent = np.empty(0, dtype=np.int64)  # Unwrapped timestamps of the last captures
+
+    def update(self, block):
+        """Account for a decoded block; returns the number of captures missing before each capture."""
+        missing = np.zeros(len(block), dtype=np.int64)
+        if not len(block):
+            return missing
+        num = block["num"].astype(np.int64)
+        raw = block["timestamp"].astype(np.int64)
+        first = self.last_timestamp is None
+        if first:
+            self.last_timestamp = self.last_time = self.high_time = int(raw[0])
+            self.high_num = int(num[0])
+
+        # Unwrapped timeline: signed steps between consecutive captures, robust to the uint32 rollover
+        half = TIMESTAMP_MODULO // 2
+        step_prev = (np.diff(raw, prepend=self.last_timestamp) + half) % TIMESTAMP_MODULO - half
+        time = self.last_time + np.cumsum(step_prev)
+
+        # Newest capture seen before each capture (running maximum, carried over from the last block)
+        times = np.concatenate(([self.high_time], time))
+        nums = np.concatenate(([self.high_num], num))
+        high = np.maximum.accumulate(times)
+        holder = np.maximum.accumulate(np.where(times == high, np.arange(len(times)), 0))
+        step = time - high[:-1]
+        per_packet = self.captures_per_packet
+        num_step = (num - nums[holder[:-1]]) % per_packet
+
+        forward = step > 0
+        behind = ~forward
+        if first:
+            behind[0] = False  # The very first capture only seeds the timeline
+        duplicate = np.zeros(len(block), dtype=bool)
+        if behind.any():
+            # A duplicate repeats a timestamp seen before it (in earlier blocks or earlier in this one)
+            seen = np.concatenate((self.recent, time))
+            _, first_index, inverse = np.unique(seen, return_index=True, return_inverse=True)
+            seen_before = first_index[inverse.ravel()] < np.arange(len(seen))
+            duplicate = behind & seen_before[len(self.recent):]
+        late = behind & ~duplicate
+
+        self._update_period(step[forward & (num_step == 1)])
+        if self.period_us:
+            # Captures lost inside the packet are exact; whole lost packets come from the timestamp gap
+            missing_in_packet = (num_step - 1) % per_packet
+            missing_by_time = step / self.period_us - 1
+            whole_packets = np.maximum(np.round((missing_by_time - missing_in_packet) / per_packet), 0)
+            missing[forward] = (missing_in_packet + per_packet * whole_packets)[forward]
+
+        self.received += len(block)
+        late_count = int(np.count_nonzero(late))
+        self.dropped = max(self.dropped + int(missing.sum()) - late_count, 0)  # Late captures fill gaps
+        self.gaps += int(np.count_nonzero(missing))
+        self.duplicated += int(np.count_nonzero(duplicate))
+        self.reordered += late_count
+        self.last_timestamp = int(raw[-1])
+        self.last_time = int(time[-1])
+        self.high_time = int(high[-1])
+        self.high_num = int(nums[holder[-1]])
+        self.recent = np.concatenate((self.recent, time))[-SEEN_WINDOW:]
+        return missing
+
+    def _update_period(self, steps):
+        if not len(steps):
+            return
+        period = float(np.median(steps))
+        if self.period_us is None:
+            self.period_us = period
+        else:
+            self.period_us += PERIOD_SMOOTHING * (period - self.period_us)
+
+    def loss_ratio(self):
+        expected = self.received + self.dropped
+        return self.dropped / expected if expected else 0.0
+
+    def summary(self):
+        return (f"received={self.received} dropped={self.dropped} ({self.loss_ratio():.2%}) "
+                f"gaps={self.gaps} duplicated={self.duplicated} reordered={self.reordered}")
+
+
+def fill_gaps(block, missing, fields=("GyX", "GyY", "GyZ", "AcX", "AcY", "AcZ"), period_us=None):
+    """Expand a block to a float array with NaN rows where captures were lost.
+
+    Returns (values, timestamps): values has one column per field, timestamps (unwrapped, so a uint32
+    rollover inside the block does not jump back) are interpolated for the missing rows so the stream
+    stays evenly spaced. Rows lost before the first capture are extrapolated with period_us, or with
+    the block's own mean period.
+    """
+    positions = np.arange(len(block)) + np.cumsum(missing)
+    total = int(positions[-1]) + 1 if len(block) else 0
+    values = np.full((total, len(fields)), np.nan)
+    if not len(block):
+        return values, np.empty(0)
+    for column, field in enumerate(fields):
+        values[positions, column] = block[field]
+    raw = block["timestamp"].astype(np.int64)
+    half = TIMESTAMP_MODULO // 2
+    time = raw[0] + np.cumsum((np.diff(raw, prepend=raw[0]) + half) % TIMESTAMP_MODULO - half)
+    time = time.astype(np.float64)
+    timestamps = np.interp(np.arange(total), positions, time)
+    if positions[0]:
+        if period_us is None:
+            span = positions[-1] - positions[0]
+            period_us = (time[-1] - time[0]) / span if span else 0.0
+        timestamps[:positions[0]] = time[0] - (positions[0] - np.arange(positions[0])) * period_us
+    return values, timestamps
@@ -0,0 +1,275 @@
+import json
+import os
+import struct
+import sys
+import zlib
+import numpy as np
+
+from csv_loader import load_recording
+from session_format import is_session, open_session
+from timestamp_unwrap import MICROS_PER_SECOND, mean_sample_rate
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Archive file (<name>.vibz) for keeping old sessions small and sliceable by time:
+#   MAGIC, compressed chunks back to back, JSON index, uint64 index offset, MAGIC
+# A chunk holds CHUNK_SAMPLES samples of every column. Each column is delta coded (wrapping integer
+# arithmetic, so it is lossless), zigzag mapped so small negative steps become small numbers, and byte
+# shuffled (all low bytes, then all high bytes) before the chunk is compressed in one call.
+# The index keeps the first/last timestamp of every chunk, so a time range only decodes its chunks.
+ARCHIVE_SUFFIX = ".vibz"
+MAGIC = b"VIBSARC1"
+FOOTER = struct.Struct("<Q8s")
+FORMAT_VERSION = 1
+CHUNK_SAMPLES = 1 << 14  # ~16 s at 1 kHz per chunk: a short slice decodes one or two
+ZLIB_LEVEL = 1           # Fast; the delta + shuffle step does most of the work
+ZSTD_LEVEL = 3
+
+CODECS = {"zlib": (lambda data: zlib.compress(data, ZLIB_LEVEL), zlib.decompress)}
+if zstandard is not None:
+    CODECS["zstd"] = (zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress,
+                      zstandard.ZstdDecompressor().decompress)
+DEFAULT_CODEC = "zstd" if "zstd" in CODECS else "zlib"
+
+def _signed(dtype):
+    return np.dtype(f"<i{np.dtype(dtype).itemsize}")
+
+
+def encode_column(values):
+    """Delta + zigzag + byte shuffle of one integer column; returns bytes."""
+    signed = _signed(values.dtype)
+    bits = signed.itemsize * 8
+    x = np.ascontiguousarray(values).view(signed)
+    delta = np.empty_like(x)
+    delta[0] = x[0]
+    np.subtract(x[1:], x[:-1], out=delta[1:])  # Wraps on overflow, undone exactly by the cumsum
+    zigzag = (delta << 1) ^ (delta >> (bits - 1))
+    return zigzag.view(np.uint8).reshape(-1, signed.itemsize).T.tobytes()
+
+
+def decode_column(data, dtype, count):
+    dtype = np.dtype(dtype)
+    signed = _signed(dtype)
+    unsigned = np.dtype(f"<u{signed.itemsize}")
+    zigzag = np.frombuffer(data, dtype=np.uint8).reshape(signed.itemsize, count).T.copy().view(unsigned).ravel()
+    delta = ((zigzag >> 1) ^ (0 - (zigzag & 1))).view(signed)
+    return np.cumsum(delta, dtype=signed).view(dtype)
+
+
+class ArchiveWriter:
+    """Appends structured blocks to an archive; columns are the fields of `fields` (or of the first block)."""
+
+    def __init__(self, path, fields=None, chunk_samples=CHUNK_SAMPLES, codec=DEFAULT_CODEC, extra=None):
+        if codec not in CODECS:
+            raise ValueError(f"Codec '{codec}' is not available, expected one of {sorted(CODECS)}")
+        self.path = path
+        self.chunk_samples = chunk_samples
+        self.codec = codec
+        self.compress = CODECS[codec][0]
+        self.extra = extra or {}
+        self.dtype = None if fields is None else np.dtype(list(fields))
+        self.pending = []
+        self.pending_samples = 0
+        self.chunks = []
+        self.samples = 0
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+
+    def append(self, block):
+        if not len(block):
+            return
+        if self.dtype is None:
+            self.dtype = block.dtype
+        self.pending.append(block)
+        self.pending_samples += len(block)
+        if self.pending_samples >= self.chunk_samples:
+            data = np.concatenate([np.asarray(b)[list(self.dtype.names)].astype(self.dtype) for b in self.pending])
+            full = len(data) - len(data) % self.chunk_samples
+            for start in range(0, full, self.chunk_samples):
+                self._write_chunk(data[start:start + self.chunk_samples])
+            self.pending = [data[full:]] if full < len(data) else []
+            self.pending_samples = len(data) - full
+
+    def _write_chunk(self, chunk):
+        payload = b"".join(encode_column(chunk[name]) for name in self.dtype.names)
+        blob = self.compress(payload)
+        timestamps = chunk["timestamp"] if "timestamp" in self.dtype.names else None
+        self.chunks.append({
+            "offset": self.file.tell(),
+            "length": len(blob),
+            "first_sample": self.samples,
+            "samples": len(chunk),
+            "t_first": int(timestamps[0]) if timestamps is not None else None,
+            "t_last": int(timestamps[-1]) if timestamps is not None else None,
+        })
+        self.file.write(blob)
+        self.samples += len(chunk)
+
+    def close(self, sample_rate=None):
+        """Write the last partial chunk and the index; returns the index."""
+        if self.pending:
+            data = np.concatenate([np.asarray(b)[list(self.dtype.names)].astype(self.dtype) for b in self.pending])
+            self._write_chunk(data)
+            self.pending = []
+        index = {
+            "version": FORMAT_VERSION,
+            "codec": self.codec,
+            "samples": self.samples,
+            "fields": [[name, self.dtype[name].str] for name in self.dtype.names] if self.dtype else [],
+            "sample_rate": sample_rate,
+            "chunks": self.chunks,
+        }
+        index.update(self.extra)
+        offset = self.file.tell()
+        self.file.write(json.dumps(index).encode())
+        self.file.write(FOOTER.pack(offset, MAGIC))
+        self.file.close()
+        return index
+
+
+class Archive:
+    """Reads an archive; only the chunks overlapping the requested range are decompressed."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a session archive")
+            file.seek(-FOOTER.size, os.SEEK_END)
+            offset, magic = FOOTER.unpack(file.read(FOOTER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is incomplete (no index)")
+            file.seek(offset)
+            self.index = json.loads(file.read(os.path.getsize(path) - FOOTER.size - offset))
+        if self.index["codec"] not in CODECS:
+            raise ValueError(f"{path} needs the '{self.index['codec']}' codec (pip install zstandard)")
+        self.decompress = CODECS[self.index["codec"]][1]
+        self.dtype = np.dtype([tuple(field) for field in self.index["fields"]])
+        chunks = self.index["chunks"]
+        self.first_samples = np.array([c["first_sample"] for c in chunks] + [len(self)], dtype=np.int64)
+        if chunks and chunks[0]["t_first"] is not None:
+            self.t_first = np.array([c["t_first"] for c in chunks], dtype=np.uint64)
+            self.t_last = np.array([c["t_last"] for c in chunks], dtype=np.uint64)
+        else:
+            self.t_first = self.t_last = None
+
+    def __len__(self):
+        return self.index["samples"]
+
+    @property
+    def columns(self):
+        return list(self.dtype.names)
+
+    @property
+    def sample_rate(self):
+        return self.index.get("sample_rate")
+
+    @property
+    def start_time(self):
+        """First timestamp (µs); read_time() offsets are relative to it."""
+        return int(self.t_first[0]) if self.t_first is not None and len(self.t_first) else 0
+
+    def read_chunks(self, first, last):
+        """Decode chunks first..last (inclusive) into one structured array."""
+        chunks = self.index["chunks"][first:last + 1]
+        out = np.empty(sum(c["samples"] for c in chunks), dtype=self.dtype)
+        if not chunks:
+            return out
+        with open(self.path, "rb") as file:
+            file.seek(chunks[0]["offset"])
+            blob = file.read(chunks[-1]["offset"] + chunks[-1]["length"] - chunks[0]["offset"])
+        position = 0
+        for chunk in chunks:
+            start = chunk["offset"] - chunks[0]["offset"]
+            payload = self.decompress(blob[start:start + chunk["length"]])
+            count = chunk["samples"]
+            column_offset = 0
+            for name in self.dtype.names:
+                size = self.dtype[name].itemsize * count
+                out[name][position:position + count] = decode_column(
+                    payload[column_offset:column_offset + size], self.dtype[name], count)
+                column_offset += size
+            position += count
+        return out
+
+    def read(self, start=0, stop=None):
+        """Samples [start, stop) by index."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return np.empty(0, dtype=self.dtype)
+        first = int(np.searchsorted(self.first_samples, start, side="right")) - 1
+        last = int(np.searchsorted(self.first_samples, stop, side="left")) - 1
+        data = self.read_chunks(first, last)
+        base = int(self.first_samples[first])
+        return data[start - base:stop - base]
+
+    def read_time(self, start_s, duration_s):
+        """Samples whose timestamp lies in [start_s, start_s + duration_s) seconds from the first sample."""
+        if self.t_first is None:
+            raise ValueError(f"{self.path} has no timestamp column")
+        lo = self.start_time + int(round(start_s * MICROS_PER_SECOND))
+        hi = lo + int(round(duration_s * MICROS_PER_SECOND))
+        first = int(np.searchsorted(self.t_last, lo, side="left"))
+        last = int(np.searchsorted(self.t_first, hi, side="left")) - 1
+        if first > last:
+            return np.empty(0, dtype=self.dtype)
+        data = self.read_chunks(first, last)
+        timestamps = data["timestamp"]
+        return data[np.searchsorted(timestamps, lo, side="left"):np.searchsorted(timestamps, hi, side="left")]
+
+
+def open_archive(path):
+    return Archive(path)
+
+
+def archive_path(source):
+    """Default archive name next to a session folder or CSV file."""
+    base = source.rstrip("/\\")
+    return os.path.splitext(base)[0] + ARCHIVE_SUFFIX
+
+
+def pack(source, path=None, chunk_samples=CHUNK_SAMPLES, codec=DEFAULT_CODEC):
+    """Archive a .vibs session folder or a CSV recording of any layout; returns the archive path."""
+    path = path or archive_path(source)
+    if is_session(source):
+        session = open_session(source)
+        extra = {key: session.header.get(key) for key in ("ranges", "device", "created")}
+        writer = ArchiveWriter(path, [(name, session[name].dtype.str) for name in session.columns],
+                               chunk_samples, codec, extra)
+        for start in range(0, len(session), chunk_samples):
+            writer.append(np.rec.fromarrays([session[name][start:start + chunk_samples] for name in session.columns],
+                                            dtype=writer.dtype))
+        sample_rate = session.sample_rate
+    else:
+        block, _ = load_recording(source)
+        writer = ArchiveWriter(path, block.dtype.descr, chunk_samples, codec)
+        writer.append(block)
+        sample_rate = mean_sample_rate(block["timestamp"]) if len(block) > 1 else None
+    writer.close(sample_rate)
+    print(f"🗜️ Archived {writer.samples} samples to {path} ({os.path.getsize(path)} bytes, {codec})")
+    return path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("pack", "info", "slice"):
+        print("Usage: python session_archive.py pack SESSION_OR_CSV [ARCHIVE]\n"
+              "       python session_archive.py info ARCHIVE\n"
+              "       python session_archive.py slice ARCHIVE START_S DURATION_S [OUTPUT_CSV]")
+        sys.exit(1)
+    if sys.argv[1] == "pack":
+        pack(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    elif sys.argv[1] == "info":
+        archive = open_archive(sys.argv[2])
+        duration = (int(archive.t_last[-1]) - archive.start_time) / MICROS_PER_SECOND if archive.t_last is not None else 0
+        print(f"📦 {len(archive)} samples, {len(archive.index['chunks'])} chunks ({archive.index['codec']}), "
+              f"{duration:.1f} s, columns {archive.columns}")
+    else:
+        archive = open_archive(sys.argv[2])
+        data = archive.read_time(float(sys.argv[3]), float(sys.argv[4]))
+        print(f"✂️ {len(data)} samples from t={sys.argv[3]} s")
+        if len(sys.argv) > 5:
+            np.savetxt(sys.argv[5], np.column_stack([data[name].astype(np.int64) for name in archive.columns]),
+                       fmt="%d", delimiter=",")
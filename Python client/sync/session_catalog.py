@@ -0,0 +1,288 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+
+from csv_loader import CACHE_SUFFIX, load_recording
+from session_archive import ARCHIVE_SUFFIX, open_archive
+from session_format import SENSOR_FIELDS, SESSION_SUFFIX, is_session, open_session
+from timestamp_unwrap import MICROS_PER_SECOND, mean_sample_rate
+
+# SQLite index of the sessions under rec/: one row per session folder with its duration, sample count,
+# rate, per-axis vibration RMS and dominant frequencies, and the artifacts it holds. Each folder is
+# fingerprinted from its file names, sizes and mtimes; a scan only re-reads folders whose fingerprint
+# changed and drops rows of folders that are gone.
+CATALOG_FILE = "catalog.sqlite"
+SCHEMA_VERSION = 1
+FFT_SIZE = 4096          # Samples per spectrum segment
+MAX_FFT_SEGMENTS = 32    # Segments averaged per axis, spread over the recording
+PEAK_COUNT = 3           # Dominant frequencies kept per axis
+ARTIFACT_KINDS = {       # Artifact name -> file suffix
+    "session": SESSION_SUFFIX,
+    "archive": ARCHIVE_SUFFIX,
+    "csv": ".csv",
+    "wav": ".wav",
+    "plot": ".png",
+    "wire": ".vcap",
+}
+IGNORED_SUFFIXES = (CACHE_SUFFIX, ".tmp")  # Written by readers; must not change the fingerprint
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sessions (
+    folder TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    source TEXT,
+    started TEXT,
+    device TEXT,
+    samples INTEGER,
+    duration_s REAL,
+    sample_rate REAL,
+    {", ".join(f"rms_{axis} REAL, peak_{axis} REAL" for axis in SENSOR_FIELDS)},
+    peaks TEXT,
+    artifacts TEXT,
+    error TEXT,
+    scanned REAL
+)"""
+
+
+def folder_fingerprint(folder):
+    """Hash of the names, sizes and mtimes of a session folder's files (one level, plus .vibs headers)."""
+    entries = []
+    for entry in os.scandir(folder):
+        if entry.name.endswith(IGNORED_SUFFIXES):
+            continue
+        if entry.is_dir():
+            if not is_session(entry.path):
+                continue
+            stat = os.stat(os.path.join(entry.path, "header.json"))
+        else:
+            stat = entry.stat()
+        entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    return hashlib.sha1(repr(sorted(entries)).encode()).hexdigest()
+
+
+def find_artifacts(folder):
+    """{kind: [file names]} for the artifacts present in a session folder."""
+    artifacts = {}
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(IGNORED_SUFFIXES):
+            continue
+        for kind, suffix in ARTIFACT_KINDS.items():
+            if name.endswith(suffix):
+                artifacts.setdefault(kind, []).append(name)
+    return artifacts
+
+
+def _pick_csv(folder, names):
+    """The raw recording among a folder's CSVs (not filtered/derived exports)."""
+    raw = [name for name in names if name.endswith("_raw_data.csv") or name.endswith("_gyro_data.csv")]
+    candidates = raw or [name for name in names if "filtered" not in name]
+    return os.path.join(folder, candidates[0]) if candidates else None
+
+
+def load_source(folder, artifacts):
+    """(source, timestamps µs, {axis: values}, metadata) from the best artifact: session, archive, then CSV."""
+    if "session" in artifacts:
+        path = os.path.join(folder, artifacts["session"][0])
+        session = open_session(path)
+        meta = {"device": session.header.get("device"),
+                "started": session.header.get("started") or session.header.get("created"),
+                "sample_rate": session.sample_rate}
+        axes = {axis: session[axis] for axis in SENSOR_FIELDS if axis in session.columns}
+        return path, session.timestamps, axes, meta
+    if "archive" in artifacts:
+        path = os.path.join(folder, artifacts["archive"][0])
+        archive = open_archive(path)
+        data = archive.read()
+        meta = {"device": archive.index.get("device"), "started": archive.index.get("created"),
+                "sample_rate": archive.sample_rate}
+        axes = {axis: data[axis] for axis in SENSOR_FIELDS if axis in archive.columns}
+        return path, data["timestamp"], axes, meta
+    path = _pick_csv(folder, artifacts.get("csv", []))
+    if path is None:
+        return None, None, {}, {}
+    block, layout = load_recording(path)
+    axes = {axis: block[axis] for axis in (SENSOR_FIELDS[:3] if layout["gyro_only"] else SENSOR_FIELDS)}
+    meta = {"started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(os.path.getmtime(path)))}
+    return path, block["timestamp"], axes, meta
+
+
+def axis_stats(values, sample_rate):
+    """(RMS around the mean, [(frequency Hz, amplitude), ...] of the strongest spectral peaks)."""
+    values = np.asarray(values, dtype=np.float64)
+    rms = float(np.std(values)) if len(values) else None
+    if not sample_rate or len(values) < FFT_SIZE:
+        return rms, []
+    starts = np.linspace(0, len(values) - FFT_SIZE, min(MAX_FFT_SEGMENTS, len(values) // FFT_SIZE)).astype(np.int64)
+    segments = values[starts[:, None] + np.arange(FFT_SIZE)]
+    segments -= segments.mean(axis=1, keepdims=True)
+    window = np.hanning(FFT_SIZE)
+    spectrum = np.abs(np.fft.rfft(segments * window, axis=1)).mean(axis=0) * 2 / window.sum()
+    spectrum[0] = 0
+    local_max = np.flatnonzero((spectrum[1:-1] > spectrum[:-2]) & (spectrum[1:-1] >= spectrum[2:])) + 1
+    strongest = local_max[np.argsort(spectrum[local_max])[::-1][:PEAK_COUNT]]
+    frequencies = np.fft.rfftfreq(FFT_SIZE, 1.0 / sample_rate)
+    return rms, [(round(float(frequencies[i]), 2), round(float(spectrum[i]), 2)) for i in strongest]
+
+
+def summarize_folder(folder):
+    """Catalog row (without fingerprint) for one session folder."""
+    artifacts = find_artifacts(folder)
+    row = {"folder": os.path.abspath(folder), "name": os.path.basename(os.path.normpath(folder)),
+           "artifacts": json.dumps(artifacts), "peaks": json.dumps({}), "scanned": time.time()}
+    try:
+        source, timestamps, axes, meta = load_source(folder, artifacts)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row
+    if source is None:
+        return row
+    row.update(source=os.path.relpath(source, folder), started=meta.get("started"), device=meta.get("device"),
+               samples=len(timestamps))
+    if len(timestamps) > 1:
+        row["duration_s"] = (int(timestamps[-1]) - int(timestamps[0])) / MICROS_PER_SECOND
+        row["sample_rate"] = meta.get("sample_rate") or mean_sample_rate(timestamps)
+    peaks = {}
+    for axis, values in axes.items():
+        rms, axis_peaks = axis_stats(values, row.get("sample_rate"))
+        row[f"rms_{axis}"] = rms
+        row[f"peak_{axis}"] = axis_peaks[0][0] if axis_peaks else None
+        peaks[axis] = axis_peaks
+    row["peaks"] = json.dumps(peaks)
+    return row
+
+
+class SessionCatalog:
+    """The catalog database of one rec/ folder (rec/catalog.sqlite by default)."""
+
+    def __init__(self, rec_folder="rec", db_path=None):
+        self.rec_folder = rec_folder
+        os.makedirs(rec_folder, exist_ok=True)
+        self.db = sqlite3.connect(db_path or os.path.join(rec_folder, CATALOG_FILE))
+        self.db.row_factory = sqlite3.Row
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.db.execute("DROP TABLE IF EXISTS sessions")  # Rebuilt by the next scan
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.db.execute(SCHEMA)
+        self.db.commit()
+
+    def session_folders(self):
+        """Session folders directly under rec/ (recordings still in progress are hidden folders)."""
+        return [entry.path for entry in os.scandir(self.rec_folder)
+                if entry.is_dir() and not entry.name.startswith(".")]
+
+    def scan(self, force=False):
+        """Bring the catalog up to date; returns (updated, unchanged, removed) counts."""
+        known = {row["folder"]: row["fingerprint"] for row in self.db.execute("SELECT folder, fingerprint FROM sessions")}
+        seen = set()
+        updated = unchanged = 0
+        for folder in self.session_folders():
+            key = os.path.abspath(folder)
+            seen.add(key)
+            fingerprint = folder_fingerprint(folder)
+            if not force and known.get(key) == fingerprint:
+                unchanged += 1
+                continue
+            self._store(summarize_folder(folder), fingerprint)
+            updated += 1
+        removed = [folder for folder in known if folder not in seen]
+        self.db.executemany("DELETE FROM sessions WHERE folder = ?", [(folder,) for folder in removed])
+        self.db.commit()
+        return updated, unchanged, len(removed)
+
+    def update_folder(self, folder):
+        """Re-index one session folder now (e.g. right after a recording is saved)."""
+        self._store(summarize_folder(folder), folder_fingerprint(folder))
+        self.db.commit()
+
+    def _store(self, row, fingerprint):
+        row = dict(row, fingerprint=fingerprint)
+        columns = ", ".join(row)
+        self.db.execute(f"INSERT OR REPLACE INTO sessions ({columns}) VALUES ({', '.join('?' * len(row))})",
+                        list(row.values()))
+
+    def query(self, where="1", params=(), order_by="started DESC"):
+        """Rows as dicts (artifacts and peaks decoded), e.g. query("duration_s > ?", (60,), "rms_GyX DESC")."""
+        rows = self.db.execute(f"SELECT * FROM sessions WHERE {where} ORDER BY {order_by}", params).fetchall()
+        result = []
+        for row in rows:
+            row = dict(row)
+            row["artifacts"] = json.loads(row["artifacts"] or "{}")
+            row["peaks"] = json.loads(row["peaks"] or "{}")
+            result.append(row)
+        return result
+
+    def find(self, text=None, min_duration=None, artifact=None):
+        """Sessions whose name contains `text`, lasting at least `min_duration` s, having an artifact kind."""
+        clauses, params = ["1"], []
+        if text:
+            clauses.append("name LIKE ?")
+            params.append(f"%{text}%")
+        if min_duration is not None:
+            clauses.append("duration_s >= ?")
+            params.append(min_duration)
+        rows = self.query(" AND ".join(clauses), params)
+        return [row for row in rows if artifact is None or artifact in row["artifacts"]]
+
+    def get(self, name):
+        rows = self.query("name = ?", (name,))
+        return rows[0] if rows else None
+
+    def close(self):
+        self.db.close()
+
+
+def update_catalog(session_folder, rec_folder="rec"):
+    """Index a freshly saved session; failures only warn, the recording itself is already safe."""
+    try:
+        catalog = SessionCatalog(rec_folder)
+        catalog.update_folder(session_folder)
+        catalog.close()
+    except Exception as e:
+        print(f"⚠️ Could not update the session catalog: {e}")
+
+
+def format_row(row):
+    duration = f"{row['duration_s']:.1f}s" if row["duration_s"] is not None else "-"
+    rate = f"{row['sample_rate']:.0f} Hz" if row["sample_rate"] else "-"
+    peaks = ", ".join(f"{axis} {row[f'peak_{axis}']:.0f} Hz" for axis in SENSOR_FIELDS if row.get(f"peak_{axis}"))
+    return f"{row['name']:<40} {row['started'] or '-':<20} {duration:>9} {rate:>8}  {','.join(row['artifacts'])}  {peaks}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and search the recording sessions under rec/")
+    parser.add_argument("--rec", default="rec", help="Recordings folder (default: rec)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    scan = commands.add_parser("scan", help="Index new and changed session folders")
+    scan.add_argument("--force", action="store_true", help="Re-read every folder")
+    listing = commands.add_parser("list", help="List sessions, newest first")
+    listing.add_argument("text", nargs="?", help="Part of the session name")
+    listing.add_argument("--min-duration", type=float, help="Shortest duration in seconds")
+    listing.add_argument("--has", choices=sorted(ARTIFACT_KINDS), help="Only sessions with this artifact")
+    show = commands.add_parser("show", help="Print everything known about one session")
+    show.add_argument("name")
+    args = parser.parse_args()
+
+    catalog = SessionCatalog(args.rec)
+    if args.command == "scan":
+        start = time.perf_counter()
+        updated, unchanged, removed = catalog.scan(args.force)
+        print(f"🗂️ {updated} indexed, {unchanged} unchanged, {removed} removed in {time.perf_counter() - start:.2f}s")
+    elif args.command == "list":
+        for row in catalog.find(args.text, args.min_duration, args.has):
+            print(format_row(row))
+    else:
+        row = catalog.get(args.name)
+        if row is None:
+            print("❌ Session not found (run: python session_catalog.py scan)")
+        else:
+            print(json.dumps(row, indent=2))
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
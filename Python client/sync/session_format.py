@@ -0,0 +1,173 @@
+import json
+import os
+import time
+import numpy as np
+
+from timestamp_unwrap import MICROS_PER_SECOND, MILLIS_PER_SECOND, TimestampReconstructor
+
+# Native session format: a <name>.vibs folder with one raw little-endian file per column (int16 for
+# the sensor channels), the unwrapped device timestamps as uint64 µs, and a small JSON header.
+# Readers memory-map the columns, so opening a session costs nothing and only touched ranges are read.
+SESSION_SUFFIX = ".vibs"
+HEADER_FILE = "header.json"
+TIMESTAMP_FILE = "timestamp.u64"
+TIMESTAMP_DTYPE = np.dtype("<u8")
+FORMAT_VERSION = 1
+SENSOR_FIELDS = ["GyX", "GyY", "GyZ", "AcX", "AcY", "AcZ"]
+# MPU6050 full-scale settings used by the firmware (GYRO_CONFIG / ACCEL_CONFIG = 0)
+DEFAULT_RANGES = {"gyro_dps": 250, "accel_g": 2}
+TIMESTAMP_UNITS = {"us": MICROS_PER_SECOND, "ms": MILLIS_PER_SECOND}
+
+
+def session_path(session_folder, session_name):
+    return os.path.join(session_folder, session_name + SESSION_SUFFIX)
+
+
+def is_session(path):
+    return os.path.isfile(os.path.join(path, HEADER_FILE))
+
+
+def _column_file(name, dtype):
+    return f"{name}.{np.dtype(dtype).str[1:]}"  # e.g. GyX.i2, cps.u4
+
+
+def column_file(name, dtype):
+    """(file name, stored dtype) of a field; the timestamp is always stored as uint64 µs."""
+    if name == "timestamp":
+        return TIMESTAMP_FILE, TIMESTAMP_DTYPE
+    return _column_file(name, dtype), np.dtype(dtype)
+
+
+def write_header(path, fields, samples, sample_rate=None, ranges=None, device=None, extra=None):
+    """Write header.json for the column files of `fields` (atomically: a session without it is incomplete)."""
+    fields = fields or [(name, "<i2") for name in SENSOR_FIELDS] + [("timestamp", TIMESTAMP_DTYPE.str)]
+    columns = {}
+    for name, column_dtype in fields:
+        if name == "timestamp":
+            continue
+        columns[name] = {"file": _column_file(name, column_dtype), "dtype": column_dtype}
+    header = {
+        "version": FORMAT_VERSION,
+        "samples": samples,
+        "column_order": [name for name, _ in fields],
+        "columns": columns,
+        "timestamp": {"file": TIMESTAMP_FILE, "dtype": TIMESTAMP_DTYPE.str, "unit": "us"},
+        "sample_rate": sample_rate,
+        "ranges": ranges or DEFAULT_RANGES,
+        "device": device,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    header.update(extra or {})
+    temp = os.path.join(path, HEADER_FILE + ".tmp")
+    with open(temp, "w") as file:
+        json.dump(header, file, indent=2)
+    os.replace(temp, os.path.join(path, HEADER_FILE))
+    return header
+
+
+class SessionWriter:
+    """Appends structured blocks to a session, one file per column.
+
+    fields: the (name, dtype) pairs to keep, in CSV order; "timestamp" marks where the timestamp
+    column goes and is stored unwrapped as uint64 µs. Defaults to the fields of the first block.
+    """
+
+    def __init__(self, path, fields=None, device=None, ranges=None, timestamp_unit="us", extra=None):
+        self.path = path
+        self.device = device
+        self.ranges = ranges or DEFAULT_RANGES
+        self.timestamp_unit = timestamp_unit
+        self.extra = extra or {}
+        self.timeline = TimestampReconstructor(TIMESTAMP_UNITS[timestamp_unit])
+        self.fields = None
+        self.files = {}
+        self.samples = 0
+        os.makedirs(path, exist_ok=True)
+        if fields is not None:
+            self._open(np.dtype(list(fields)))
+
+    def _open(self, dtype):
+        self.fields = [(name, dtype[name].str) for name in dtype.names]
+        for name, column_dtype in self.fields:
+            file_name, _ = column_file(name, column_dtype)
+            self.files[name] = open(os.path.join(self.path, file_name), "wb")
+
+    def append(self, block, timestamps=None):
+        """Append a structured block; timestamps (uint64 µs, already unwrapped) override block["timestamp"]."""
+        if not len(block):
+            return
+        if self.fields is None:
+            self._open(block.dtype)
+        for name, column_dtype in self.fields:
+            if name == "timestamp":
+                if timestamps is None:
+                    timestamps = self.timeline.update(block["timestamp"])
+                    if self.timestamp_unit == "ms":
+                        timestamps = timestamps * 1000
+                self.files[name].write(np.ascontiguousarray(timestamps, dtype=TIMESTAMP_DTYPE).tobytes())
+            else:
+                self.files[name].write(np.ascontiguousarray(block[name], dtype=column_dtype).tobytes())
+        self.samples += len(block)
+
+    def close(self, sample_rate=None):
+        """Close the column files and write the header (last, so a session without one is incomplete)."""
+        for file in self.files.values():
+            file.close()
+        return write_header(self.path, self.fields, self.samples, sample_rate or self.timeline.sample_rate(),
+                            self.ranges, self.device, self.extra)
+
+
+def write_session(path, block, timestamps=None, **kwargs):
+    """Write a whole structured block as a session in one go; returns the header."""
+    writer = SessionWriter(path, **kwargs)
+    writer.append(block, timestamps)
+    return writer.close()
+
+
+class Session:
+    """Read-only view of a session; columns are np.memmap arrays opened on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, HEADER_FILE)) as file:
+            self.header = json.load(file)
+        self._columns = {}
+
+    def __len__(self):
+        return self.header["samples"]
+
+    @property
+    def columns(self):
+        return list(self.header["column_order"])
+
+    @property
+    def sample_rate(self):
+        return self.header.get("sample_rate")
+
+    @property
+    def timestamps(self):
+        """Unwrapped device timestamps, uint64 µs."""
+        return self["timestamp"]
+
+    def __getitem__(self, name):
+        if name not in self._columns:
+            info = self.header["timestamp"] if name == "timestamp" else self.header["columns"][name]
+            dtype = np.dtype(info["dtype"])
+            if len(self):
+                column = np.memmap(os.path.join(self.path, info["file"]), dtype=dtype, mode="r", shape=(len(self),))
+            else:
+                column = np.empty(0, dtype=dtype)
+            self._columns[name] = column
+        return self._columns[name]
+
+    def values(self, names=SENSOR_FIELDS, start=0, stop=None):
+        """(n, len(names)) array of the requested channels over [start, stop)."""
+        return np.column_stack([self[name][start:stop] for name in names])
+
+    def rows(self, start=0, stop=None, dtype=np.int64):
+        """All columns in CSV order (sensor channels, timestamp, extras) as one array."""
+        return np.column_stack([self[name][start:stop].astype(dtype) for name in self.columns])
+
+
+def open_session(path):
+    return Session(path)
@@ -0,0 +1,146 @@
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+from segment_journal import SegmentJournal
+from session_format import SessionWriter, open_session, session_path
+
+# A recording is written as it arrives: the receive thread copies blocks into fixed-size chunks and
+# a background writer appends full chunks to a <name>.vibs session (session_format.py, one file per
+# column). Memory stays at a few chunks whatever the capture length. A chunk that is still filling is
+# handed to the writer once it is a segment old, and the writer commits the files every segment
+# (segment_journal.py), so a crash loses at most about one segment; segment_journal.py recovers the rest.
+CHUNK_SAMPLES = 1 << 14     # Samples per chunk (~360 KB of 22-byte TCP captures)
+MAX_PENDING_CHUNKS = 32     # Chunks queued for the writer before new ones are dropped
+CSV_SUFFIX = "_raw_data.csv"
+
+
+class SessionRecorder:
+    """Streams structured sample blocks to disk from a background thread.
+
+    The recording starts before the session has a name (it is asked when the capture stops), so it
+    goes to a temporary folder under rec/ and finish() moves it to the session folder.
+    """
+
+    def __init__(self, rec_folder, dtype, chunk_samples=CHUNK_SAMPLES, device=None):
+        self.dtype = np.dtype(dtype)
+        self.chunk_samples = chunk_samples
+        self.name = time.strftime("%Y%m%d_%H%M%S")
+        self.folder = os.path.join(rec_folder, f".recording_{self.name}")
+        self.path = session_path(self.folder, self.name)
+        self.session = SessionWriter(self.path, self.dtype.descr, device=device)
+        self.started = time.time()
+        self.journal = SegmentJournal(self.session, extra={
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started))})
+
+        self.lock = threading.Lock()  # append() on the receive thread vs finish() on the UI thread
+        self.chunk = np.empty(chunk_samples, dtype=self.dtype)
+        self.fill = 0
+        self.free_chunks = queue.SimpleQueue()
+        self.pending = queue.Queue(MAX_PENDING_CHUNKS)
+        self.samples = 0
+        self.dropped = 0
+        self.closed = False
+        self.writer = threading.Thread(target=self._write_loop, name="session-writer", daemon=True)
+        self.writer.start()
+
+    def append(self, block):
+        """Copy a block into the current chunk (called by the receive thread; never waits on disk)."""
+        with self.lock:
+            if self.closed:
+                return
+            offset = 0
+            while offset < len(block):
+                count = min(len(block) - offset, self.chunk_samples - self.fill)
+                self.chunk[self.fill:self.fill + count] = block[offset:offset + count]
+                self.fill += count
+                offset += count
+                if self.fill == self.chunk_samples:
+                    self._submit()
+
+    def _submit(self):
+        try:
+            self.pending.put_nowait((self.chunk, self.fill))
+        except queue.Full:
+            self.dropped += self.fill
+            print(f"⚠️ Disk writer is behind, dropped {self.fill} samples")
+            self.fill = 0
+            return
+        try:
+            self.chunk = self.free_chunks.get_nowait()
+        except queue.Empty:
+            self.chunk = np.empty(self.chunk_samples, dtype=self.dtype)
+        self.fill = 0
+
+    def _flush_partial(self):
+        """Hand the chunk being filled to the writer, so a slow stream is still committed every segment."""
+        with self.lock:
+            if self.fill and not self.closed:
+                self._submit()
+
+    def _write_loop(self):
+        while True:
+            try:
+                item = self.pending.get(timeout=self.journal.interval)
+            except queue.Empty:
+                self._flush_partial()
+                continue
+            if item is None:
+                return
+            chunk, count = item
+            self.session.append(chunk[:count])
+            self.samples += count
+            self.free_chunks.put(chunk)
+            self.journal.maybe_commit()
+
+    def close(self):
+        """Flush the partial chunk, wait for the writer and write the session header."""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            if self.fill:
+                self.pending.put((self.chunk, self.fill))
+        self.pending.put(None)
+        self.writer.join()
+        self.journal.commit()
+        self.session.extra.update({
+            "dropped": self.dropped,
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            "duration_s": round(time.time() - self.started, 3),
+        })
+        self.session.close()
+        self.journal.discard()
+
+    def finish(self, session_folder, session_name):
+        """Close the recording and move it to session_folder as <session_name>.vibs; returns its path.
+
+        An existing session of the same name is kept; the new one then gets the recording time appended.
+        """
+        self.close()
+        os.makedirs(session_folder, exist_ok=True)
+        target = session_path(session_folder, session_name)
+        if os.path.exists(target):
+            target = session_path(session_folder, f"{session_name}_{self.name}")
+        os.replace(self.path, target)
+        os.rmdir(self.folder)
+        self.folder, self.name, self.path = session_folder, session_name, target
+        print(f"💾 Recorded {self.samples} samples to {target}"
+              + (f" ({self.dropped} dropped)" if self.dropped else ""))
+        return target
+
+
+def read_session(session_folder, session_name):
+    """Open a recording; columns are memory-mapped, nothing is loaded until it is used."""
+    return open_session(session_path(session_folder, session_name))
+
+
+def export_csv(session, csv_filename, rows_per_write=CHUNK_SAMPLES):
+    """Write a session as the classic headerless integer CSV, one chunk at a time."""
+    print(f"💾 Exporting CSV: {csv_filename}")
+    with open(csv_filename, "w", newline="") as file:
+        for start in range(0, len(session), rows_per_write):
+            np.savetxt(file, session.rows(start, start + rows_per_write), fmt="%d", delimiter=",")
+    return csv_filename
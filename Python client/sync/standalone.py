@@ -1,7 +1,7 @@
 import os
 import tkinter as tk
 from tkinter import filedialog
-import pandas as pd
+import numpy as np
 
 import sys
 
@@ -9,29 +9,38 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from save_data import create_new_folder, generate_plots, process_realtime_wav
 
 from pass_filters import process_data
+from session_format import HEADER_FILE, SENSOR_FIELDS, SESSION_SUFFIX, open_session
+from csv_loader import load_recording
+from session_catalog import update_catalog
 
 def main():
-    # Open file dialog to select CSV file
+    # Open file dialog to select a CSV file or the header.json of a .vibs session
     root = tk.Tk()
     root.withdraw()  # Hide the root window
-    csv_file = filedialog.askopenfilename(title="Select CSV File", filetypes=[("CSV Files", "*.csv")])
+    csv_file = filedialog.askopenfilename(title="Select CSV File or Session Header",
+                                          filetypes=[("CSV Files", "*.csv"), ("Vibs Sessions", HEADER_FILE)])
 
     if not csv_file:
         print("❌ No file selected. Exiting...")
         return
 
-    # Read CSV data
+    # Read the data (a session stays memory-mapped)
     try:
-        df = pd.read_csv(csv_file)
-        collected_data = df.values.tolist()  # Convert DataFrame to list of lists
+        if os.path.basename(csv_file) == HEADER_FILE:
+            csv_file = os.path.dirname(csv_file)
+            collected_data = open_session(csv_file)
+        else:
+            block, _ = load_recording(csv_file)  # Any CSV layout, cached after the first load
+            collected_data = np.column_stack([block[field] for field in SENSOR_FIELDS] + [block["timestamp"]])
     except Exception as e:
-        print(f"❌ Error reading CSV file: {e}")
+        print(f"❌ Error reading file: {e}")
         return
 
     # Ask for session name
     session_name = input("Enter a name for this session: ").strip()
     if not session_name:
-        session_name = os.path.splitext(os.path.basename(csv_file))[0]  # Default to filename without extension
+        session_name = os.path.basename(csv_file).removesuffix(SESSION_SUFFIX)
+        session_name = os.path.splitext(session_name)[0]  # Default to filename without extension
 
     # Create output folder
     rec_folder = create_new_folder()
@@ -46,6 +55,7 @@ def main():
 
 
 
+    update_catalog(session_folder, rec_folder)
     print(f"🎉 Processing complete! Data saved in: {session_folder}")
 
 if __name__ == "__main__":
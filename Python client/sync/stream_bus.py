@@ -0,0 +1,112 @@
+import threading
+
+from ring_buffer import SampleRingBuffer
+
+# What to do when a subscriber falls so far behind that the ring overwrote samples it had not read
+ON_OVERFLOW_DOWNSAMPLE = "downsample"  # Double its decimation (up to MAX_DECIMATION)
+ON_OVERFLOW_DETACH = "detach"          # Unsubscribe it
+ON_OVERFLOW_DROP = "drop"              # Just count the lost samples
+MAX_DECIMATION = 64
+WAKEUP_TIMEOUT = 0.5  # Seconds a subscriber thread sleeps without a publish before re-checking
+
+
+class Subscriber:
+    """One sink on the bus: its own cursor, block size, decimation and delivery thread."""
+
+    def __init__(self, bus, name, callback, block_size, decimation, on_overflow):
+        self.bus = bus
+        self.name = name
+        self.callback = callback
+        self.block_size = block_size
+        self.decimation = decimation
+        self.on_overflow = on_overflow
+        self.reader = bus.ring.reader()
+        self.wakeup = threading.Event()
+        self.running = True
+        self.delivered = 0
+        self.thread = threading.Thread(target=self._run, name=f"bus-{name}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.running:
+            self.wakeup.wait(WAKEUP_TIMEOUT)
+            self.wakeup.clear()
+            self._drain()
+
+    def _drain(self):
+        while self.running:
+            chunk = self.block_size * self.decimation if self.block_size else None
+            if chunk and self.reader.available() < chunk:
+                return
+            lost_before = self.reader.lost
+            values, timestamps = self.reader.read(chunk)
+            if self.reader.lost > lost_before:
+                self._handle_overflow(self.reader.lost - lost_before)
+            if not len(values):
+                return
+            if self.decimation > 1:
+                values, timestamps = values[::self.decimation], timestamps[::self.decimation]
+            try:
+                self.callback(values, timestamps)
+            except Exception as e:
+                print(f"⚠️ Subscriber '{self.name}' failed: {e}")
+            self.delivered += len(values)
+
+    def _handle_overflow(self, lost):
+        if self.on_overflow == ON_OVERFLOW_DETACH:
+            print(f"✂️ Subscriber '{self.name}' is too slow ({lost} samples lost), detaching.")
+            self.bus.unsubscribe(self.name)
+        elif self.on_overflow == ON_OVERFLOW_DOWNSAMPLE and self._can_decimate_more():
+            self.decimation *= 2
+            print(f"⏬ Subscriber '{self.name}' is too slow ({lost} samples lost), decimating by {self.decimation}.")
+
+    def _can_decimate_more(self):
+        # A decimated chunk must still fit comfortably in the ring
+        chunk = (self.block_size or 1) * self.decimation * 2
+        return self.decimation < MAX_DECIMATION and chunk <= self.bus.ring.capacity // 2
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+
+
+class StreamBus:
+    """In-process fan-out of the sensor stream.
+
+    The producer publishes blocks into a SampleRingBuffer and never waits for anyone. Each subscriber
+    reads the ring with its own cursor on its own thread, so a slow sink only loses (or decimates) its
+    own samples instead of back-pressuring the socket reader.
+    """
+
+    def __init__(self, ring=None):
+        self.ring = ring if ring is not None else SampleRingBuffer()
+        self.subscribers = {}
+
+    def subscribe(self, name, callback, block_size=None, decimation=1, on_overflow=ON_OVERFLOW_DOWNSAMPLE):
+        """Register `callback(values, timestamps)`; values is an (n, 6) int16 array.
+
+        block_size: samples per callback after decimation (None = whatever is available).
+        decimation: deliver every n-th sample.
+        """
+        subscriber = Subscriber(self, name, callback, block_size, decimation, on_overflow)
+        self.subscribers[name] = subscriber
+        return subscriber
+
+    def unsubscribe(self, name):
+        subscriber = self.subscribers.pop(name, None)
+        if subscriber is not None:
+            subscriber.stop()
+
+    def publish(self, block, timestamps=None):
+        """Producer side: append a decoded block and wake the subscribers. Never blocks."""
+        self.ring.write_block(block, timestamps)
+        self.notify()
+
+    def notify(self):
+        """Wake the subscribers (also used when the ring is written by another process)."""
+        for subscriber in list(self.subscribers.values()):
+            subscriber.wakeup.set()
+
+    def close(self):
+        for name in list(self.subscribers):
+            self.unsubscribe(name)
@@ -1,67 +1,242 @@
 import socket
+import threading
 import time
 import struct
+import numpy as np
+
+from sequence_tracker import SequenceTracker, fill_gaps
+from timestamp_unwrap import TimestampReconstructor
 
 # Adjust buffer size to match the 200 bytes per packet from ESP32 (10 captures per packet)
 BUFFER_SIZE = 2200  
 CAPTURES_PER_PACKET = 100  # Each packet contains 10 captures
 PACKET_SIZE = 22
+RING_PACKETS = 32  # Receive ring capacity in packets; returned blocks stay valid until the ring wraps
+CAPTURE_INDEX_OFFSET = 20  # Byte offset of `num` inside a capture, used to find frame boundaries
+MAX_CAPTURE_STEP_US = 1_000_000  # Larger jumps between captures of one frame mean the frame is misaligned
+CONNECT_TIMEOUT = 2  # Seconds for one connection attempt
+RECV_TIMEOUT = 5  # Seconds without any data before the link is considered dead
+RECONNECT_MIN_DELAY = 0.05  # First retry delay (s), doubled after each failed attempt
+RECONNECT_MAX_DELAY = 5.0
+RECONNECT_POLL = 0.1  # How long receive_block waits for a reconnect before returning None
+
+# One capture as laid out on the wire: 6 x int16, uint32 timestamp (µs), uint32 CPS, int16 capture index
+CAPTURE_DTYPE = np.dtype([
+    ("GyX", "<i2"), ("GyY", "<i2"), ("GyZ", "<i2"),
+    ("AcX", "<i2"), ("AcY", "<i2"), ("AcZ", "<i2"),
+    ("timestamp", "<u4"), ("cps", "<u4"), ("num", "<i2"),
+])
+assert CAPTURE_DTYPE.itemsize == PACKET_SIZE
+
+
+def decode_captures(raw_data):
+    """Decode a buffer of 22-byte captures into a structured array in one call (no per-capture Python work)."""
+    count = len(raw_data) // PACKET_SIZE
+    return np.frombuffer(raw_data, dtype=CAPTURE_DTYPE, count=count)
+
+
+EXPECTED_NUM = np.arange(CAPTURES_PER_PACKET, dtype="<i2")
+EXPECTED_NUM_BYTES = EXPECTED_NUM.tobytes()
+
+
+def is_valid_frame(block):
+    """A frame is aligned if its capture indices run 0..99 and its timestamps move forward (mod 2^32)."""
+    if block["num"].tobytes() != EXPECTED_NUM_BYTES:
+        return False
+    timestamps = block["timestamp"]
+    steps = timestamps[1:] - timestamps[:-1]  # uint32 arithmetic: a rollover is still a small step
+    return bool(steps.max() < MAX_CAPTURE_STEP_US)
+
+
+def find_frame_start(data):
+    """Offset of the first aligned frame in `data` (bytes-like), or None if there is none.
+
+    Only offsets below one frame are tried; each candidate is checked on the capture index field
+    first (vectorized over all candidates), then fully with is_valid_frame.
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    candidates = len(raw) - BUFFER_SIZE + 1
+    if candidates <= 0:
+        return None
+    index16 = raw[:-1].astype(np.int16) | (raw[1:].astype(np.int16) << 8)  # int16 at every byte offset
+    offsets = np.arange(min(candidates, BUFFER_SIZE))
+    positions = offsets[:, None] + CAPTURE_INDEX_OFFSET + PACKET_SIZE * EXPECTED_NUM
+    for offset in offsets[np.all(index16[positions] == EXPECTED_NUM, axis=1)]:
+        if is_valid_frame(decode_captures(data[offset:offset + BUFFER_SIZE])):
+            return int(offset)
+    return None
+
 
 class TCPSensorClient:
-    def __init__(self, server_ip, server_port):
+    def __init__(self, server_ip, server_port, tap=None):
         self.server_ip = server_ip
         self.server_port = server_port
         self.sock = None
         self.packet_count = 0
         self.start_time = time.time()
         self.connected = False  # Track connection status
+        self.closing = False
+        self.closed = threading.Event()  # Wakes the reconnect loop out of its backoff sleep
+        self.lock = threading.Lock()  # Socket hand-over between connect_to_server() and close()
+        self.reconnect_thread = None
+        self.reconnected = threading.Event()
+        self.reconnects = 0
+        self.resyncs = 0  # Times the stream was realigned on a frame boundary
+        self.discarded_bytes = 0
+
+        # Optional wire capture (wire_capture.WireCaptureWriter): every recv() is appended as received
+        self.tap = None
+        self.requested_tap = tap
+        self.tap_changed = tap is not None
+
+        # Preallocated receive ring: recv_into() writes here and frames are handed out as views
+        self.ring = bytearray(RING_PACKETS * BUFFER_SIZE)
+        self.ring_view = memoryview(self.ring)
+        self.read_pos = 0
+        self.write_pos = 0
+
+        # Loss / duplicate / reorder accounting from the capture index and device timestamp
+        self.tracker = SequenceTracker(CAPTURES_PER_PACKET)
+        self.last_missing = None
+
+        # Monotonic 64-bit device timeline (uint32 µs rollovers removed) and device clock drift
+        self.timeline = TimestampReconstructor()
+        self.last_timeline = None
         self.connect_to_server()
 
     def connect_to_server(self):
         """ Establish a TCP connection with the ESP32 server. """
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            self.sock.connect((self.server_ip, self.server_port))
-            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-
-            self.connected = True
-            print(f"✅ Connected to server at {self.server_ip}:{self.server_port}")
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect((self.server_ip, self.server_port))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.settimeout(RECV_TIMEOUT)
         except Exception as e:
+            sock.close()
             self.connected = False
             print(f"❌ Connection failed: {e}")
-            self.sock = None
+            return False
 
+        with self.lock:
+            if self.closing:  # close() ran while we were connecting; don't leave a live socket behind
+                sock.close()
+                return False
+            # Reset the stream state before the receive thread can see the new socket
+            self.read_pos = self.write_pos = 0  # Drop any partial frame from a previous connection
+            self.tracker.reset_stream()
+            self.timeline.reset()
+            if self.tap is not None:
+                self.tap.mark_reconnect()
+            self.sock = sock
+            self.connected = True
+        print(f"✅ Connected to server at {self.server_ip}:{self.server_port}")
+        return True
 
-    def receive_data(self):
-        """Receives and ensures a full 200-byte packet before processing."""
-        if not self.sock:
-            print("⚠️ Socket is not connected!")
+
+    def receive_block(self):
+        """Receives a full packet and returns it as a structured array of CAPTURES_PER_PACKET captures.
+
+        The array is a view into the receive ring (no copy); it is overwritten once the ring wraps,
+        so callers that keep blocks longer than RING_PACKETS packets must copy them.
+        The unwrapped uint64 timestamps of the block are left in `last_timeline`.
+        Misaligned frames are dropped and the stream is realigned; when the link is down this starts
+        a background reconnect and returns None after at most RECONNECT_POLL seconds.
+        """
+        if not self.connected:
+            self.reconnect()
+            self.reconnected.wait(RECONNECT_POLL)
             return None
 
-        raw_data = b""  # Accumulate data
-        while len(raw_data) < BUFFER_SIZE:
+        if self.tap_changed:
+            self._switch_tap()
+        while True:
+            if not self._fill(BUFFER_SIZE):
+                return None
+            frame = self.ring_view[self.read_pos:self.read_pos + BUFFER_SIZE]
+            block = decode_captures(frame)
+            if is_valid_frame(block):
+                break
+            if not self._resync():
+                return None
+        self.read_pos += BUFFER_SIZE
+
+        self.packet_count += 1
+        self.last_missing = self.tracker.update(block)
+        self.last_timeline = self.timeline.update(block["timestamp"], time.monotonic())
+        self.print_data(block)
+        return block
+
+    def _fill(self, needed):
+        """Receive until at least `needed` bytes are pending after read_pos; False if the link dropped."""
+        while self.write_pos - self.read_pos < needed:
+            if self.write_pos == len(self.ring):
+                self._wrap_ring()
             try:
-                chunk = self.sock.recv(BUFFER_SIZE - len(raw_data))  # Request remaining bytes
-                if not chunk:  # Connection lost
-                    print("❌ Connection closed by server!")
-                    self.connected = False
-                    return None
-                raw_data += chunk
+                # Read as much as the socket has, straight into the ring
+                received = self.sock.recv_into(self.ring_view[self.write_pos:])
             except Exception as e:
                 print(f"❌ Socket error: {e}")
-                return None
-            
-        self.packet_count += 1
-        captures = []
-        for i in range(0, BUFFER_SIZE, PACKET_SIZE):  # Read 20 bytes per capture
-            capture = raw_data[i : i + PACKET_SIZE]
-            GyX, GyY, GyZ, AcX, AcY, AcZ, timestamp, cps, num = struct.unpack("<hhhhhhIIh", capture)
-            captures.append((GyX, GyY, GyZ, AcX, AcY, AcZ, timestamp, cps, num))
-            self.print_data([GyX,GyY, GyZ], [AcX, AcY, AcZ],timestamp, cps, num, i+1)
-            
-        return captures
+                self._connection_lost()
+                return False
+            if not received:  # Connection lost
+                print("❌ Connection closed by server!")
+                self._connection_lost()
+                return False
+            if self.tap is not None:
+                self.tap.write(self.ring_view[self.write_pos:self.write_pos + received])
+            self.write_pos += received
+        return True
+
+    def set_tap(self, tap):
+        """Start (or stop, with None) a wire capture; the receive thread switches at the next frame
+        boundary, so the capture starts with a whole frame."""
+        self.requested_tap = tap
+        self.tap_changed = True
 
+    def _switch_tap(self):
+        self.tap_changed = False
+        self.tap = self.requested_tap
+        if self.tap is not None and self.write_pos > self.read_pos:
+            # Bytes already received but not consumed yet; read_pos is on a frame boundary
+            self.tap.write(self.ring_view[self.read_pos:self.write_pos])
 
+    def _resync(self):
+        """Skip to the next aligned frame; False if the link dropped while looking for it."""
+        # One frame plus the largest possible misalignment holds at least one whole aligned frame
+        if not self._fill(2 * BUFFER_SIZE - 1):
+            return False
+        offset = find_frame_start(self.ring_view[self.read_pos:self.write_pos])
+        skipped = offset if offset is not None else BUFFER_SIZE
+        self.read_pos += skipped
+        self.discarded_bytes += skipped
+        self.resyncs += 1
+        self.tracker.reset_stream()
+        print(f"🔀 Stream misaligned, skipped {skipped} bytes to realign")
+        return True
+
+    def receive_filled(self):
+        """Like receive_block, but returns (values, timestamps) with NaN rows for every lost capture."""
+        block = self.receive_block()
+        if block is None:
+            return None, None
+        return fill_gaps(block, self.last_missing, period_us=self.tracker.period_us)
+
+    def _wrap_ring(self):
+        """Restart writing at the front of the ring, keeping any partial frame that is still pending."""
+        pending = self.write_pos - self.read_pos
+        if pending:
+            # Only happens when the stream is not packet-aligned or during a resync; moves at most two frames
+            self.ring[:pending] = self.ring[self.read_pos:self.write_pos]
+        self.read_pos = 0
+        self.write_pos = pending
+
+    def receive_data(self):
+        """Compatibility wrapper: returns the packet as a list of (GyX, GyY, GyZ, AcX, AcY, AcZ, timestamp, cps, num) tuples."""
+        block = self.receive_block()
+        if block is None:
+            return None
+        return block.tolist()
 
     def unpack_data(self, data):
         """ Unpack sensor data from bytes into numerical values. """
@@ -73,37 +248,66 @@ class TCPSensorClient:
             print(f"❌ Error unpacking data: {e}. Data: {data}")
             return None, None, None, None
 
-    def print_data(self, gyro_data, accel_data, timestamp, cps, num, capture_num):
-        """ Print sensor data for each capture. """
-        #print(f"📊 Capture {num}/{capture_num}: Gyro={gyro_data}, Accel={accel_data}, Time={timestamp}, CPS={cps}")
+    def print_data(self, block):
+        """ Print packet statistics (called once per packet, not per capture). """
+        #print(f"📊 Last capture {block['num'][-1]}: Gyro={block[['GyX', 'GyY', 'GyZ']][-1]}, Time={block['timestamp'][-1]}, CPS={block['cps'][-1]}")
 
         # Print packets per second every second
         if time.time() - self.start_time >= 1:
-            print(f"📦 Packets/sec: {self.packet_count}")
+            rate, drift = self.timeline.sample_rate(), self.timeline.drift_ppm()
+            clock = f" | {rate:.1f} Hz" if rate else ""
+            clock += f", drift {drift:+.0f} ppm" if drift is not None else ""
+            print(f"📦 Packets/sec: {self.packet_count} | {self.tracker.summary()}{clock}")
             self.start_time = time.time()
             self.packet_count = 0
 
+    def _connection_lost(self):
+        self.connected = False
+        self.reconnect()
+
     def reconnect(self):
-        """ Try to reconnect to the server if the connection is lost. """
-        if not self.connected:
-            print("🔄 Reconnecting...")
-            self.close()
-            time.sleep(2)
-            self.connect_to_server()
+        """ Reconnect in a background thread with exponential backoff; returns immediately. """
+        if self.closing or (self.reconnect_thread is not None and self.reconnect_thread.is_alive()):
+            return
+        self.connected = False
+        self.reconnected.clear()
+        self.reconnect_thread = threading.Thread(target=self._reconnect_loop, name="tcp-reconnect", daemon=True)
+        self.reconnect_thread.start()
 
-    def close(self):
-        """ Close the socket connection. """
+    def _reconnect_loop(self):
+        print("🔄 Reconnecting...")
         if self.sock:
             self.sock.close()
             self.sock = None
+        delay = RECONNECT_MIN_DELAY
+        while not self.closing:
+            if self.connect_to_server():
+                self.reconnects += 1
+                self.reconnected.set()
+                return
+            self.closed.wait(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def close(self):
+        """ Close the socket connection and stop a reconnect in progress. """
+        with self.lock:
+            self.closing = True
+            self.closed.set()
+            self.reconnected.set()
+            if self.sock:
+                self.sock.close()
+                self.sock = None
             self.connected = False
+        thread = self.reconnect_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(CONNECT_TIMEOUT + 1)  # At most one connect attempt is still running
 
 if __name__ == "__main__":
     client = TCPSensorClient("192.168.4.1", 12345)  # Use ESP32 hotspot IP
 
     try:
         while True:
-            captures = client.receive_data()
+            block = client.receive_block()
             #time.sleep(0.001)  # Prevent excessive CPU usage
     except KeyboardInterrupt:
         print("\n❌ Closing connection.")
@@ -0,0 +1,65 @@
+import numpy as np
+
+# Text firmware (main_server.stringPackets) sends batches of "GyX,GyY,GyZ,AcX,AcY,AcZ,millis\n" lines;
+# the gyro-only build sends "GyX,GyY,GyZ,millis\n"
+FULL_FIELDS = 7
+GYRO_ONLY_FIELDS = 4
+MAX_DATAGRAM = 4096
+MAX_BATCH_DATAGRAMS = 256  # Upper bound for one drain pass
+
+
+def parse_csv_datagrams(datagrams, num_fields=FULL_FIELDS):
+    """Parse one datagram (bytes) or a list of them into an (n, num_fields) int64 array.
+
+    Returns (rows, malformed) where `malformed` counts the non-empty lines that were rejected.
+    All well-formed lines are converted in a single vectorized step.
+    """
+    if isinstance(datagrams, (bytes, bytearray, memoryview)):
+        datagrams = [datagrams]
+    lines = b"\n".join(datagrams).replace(b"\r", b"").split(b"\n")
+
+    # Cheap C-level filter on the field count; empty lines (trailing "\n") are not errors
+    valid = [line for line in lines if line.count(b",") == num_fields - 1]
+    malformed = sum(1 for line in lines if line and line != b"SERVER_ACK") - len(valid)
+    if not valid:
+        return np.empty((0, num_fields), dtype=np.int64), malformed
+
+    try:
+        fields = np.array(b",".join(valid).split(b","))
+        rows = fields.astype(np.int64).reshape(-1, num_fields)
+    except ValueError:
+        # A line had the right shape but a non-integer field; fall back to finding the bad ones
+        rows, bad = _parse_lines_checked(valid, num_fields)
+        malformed += bad
+    return rows, malformed
+
+
+def _parse_lines_checked(lines, num_fields):
+    """Slow path used only when a batch contains a non-numeric field."""
+    good = []
+    for line in lines:
+        try:
+            good.append([int(value) for value in line.split(b",")])
+        except ValueError:
+            continue
+    rows = np.array(good, dtype=np.int64).reshape(-1, num_fields)
+    return rows, len(lines) - len(good)
+
+
+def receive_datagram_batch(sock, max_datagrams=MAX_BATCH_DATAGRAMS):
+    """Block for one datagram, then drain every datagram already queued on `sock` without blocking.
+
+    Returns (datagrams, addr) where addr is the sender of the first datagram.
+    """
+    data, addr = sock.recvfrom(MAX_DATAGRAM)
+    datagrams = [data]
+    timeout = sock.gettimeout()
+    sock.setblocking(False)
+    try:
+        while len(datagrams) < max_datagrams:
+            datagrams.append(sock.recv(MAX_DATAGRAM))
+    except (BlockingIOError, InterruptedError):
+        pass
+    finally:
+        sock.settimeout(timeout)
+    return datagrams, addr
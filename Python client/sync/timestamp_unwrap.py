@@ -0,0 +1,112 @@
+import numpy as np
+
+TIMESTAMP_MODULO = 1 << 32   # Device timestamps are uint32: micros() wraps every ~71.6 min, millis() every ~49.7 days
+MICROS_PER_SECOND = 1_000_000
+MILLIS_PER_SECOND = 1_000
+
+
+class TimestampReconstructor:
+    """Turns the device's wrapping uint32 timestamps into a monotonic 64-bit timeline, block by block.
+
+    Each call to update() only looks at the new block and the last timestamp of the previous one, so
+    a rollover is found without rescanning history. A backward step of more than half the range is a
+    rollover; smaller backward steps (reordered captures) are left as they are.
+
+    When the host arrival time of each block is given, a least-squares line host = offset + rate * device
+    is fitted incrementally (running sums only), which gives the device clock drift and lets device
+    time be mapped onto the host clock.
+    """
+
+    def __init__(self, ticks_per_second=MICROS_PER_SECOND, modulo=TIMESTAMP_MODULO):
+        self.ticks_per_second = ticks_per_second
+        self.modulo = modulo
+        self.reset()
+
+    def reset(self):
+        """Start a new timeline (e.g. after a reconnect, since the device may have rebooted)."""
+        self.last_raw = None
+        self.wraps = 0
+        self.first = None   # First unwrapped timestamp
+        self.last = None    # Last unwrapped timestamp
+        self.count = 0
+        # Drift fit sums, relative to the first point to keep the float sums precise
+        self.origin = None
+        self.fit_n = 0
+        self.sum_x = self.sum_y = self.sum_xx = self.sum_xy = 0.0
+
+    def unwrap(self, raw):
+        """Unwrap a block of raw timestamps; returns uint64 ticks continuing the previous block."""
+        raw = np.asarray(raw).astype(np.int64)
+        if not len(raw):
+            return np.empty(0, dtype=np.uint64)
+        previous = raw[0] if self.last_raw is None else self.last_raw
+        steps = np.diff(raw, prepend=previous)
+        wraps = self.wraps + np.cumsum(steps < -(self.modulo // 2))
+        self.wraps = int(wraps[-1])
+        self.last_raw = int(raw[-1])
+        return (raw + wraps * self.modulo).astype(np.uint64)
+
+    def update(self, raw, host_time=None):
+        """Unwrap a block and update the rate and drift estimates.
+
+        host_time: host clock (s, e.g. time.monotonic()) when the block's last sample arrived.
+        """
+        timeline = self.unwrap(raw)
+        if not len(timeline):
+            return timeline
+        if self.first is None:
+            self.first = int(timeline[0])
+        self.last = int(timeline[-1])
+        self.count += len(timeline)
+        if host_time is not None:
+            self._add_fit_point(self.last / self.ticks_per_second, host_time)
+        return timeline
+
+    def _add_fit_point(self, device_seconds, host_seconds):
+        if self.origin is None:
+            self.origin = (device_seconds, host_seconds)
+        x = device_seconds - self.origin[0]
+        y = host_seconds - self.origin[1]
+        self.fit_n += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_xy += x * y
+
+    def sample_rate(self):
+        """Mean sample rate (Hz) over everything seen so far, or None before two samples."""
+        if self.count < 2 or self.last == self.first:
+            return None
+        return (self.count - 1) * self.ticks_per_second / (self.last - self.first)
+
+    def clock_rate(self):
+        """Host seconds per device second from the drift fit (1.0 for a perfect device clock)."""
+        denominator = self.fit_n * self.sum_xx - self.sum_x ** 2
+        if self.fit_n < 2 or denominator <= 0:
+            return None
+        return (self.fit_n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+
+    def drift_ppm(self):
+        rate = self.clock_rate()
+        return None if rate is None else (rate - 1.0) * 1e6
+
+    def to_host_time(self, timeline):
+        """Map unwrapped device ticks onto the host clock (s) using the drift fit."""
+        rate = self.clock_rate()
+        if rate is None:
+            return None
+        intercept = (self.sum_y - rate * self.sum_x) / self.fit_n
+        device = np.asarray(timeline, dtype=np.float64) / self.ticks_per_second - self.origin[0]
+        return self.origin[1] + intercept + rate * device
+
+
+def unwrap_timestamps(timestamps, modulo=TIMESTAMP_MODULO):
+    """One-shot unwrap of a whole recording (int64 ticks)."""
+    return TimestampReconstructor(modulo=modulo).unwrap(timestamps).astype(np.int64)
+
+
+def mean_sample_rate(timestamps, ticks_per_second=MICROS_PER_SECOND):
+    """Mean sample rate (Hz) of a recording, robust to timestamp rollovers."""
+    reconstructor = TimestampReconstructor(ticks_per_second)
+    reconstructor.update(timestamps)
+    return reconstructor.sample_rate()
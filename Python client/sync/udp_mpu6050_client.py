@@ -1,24 +1,48 @@
 import socket
 import time
 import struct
+import numpy as np
 
 BUFFER_SIZE = 16
+MAX_DATAGRAM = 65507  # Largest UDP/IPv4 payload, so no datagram is ever truncated (many 16-byte samples back to back)
+BATCH_BUFFER_SIZE = 16 * 65536  # Shared receive buffer for one drain pass (at least 16 full-size datagrams)
+
+# One sample as laid out on the wire: 6 x int16 (gyro, accel) and a uint32 timestamp (µs)
+SAMPLE_DTYPE = np.dtype([
+    ("GyX", "<i2"), ("GyY", "<i2"), ("GyZ", "<i2"),
+    ("AcX", "<i2"), ("AcY", "<i2"), ("AcZ", "<i2"),
+    ("timestamp", "<u4"),
+])
+assert SAMPLE_DTYPE.itemsize == BUFFER_SIZE
+
+
+def decode_samples(data):
+    """Decode a buffer of back-to-back 16-byte samples into a structured array in one call."""
+    count = len(data) // BUFFER_SIZE
+    return np.frombuffer(data, dtype=SAMPLE_DTYPE, count=count)
 
 class UDPSensorClient:
-    def __init__(self, local_ip, server_ip, server_port):
+    def __init__(self, local_ip, server_ip, server_port, timeout=15, tap=None):
         self.local_ip = local_ip
         self.server_ip = server_ip
         self.server_port = server_port
+        self.timeout = timeout
         self.sock = None
-        self.packet_count = 0
+        self.sample_count = 0
         self.start_time = time.time()
+        self.malformed_datagrams = 0
+        self.tap = tap  # Optional wire_capture.WireCaptureWriter; every datagram is appended as received
+
+        # Shared buffer for batched mode: every pending datagram is drained into it back to back
+        self.rx_buffer = bytearray(BATCH_BUFFER_SIZE)
+        self.rx_view = memoryview(self.rx_buffer)
         self.setup_socket()  # Ensure the socket is set up during initialization
 
     def setup_socket(self):
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             self.sock.bind((self.local_ip, self.server_port))
-            self.sock.settimeout(15)
+            self.sock.settimeout(self.timeout)
             print(f"Bound to {self.local_ip}:{self.server_port}")
         except Exception as e:
             print(f"Failed to set up socket: {e}")
@@ -45,7 +69,9 @@ class UDPSensorClient:
     def receive_data(self):
         try:
             data, _ = self.sock.recvfrom(BUFFER_SIZE)
-            self.packet_count += 1
+            if self.tap is not None:
+                self.tap.write(data)
+            self.sample_count += 1
             current_time = time.time()
             elapsed_time = current_time - self.start_time
             #send elapsed time to server as raw data
@@ -60,6 +86,49 @@ class UDPSensorClient:
             print("Socket timed out. No data received.")
         return None, None, None
 
+    def receive_block(self):
+        """Batched mode: wait for one datagram, then drain every pending one and decode them as one block.
+
+        Datagrams may carry any number of 16-byte samples (one per datagram still works). The block is a
+        view into the shared receive buffer and is only valid until the next call.
+        """
+        try:
+            size = self.sock.recv_into(self.rx_view[:MAX_DATAGRAM])
+        except socket.timeout:
+            print("Socket timed out. No data received.")
+            return None
+        end = self._keep_samples(0, size)
+
+        # Drain whatever else is already queued without blocking
+        self.sock.setblocking(False)
+        try:
+            while end + MAX_DATAGRAM <= len(self.rx_buffer):
+                size = self.sock.recv_into(self.rx_view[end:end + MAX_DATAGRAM])
+                end = self._keep_samples(end, size)
+        except (BlockingIOError, InterruptedError):
+            pass
+        finally:
+            self.sock.settimeout(self.timeout)
+
+        if end == 0:
+            return None
+        block = decode_samples(self.rx_view[:end])
+        self.sample_count += len(block)
+        elapsed_time = time.time() - self.start_time
+        last = block[-1]
+        self.print_data(list(last)[:3], list(last)[3:6], last["timestamp"], elapsed_time)
+        return block
+
+    def _keep_samples(self, start, size):
+        """Accept a datagram written at `start` if it holds whole samples; returns the new end of valid data."""
+        if self.tap is not None:
+            self.tap.write(self.rx_view[start:start + size])
+        if size % BUFFER_SIZE:
+            if not self.rx_view[start:start + size].tobytes().startswith(b"SERVER_ACK"):
+                self.malformed_datagrams += 1
+            return start  # Drop it, the next datagram overwrites it
+        return start + size
+
     def unpack_data(self, data):
         try:
             # Unpack the data into 6 int16_t values and 1 uint32_t value
@@ -73,11 +142,11 @@ class UDPSensorClient:
 
     def print_data(self, gyro_data, accel_data, timestamp, elapsed_time):
         if elapsed_time >= 1:
-            print(f"Data: Gyro={gyro_data}, Accel={accel_data}, Time={timestamp}, Packets/sec={self.packet_count}")
+            print(f"Data: Gyro={gyro_data}, Accel={accel_data}, Time={timestamp}, Samples/sec={self.sample_count}")
             #self.sock.sendto(b"DISCOVER_VIBS_SERVER", (self.server_ip, self.server_port))
 
             self.start_time = time.time()
-            self.packet_count = 0
+            self.sample_count = 0
 
     def close(self):
         if self.sock:
@@ -7,6 +7,7 @@ import math
 # Constants
 ROTATION_SCALE = 0.000001  # Adjust rotation scale
 SMOOTHING_FACTOR = 0.95  # Low-pass filter for smoothing
+SMOOTHING_BLOCK = 256  # Rows smoothed per matrix product in update_gyro_data
 ACCEL_SCALE = 0.01  # Acceleration scale
 
 # Global variables
@@ -15,22 +16,29 @@ prev_rotation = [0, 0, 0]
 cube_position = [0, 0, 0]
 
 def update_gyro_data(gyro_data):
-    """Update cube rotation with smoothing & drift correction."""
+    """Update cube rotation with smoothing & drift correction; takes one sample or an (n, 3) block."""
     global cube_rotation, prev_rotation
 
-    # Apply smoothing filter
-    smoothed_data = [
-        prev_rotation[i] * SMOOTHING_FACTOR + gyro_data[i] * (1 - SMOOTHING_FACTOR)
-        for i in range(3)
-    ]
+    samples = np.atleast_2d(np.asarray(gyro_data, dtype=np.float64))[:, :3]
+    smoothed = np.asarray(prev_rotation, dtype=np.float64)
+    for start in range(0, len(samples), SMOOTHING_BLOCK):
+        chunk = samples[start:start + SMOOTHING_BLOCK]
+
+        # Apply smoothing filter: s[k] = s[k-1] * f + x[k] * (1 - f), for every row of the chunk at once
+        steps = np.arange(1, len(chunk) + 1)
+        lags = np.maximum(steps[:, None] - steps[None, :], 0)
+        weights = np.tril(SMOOTHING_FACTOR ** lags) * (1 - SMOOTHING_FACTOR)
+        smoothed_data = weights @ chunk + np.outer(SMOOTHING_FACTOR ** steps, smoothed)
 
-    # Apply scaled rotation
-    cube_rotation[0] += smoothed_data[0] * ROTATION_SCALE
-    cube_rotation[1] += smoothed_data[1] * ROTATION_SCALE
-    cube_rotation[2] += smoothed_data[2] * ROTATION_SCALE
+        # Apply scaled rotation
+        rotation = smoothed_data.sum(axis=0) * ROTATION_SCALE
+        cube_rotation[0] += rotation[0]
+        cube_rotation[1] += rotation[1]
+        cube_rotation[2] += rotation[2]
+        smoothed = smoothed_data[-1]
 
     # Store the previous values
-    prev_rotation = smoothed_data
+    prev_rotation = smoothed.tolist()
 
 def update_accel_data(acceleration_data):
     """Update second cube's position based on acceleration."""
@@ -38,6 +38,21 @@ def update_sensor_data(gyro_data, acc_data):
     accel_y_data[:-1], accel_y_data[-1] = accel_y_data[1:], acc_data[1]
     accel_z_data[:-1], accel_z_data[-1] = accel_z_data[1:], acc_data[2]
 
+def update_sensor_block(gyro_block, acc_block):
+    """Append a whole block of samples ((n, 3) gyro and accel arrays) with one shift per axis."""
+    if None in (gyro_x_curve, gyro_y_curve, gyro_z_curve, accel_x_curve, accel_y_curve, accel_z_curve):
+        return  # Avoid updating before initialization
+
+    n = min(len(gyro_block), MAX_POINTS)
+    if n == 0:
+        return
+    buffers = (gyro_x_data, gyro_y_data, gyro_z_data, accel_x_data, accel_y_data, accel_z_data)
+    columns = (gyro_block[-n:, 0], gyro_block[-n:, 1], gyro_block[-n:, 2],
+               acc_block[-n:, 0], acc_block[-n:, 1], acc_block[-n:, 2])
+    for buffer, column in zip(buffers, columns):
+        buffer[:-n] = buffer[n:]
+        buffer[-n:] = column
+
 def refresh_plot():
     """Refresh the plot with new sensor data."""
     global gyro_x_curve, gyro_y_curve, gyro_z_curve, accel_x_curve, accel_y_curve, accel_z_curve
@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+import wave
+import numpy as np
+
+from csv_loader import load_recording
+from session_format import SENSOR_FIELDS, Session, is_session, open_session
+from timestamp_unwrap import MICROS_PER_SECOND, mean_sample_rate
+
+# Session -> WAV export in one pass: the six axes are stacked into one (n, 6) array, the uniform output
+# grid is located in the device timeline once (a single searchsorted for all channels), and every output
+# chunk is a 2D linear interpolation of all axes at once. The result goes either to one interleaved
+# 6-channel file or to six mono files written side by side from the same pass. Each channel keeps its
+# own gain (its peak maps to full scale), as the per-axis files always had, but the gain is fixed for
+# the whole file.
+STANDARD_SAMPLE_RATES = [16000, 22050, 32000, 44100, 48000, 96000]
+CHUNK_FRAMES = 1 << 18  # Output frames interpolated per step; bounds memory on long sessions
+PCM_MAX = 32767
+EXPORT_MODES = ("per-axis", "multichannel")
+
+
+def load_axes(source):
+    """Return (unwrapped µs timestamps, {axis label: column}) from a .vibs session or a raw CSV."""
+    if isinstance(source, Session) or is_session(source):
+        session = source if isinstance(source, Session) else open_session(source)
+        return session.timestamps, {label: session[label] for label in SENSOR_FIELDS}  # Memory-mapped
+    block, _ = load_recording(source)  # Any CSV layout; timestamps come back unwrapped in µs
+    return block["timestamp"], {label: block[label] for label in SENSOR_FIELDS}
+
+
+def nearest_standard_rate(timestamps):
+    """Closest standard audio rate to the device rate (timestamps in µs, unwrapped)."""
+    rate = mean_sample_rate(timestamps)
+    return min(STANDARD_SAMPLE_RATES, key=lambda x: abs(x - rate))
+
+
+def uniform_grid(timestamps, sample_rate):
+    """(step µs, frames) of an evenly spaced grid over the recording, like np.linspace."""
+    duration = int(timestamps[-1]) - int(timestamps[0])
+    frames = int(duration / MICROS_PER_SECOND * sample_rate)
+    step = duration / (frames - 1) if frames > 1 else 0.0
+    return step, frames
+
+
+def slopes(values):
+    """Row-to-row differences of `values` (0 after the last row), precomputed once for interpolate_chunk."""
+    slope = np.empty_like(values)
+    np.subtract(values[1:], values[:-1], out=slope[:-1])
+    slope[-1] = 0
+    return slope
+
+
+def interpolate_chunk(values, slope, times, step, first, count):
+    """Linear interpolation of all columns of `values` (n, channels, float32) at grid frames first..first+count.
+
+    One np.interp maps the grid to fractional sample positions; all channels then share the same rows
+    and weights, so the rest is two row gathers and a multiply-add.
+    """
+    targets = (first + np.arange(count)) * step  # µs from the first sample
+    position = np.interp(targets, times, np.arange(len(times), dtype=np.float64))
+    left = position.astype(np.int64)
+    weight = (position - left).astype(np.float32)[:, None]
+    chunk = np.take(values, left, axis=0)
+    chunk += np.take(slope, left, axis=0) * weight
+    return chunk
+
+
+def channel_gains(values):
+    """Per-channel gain mapping the channel's peak to full scale (1 for silent channels)."""
+    peaks = np.abs(values).max(axis=0).astype(np.float64) if len(values) else np.zeros(values.shape[1])
+    return np.where(peaks > 0, PCM_MAX / np.where(peaks > 0, peaks, 1), 1.0).astype(np.float32)
+
+
+def _open_wav(filename, channels, sample_rate):
+    wav_file = wave.open(filename, "wb")
+    wav_file.setnchannels(channels)
+    wav_file.setsampwidth(2)
+    wav_file.setframerate(sample_rate)
+    return wav_file
+
+
+def export_wavs(timestamps, axes, session_folder, session_name, mode="per-axis", sample_rate=None):
+    """Resample all axes onto one uniform grid and write the WAV(s); returns the file names.
+
+    timestamps: unwrapped µs; axes: {label: column} (e.g. memory-mapped session columns).
+    mode: "per-axis" -> <name>_<axis>.wav each, "multichannel" -> one interleaved <name>_axes.wav.
+    """
+    if mode not in EXPORT_MODES:
+        raise ValueError(f"Unknown WAV export mode '{mode}', expected one of {EXPORT_MODES}")
+    os.makedirs(session_folder, exist_ok=True)
+    labels = list(axes)
+    values = np.column_stack([np.asarray(axes[label], dtype=np.float32) for label in labels])
+    times = (np.asarray(timestamps, dtype=np.uint64) - np.uint64(timestamps[0])).astype(np.float64)
+    sample_rate = sample_rate or nearest_standard_rate(timestamps)
+    step, frames = uniform_grid(timestamps, sample_rate)
+    gains = channel_gains(values)
+    slope = slopes(values)
+
+    if mode == "multichannel":
+        filenames = [os.path.join(session_folder, f"{session_name}_axes.wav")]
+        files = [_open_wav(filenames[0], len(labels), sample_rate)]
+    else:
+        filenames = [os.path.join(session_folder, f"{session_name}_{label}.wav") for label in labels]
+        files = [_open_wav(filename, 1, sample_rate) for filename in filenames]
+    try:
+        for first in range(0, frames, CHUNK_FRAMES):
+            count = min(CHUNK_FRAMES, frames - first)
+            chunk = interpolate_chunk(values, slope, times, step, first, count)
+            chunk *= gains
+            pcm = np.clip(np.rint(chunk, out=chunk), -PCM_MAX - 1, PCM_MAX).astype("<i2")
+            if mode == "multichannel":
+                files[0].writeframes(pcm.tobytes())  # Row-major (n, channels) is already interleaved
+            else:
+                for column, wav_file in enumerate(files):
+                    wav_file.writeframes(np.ascontiguousarray(pcm[:, column]).tobytes())
+    finally:
+        for wav_file in files:
+            wav_file.close()
+    for filename in filenames:
+        print(f"✅ Saved WAV: {filename} at {sample_rate} Hz")
+    return filenames
+
+
+def export_session_wavs(source, session_folder, session_name, mode="per-axis", sample_rate=None):
+    """Load a .vibs session (or a CSV of any layout) once and export its six axes."""
+    timestamps, axes = load_axes(source)
+    if len(timestamps) < 2:
+        print("❌ Error: Not enough data to estimate sample rate.")
+        return []
+    return export_wavs(timestamps, axes, session_folder, session_name, mode, sample_rate)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python wav_export.py SESSION_OR_CSV [OUTPUT_FOLDER] [per-axis|multichannel]")
+        sys.exit(1)
+    source = sys.argv[1].rstrip("/\\")
+    folder = sys.argv[2] if len(sys.argv) > 2 else os.path.dirname(os.path.abspath(source))
+    name = os.path.splitext(os.path.basename(source))[0]
+    start = time.perf_counter()
+    export_session_wavs(source, folder, name, sys.argv[3] if len(sys.argv) > 3 else "per-axis")
+    print(f"⏱️ Exported in {time.perf_counter() - start:.2f}s")
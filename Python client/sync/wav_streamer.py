@@ -1,91 +1,202 @@
-import numpy as np
-import wave
+import os
 import queue
+import struct
 import threading
+import time
+import numpy as np
+
+# Streams sensor blocks into one interleaved multichannel 16-bit WAV (all six axes by default).
+# Blocks go through the queue as whole arrays, and one writer thread can serve the streamers of several
+# devices. The gain never changes inside a file:
+#   "fixed"    - samples are multiplied by 32767 / full_scale; the default full_scale of 32768 (the
+#                int16 range) uses a gain of 1 so raw int16 counts pass through unchanged
+#   "two-pass" - samples are kept as float32 in a side file; finalize() scales everything by the global
+#                peak so the loudest sample of the whole recording is at full scale
+# The WAV header is written with zero sizes and patched on finalize (and every HEADER_PATCH_INTERVAL
+# seconds, so a file cut short by a crash is still readable up to the last patch).
+SENSOR_CHANNELS = ["GyX", "GyY", "GyZ", "AcX", "AcY", "AcZ"]
+PCM_MAX = 32767
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+HEADER_PATCH_INTERVAL = 2.0  # Seconds
+MAX_PENDING_BLOCKS = 1024    # Blocks queued for the writer thread before add_block() waits
+SCALE_MODES = ("fixed", "two-pass")
+
+
+class WAVWriterThread:
+    """One background thread writing the blocks of any number of WAVStreamers."""
+
+    def __init__(self, max_pending=MAX_PENDING_BLOCKS):
+        self.queue = queue.Queue(max_pending)
+        self.thread = threading.Thread(target=self._run, name="wav-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, streamer, item):
+        self.queue.put((streamer, item))
+
+    def _run(self):
+        while True:
+            streamer, item = self.queue.get()
+            if streamer is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()  # Everything queued before it for this streamer has been written
+                continue
+            try:
+                streamer._write_block(item)
+            except Exception as e:
+                print(f"❌ WAV write failed ({streamer.output_file}): {e}")
+
+    def close(self):
+        self.queue.put((None, None))
+        self.thread.join()
+
 
 class WAVStreamer:
-    def __init__(self, sample_rate=1000, num_channels=1, bit_depth=16, buffer_size=1000, output_file=None):
+    def __init__(self, sample_rate=1000, num_channels=len(SENSOR_CHANNELS), bit_depth=16, buffer_size=1000,
+                 output_file=None, scale="fixed", full_scale=32768, channels=None, writer=None):
         """
         Initialize the real-time WAV streamer.
-        
+
         :param sample_rate: Sampling rate in Hz (e.g., 1000 for 1 kHz)
-        :param num_channels: Number of audio channels (e.g., 1 for mono, 2 for stereo)
-        :param bit_depth: Bit depth (default: 16-bit)
-        :param buffer_size: Number of samples before writing to WAV
-        :param output_file: File path to save the WAV (optional)
+        :param num_channels: Number of interleaved channels (6: GyX, GyY, GyZ, AcX, AcY, AcZ)
+        :param bit_depth: Bit depth (16-bit PCM only)
+        :param buffer_size: Samples gathered by add_sample() before they are queued as one block
+        :param output_file: File path to save the WAV
+        :param scale: "fixed" (gain PCM_MAX / full_scale, 1 for 32768) or "two-pass" (global peak, applied on finalize)
+        :param full_scale: Input value mapped to full scale in "fixed" mode (32768: raw int16 counts as-is)
+        :param channels: Field names taken from structured blocks (default: the first num_channels axes)
+        :param writer: Shared WAVWriterThread; a private one is started if None
         """
-        self.sample_rate = sample_rate
+        if bit_depth != 16:
+            raise ValueError("Only 16-bit PCM is supported")
+        if scale not in SCALE_MODES:
+            raise ValueError(f"Unknown scale mode '{scale}', expected one of {SCALE_MODES}")
+        self.sample_rate = int(round(sample_rate))
         self.num_channels = num_channels
         self.bit_depth = bit_depth
         self.buffer_size = buffer_size
         self.output_file = output_file
-        self.audio_queue = queue.Queue()
-        self.running = False
+        self.scale = scale
+        self.gain = 1.0 if full_scale == PCM_MAX + 1 else PCM_MAX / full_scale  # int16 input as-is
+        self.channels = channels or SENSOR_CHANNELS[:num_channels]
+        self.own_writer = writer is None
+        self.writer = writer or WAVWriterThread()
+        self.pending_samples = []
         self.file = None
-
-        # Start the streaming thread
-        self.thread = threading.Thread(target=self._process_audio, daemon=True)
-        self.thread.start()
+        self.float_file = None
+        self.frames = 0
+        self.peak = 0.0
+        self.last_patch = 0.0
+        self.running = False
 
     def start(self):
-        """Start real-time audio streaming."""
-        self.running = True
+        """Create the file (header with zero sizes) and accept blocks."""
         if self.output_file:
-            self.file = wave.open(self.output_file, 'wb')
-            self.file.setnchannels(self.num_channels)
-            self.file.setsampwidth(self.bit_depth // 8)
-            self.file.setframerate(self.sample_rate)
+            self.file = open(self.output_file, "wb")
+            self._write_header()
+            if self.scale == "two-pass":
+                self.float_file = open(self.output_file + ".f32", "w+b")
+        self.running = True
 
-    def stop(self):
-        """Stop streaming and finalize WAV file if needed."""
-        self.running = False
-        self.thread.join()
-        if self.file:
-            self.file.close()
-            print(f"✅ WAV saved as {self.output_file}")
+    def add_block(self, block):
+        """Queue a block: an (n, num_channels) array or a structured array with the channel fields.
+
+        The block is copied, so it may be a view into a receive buffer.
+        """
+        if not self.running:
+            return
+        if block.dtype.names:
+            block = np.column_stack([block[name] for name in self.channels])
+        block = np.array(block, dtype=np.float32, ndmin=2)
+        if block.shape[1] != self.num_channels:
+            raise ValueError(f"Expected {self.num_channels} channels, but got {block.shape[1]}")
+        if len(block):
+            self.writer.submit(self, block)
 
     def add_sample(self, sample):
         """
-        Add a sample (or multiple samples) to the queue.
-        
+        Add one sample (a value per channel); samples are queued in blocks of buffer_size.
+
         :param sample: List or single value (e.g., [GyX, GyY] for stereo)
         """
         if isinstance(sample, (list, tuple)) and len(sample) != self.num_channels:
             raise ValueError(f"Expected {self.num_channels} channels, but got {len(sample)}")
+        self.pending_samples.append(sample)
+        if len(self.pending_samples) >= self.buffer_size:
+            self._flush_samples()
 
-        self.audio_queue.put(sample)
+    def _flush_samples(self):
+        if self.pending_samples:
+            self.add_block(np.array(self.pending_samples, dtype=np.float32).reshape(-1, self.num_channels))
+            self.pending_samples = []
 
-    def _process_audio(self):
-        """Process and convert samples to PCM in real time."""
-        buffer = []
+    def _write_block(self, block):
+        """Writer thread: append a block to the file."""
+        if self.file is None:
+            return
+        if self.scale == "two-pass":
+            self.float_file.write(block.tobytes())
+            self.peak = max(self.peak, float(np.abs(block).max()))
+        else:
+            self.file.write(to_pcm(block, self.gain).tobytes())
+            now = time.monotonic()
+            if now - self.last_patch >= HEADER_PATCH_INTERVAL:
+                self._patch_header()
+                self.last_patch = now
+        self.frames += len(block)
 
-        while True:
-            if not self.running and self.audio_queue.empty():
-                break  # Stop processing when queue is empty and streaming stopped
+    def _write_header(self):
+        data_size = self.frames * self.num_channels * 2
+        block_align = self.num_channels * 2
+        self.file.write(WAV_HEADER.pack(b"RIFF", 36 + data_size, b"WAVE", b"fmt ", 16, 1, self.num_channels,
+                                        self.sample_rate, self.sample_rate * block_align, block_align,
+                                        self.bit_depth, b"data", data_size))
 
-            try:
-                sample = self.audio_queue.get(timeout=1)  # Wait for data
-                buffer.append(sample)
+    def _patch_header(self):
+        position = self.file.tell()
+        self.file.seek(0)
+        self._write_header()
+        self.file.seek(position)
+        self.file.flush()
 
-                if len(buffer) >= self.buffer_size:
-                    self._write_to_wav(buffer)
-                    buffer.clear()
-            except queue.Empty:
-                continue  # No data, just keep looping
+    def _rescale(self, chunk_frames=1 << 16):
+        """Second pass: write the float side file as PCM with one gain for the whole recording."""
+        gain = PCM_MAX / self.peak if self.peak else 1.0
+        self.float_file.seek(0)
+        row_bytes = self.num_channels * 4
+        while True:
+            data = self.float_file.read(chunk_frames * row_bytes)
+            if not data:
+                break
+            self.file.write(to_pcm(np.frombuffer(data, dtype=np.float32), gain).tobytes())
+        self.float_file.close()
+        os.remove(self.output_file + ".f32")
+        self.float_file = None
+        return gain
 
-    def _write_to_wav(self, buffer):
-        """Convert and write buffered data to WAV."""
+    def finalize(self):
+        """Write everything still queued, apply the global scale (two-pass) and patch the header."""
+        if not self.running:
+            return
+        self._flush_samples()
+        self.running = False
+        done = threading.Event()
+        self.writer.submit(self, done)
+        done.wait()
+        if self.own_writer:
+            self.writer.close()
         if self.file:
-            # Convert list of samples into NumPy array
-            data = np.array(buffer, dtype=np.float32)
-
-            # Normalize & convert to 16-bit PCM
-            max_val = np.max(np.abs(data)) or 1
-            int_data = (data / max_val * 32767).astype(np.int16)
+            gain = self._rescale() if self.scale == "two-pass" else self.gain
+            self._patch_header()
+            self.file.close()
+            self.file = None
+            print(f"✅ WAV saved as {self.output_file} ({self.frames} frames x {self.num_channels} channels, "
+                  f"gain {gain:.3f})")
 
-            # Flatten multi-channel audio (if needed)
-            if self.num_channels > 1:
-                int_data = int_data.flatten()
+    def stop(self):
+        """Stop streaming and finalize WAV file if needed."""
+        self.finalize()
 
-            self.file.writeframes(int_data.tobytes())
 
+def to_pcm(data, gain):
+    return np.clip(np.rint(data * gain), -PCM_MAX - 1, PCM_MAX).astype("<i2")
@@ -0,0 +1,162 @@
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+from packet_formats import DatagramDecoder, StreamDecoder
+
+# Capture file: MAGIC, uint32 header length, JSON header, then one record per recv():
+#   uint64 host monotonic ns, uint8 kind (stream chunk, datagram or reconnect), uint32 length, raw bytes
+MAGIC = b"VIBSCAP1"
+RECORD_HEADER = struct.Struct("<QBI")
+KIND_STREAM = 0    # Bytes from a TCP recv; chunk boundaries are arbitrary
+KIND_DATAGRAM = 1  # One whole UDP datagram
+KIND_RECONNECT = 2  # Empty record: a new connection starts, stream framing restarts
+WRITE_BUFFER = 1 << 20
+
+
+class WireCaptureWriter:
+    """Tap that appends exactly what the socket delivered, with the host arrival time of each read."""
+
+    def __init__(self, path, transport="tcp", format_name="auto", peer=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.kind = KIND_DATAGRAM if transport == "udp" else KIND_STREAM
+        self.lock = threading.Lock()
+        self.records = 0
+        self.bytes = 0
+        self.file = open(path, "wb", buffering=WRITE_BUFFER)
+        header = json.dumps({
+            "transport": transport,
+            "format": format_name,
+            "peer": peer,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "wall_start_ns": time.time_ns(),
+            "monotonic_start_ns": time.monotonic_ns(),
+        }).encode()
+        self.file.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+    def write(self, data, host_ns=None):
+        """Append one recv() result (bytes-like); safe to call from several receive threads."""
+        if host_ns is None:
+            host_ns = time.monotonic_ns()
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(RECORD_HEADER.pack(host_ns, self.kind, len(data)))
+            self.file.write(data)
+            self.records += 1
+            self.bytes += len(data)
+
+    def mark_reconnect(self, host_ns=None):
+        """Record that the stream restarted (new TCP connection), so replay resets its framing."""
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(RECORD_HEADER.pack(host_ns or time.monotonic_ns(), KIND_RECONNECT, 0))
+            self.records += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+        print(f"💾 Wire capture saved: {self.path} ({self.records} reads, {self.bytes} bytes)")
+
+
+def read_header(file):
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{file.name} is not a wire capture")
+    (length,) = struct.unpack("<I", file.read(4))
+    return json.loads(file.read(length))
+
+
+def read_capture(path):
+    """Yield (host_ns, kind, data) for every record; stops quietly at a truncated last record."""
+    with open(path, "rb") as file:
+        read_header(file)
+        while True:
+            head = file.read(RECORD_HEADER.size)
+            if len(head) < RECORD_HEADER.size:
+                return
+            host_ns, kind, length = RECORD_HEADER.unpack(head)
+            data = file.read(length)
+            if len(data) < length:
+                return  # Capture was cut short (crash or still being written)
+            yield host_ns, kind, data
+
+
+def capture_info(path):
+    with open(path, "rb") as file:
+        return read_header(file)
+
+
+class ReplaySource:
+    """Plays a capture back record by record, at the recorded pace (speed=1), faster/slower, or
+    as fast as possible (speed=0)."""
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+        self.header = capture_info(path)
+
+    def records(self):
+        start_host = start_wall = None
+        for host_ns, kind, data in read_capture(self.path):
+            if self.speed:
+                if start_host is None:
+                    start_host, start_wall = host_ns, time.monotonic_ns()
+                due = start_wall + (host_ns - start_host) / self.speed
+                delay = (due - time.monotonic_ns()) / 1e9
+                if delay > 0:
+                    time.sleep(delay)
+            yield host_ns, kind, data
+
+    def blocks(self, format_name=None):
+        """Run the records through the same decoders as the live collector.
+
+        Yields (block, raw, host_ns) with the common block layout of packet_formats; format_name
+        overrides the one stored in the capture header ("auto" sniffs it).
+        """
+        format_name = format_name or self.header.get("format") or "auto"
+        stream_decoder = StreamDecoder(format_name)
+        datagram_decoder = DatagramDecoder(format_name)
+        for host_ns, kind, data in self.records():
+            if kind == KIND_RECONNECT:
+                stream_decoder.reset()
+                continue
+            if kind == KIND_DATAGRAM:
+                decoded = datagram_decoder.decode(data)
+            else:
+                decoded = stream_decoder.feed(data)
+            if decoded is not None and len(decoded[0]):
+                yield decoded[0], decoded[1], host_ns
+
+
+def replay(path, speed=0, on_block=None):
+    """Replay a capture through the decoders; returns (samples, elapsed seconds)."""
+    source = ReplaySource(path, speed)
+    samples = 0
+    start = time.perf_counter()
+    for block, raw, host_ns in source.blocks():
+        samples += len(block)
+        if on_block is not None:
+            on_block(block, raw, host_ns)
+    return samples, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("info", "replay"):
+        print("Usage: python wire_capture.py info CAPTURE | replay CAPTURE [SPEED (0 = max)]")
+        sys.exit(1)
+    capture = sys.argv[2]
+    if sys.argv[1] == "info":
+        print(json.dumps(capture_info(capture), indent=2))
+        reads = sum(1 for _ in read_capture(capture))
+        print(f"📦 {reads} reads, {os.path.getsize(capture)} bytes")
+    else:
+        speed = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+        total, elapsed = replay(capture, speed)
+        print(f"🔁 Replayed {total} samples in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} samples/s)")
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Compares loading a session from the classic CSV export with bulk-decoding the same samples from a
+# .vibz archive (session_archive.py), and times a 10 s slice from the middle of the archive.
+# The CSV is timed both parsed (csv_loader without its cache) and opened from the sidecar cache.
+#
+#   python archive_benchmark.py                      # synthetic 10 min recording at 1 kHz
+#   python archive_benchmark.py --source rec/x/x_raw_data.csv --output results.json
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SYNC_DIR = os.path.join(TEST_DIR, "..", "Python client", "sync")
+sys.path.insert(0, SYNC_DIR)
+
+from csv_loader import load_recording
+from session_archive import CODECS, DEFAULT_CODEC, open_archive, pack
+from session_format import SENSOR_FIELDS
+
+DEFAULT_SECONDS = 600
+SAMPLE_RATE = 1000
+SLICE_SECONDS = 10
+REPEATS = 3  # Best of N for every timing
+
+
+def synthetic_csv(path, seconds):
+    """A tcp22-style export: vibration-like int16 channels, jittered µs timestamps that wrap, cps, num."""
+    rng = np.random.default_rng(1)
+    count = seconds * SAMPLE_RATE
+    t = np.arange(count) / SAMPLE_RATE
+    columns = []
+    for axis in range(len(SENSOR_FIELDS)):
+        signal = 3000 * np.sin(2 * np.pi * (37 + 11 * axis) * t) + rng.normal(0, 200, count)
+        columns.append(np.clip(signal, -32768, 32767).astype(np.int64))
+    timestamps = (4_290_000_000 + np.arange(count) * 1000 + rng.integers(-20, 20, count)) % (1 << 32)
+    columns += [timestamps, np.full(count, SAMPLE_RATE), np.arange(count) % 100]
+    np.savetxt(path, np.column_stack(columns), fmt="%d", delimiter=",")
+
+
+def best_of(function):
+    best, result = None, None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(csv_file, codecs):
+    results = {"samples": None, "csv_bytes": os.path.getsize(csv_file)}
+    csv_time, (block, _) = best_of(lambda: load_recording(csv_file, use_cache=False))
+    results["samples"] = len(block)
+    results["csv_load_s"] = round(csv_time, 4)
+    load_recording(csv_file)  # Write the sidecar cache, then time a cached open
+    cached_time, _ = best_of(lambda: load_recording(csv_file))
+    results["csv_cached_load_s"] = round(cached_time, 4)
+    try:
+        import pandas as pd
+        pandas_time, _ = best_of(lambda: pd.read_csv(csv_file, header=None).values)
+        results["pandas_load_s"] = round(pandas_time, 4)
+    except ImportError:
+        pass
+
+    with tempfile.TemporaryDirectory() as folder:
+        for codec in codecs:
+            path = os.path.join(folder, f"bench_{codec}.vibz")
+            pack_time, _ = best_of(lambda: pack(csv_file, path, codec=codec))
+            archive = open_archive(path)
+            decode_time, data = best_of(archive.read)
+            assert all(np.array_equal(data[name], block[name]) for name in archive.columns), "archive is not lossless"
+            middle = (int(archive.t_last[-1]) - archive.start_time) / 2e6
+            slice_time, part = best_of(lambda: archive.read_time(middle, SLICE_SECONDS))
+            results[codec] = {
+                "bytes": os.path.getsize(path),
+                "ratio_vs_csv": round(results["csv_bytes"] / os.path.getsize(path), 1),
+                "pack_s": round(pack_time, 4),
+                "decode_s": round(decode_time, 4),
+                "decode_samples_per_s": round(len(data) / decode_time),
+                "speedup_vs_csv": round(csv_time / decode_time, 1),
+                "slice_ms": round(slice_time * 1000, 2),
+                "slice_samples": len(part),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV load vs. compressed archive decode benchmark")
+    parser.add_argument("--source", help="CSV export to use (default: a synthetic recording)")
+    parser.add_argument("--seconds", type=int, default=DEFAULT_SECONDS, help="Length of the synthetic recording")
+    parser.add_argument("--codec", choices=sorted(CODECS), action="append", help="Codec(s) to test (default: all)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        csv_file = args.source
+        if csv_file is None:
+            csv_file = os.path.join(folder, "synthetic_raw_data.csv")
+            print(f"🧪 Writing a {args.seconds} s synthetic recording...")
+            synthetic_csv(csv_file, args.seconds)
+        results = run(csv_file, args.codec or sorted(CODECS))
+
+    print(json.dumps(results, indent=2))
+    print(f"📊 CSV load {results['csv_load_s']:.3f}s, archive decode "
+          f"{results[DEFAULT_CODEC]['decode_s']:.3f}s ({results[DEFAULT_CODEC]['speedup_vs_csv']}x faster, "
+          f"{results[DEFAULT_CODEC]['ratio_vs_csv']}x smaller)")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import csv
+import os
+import random
+import threading
+import time
+import numpy as np
+
+# Stand-in for the ESP32 firmware variants in src/, so the Python clients can run without hardware.
+#   udp16  - main_server.cpp0: DISCOVER/ACK handshake, then 16-byte <6hI samples (optionally batched)
+#   text   - main_server.stringPackets: DISCOVER/ACK, then "GyX,GyY,GyZ,AcX,AcY,AcZ,millis\n" x 10
+#   text4  - gyro-only build: "GyX,GyY,GyZ,millis\n" x 10
+#   tcp22  - server_tcp.Raw_Threads.cpp: TCP server streaming 100 x 22-byte <hhhhhhIIh captures
+#   tcp16  - main_server_tcp_threads.cpp01: TCP server streaming batches of 8 x 16-byte <6hI samples
+
+ESP_PORT = 12345
+DISCOVER_MSG = b"DISCOVER_VIBS_SERVER"
+ACK_MSG = b"SERVER_ACK"
+DISCOVERY_TIMEOUT = 60       # Seconds without DISCOVER before a UDP device stops sending (as the firmware)
+DEFAULT_RATE = 1000          # Samples per second per device
+TEXT_BATCH_SIZE = 10         # Lines per datagram in the text firmware
+TCP_CAPTURES_PER_PACKET = 100
+TCP16_BATCH_SIZE = 8         # PACKET_BATCH_SIZE in main_server_tcp_threads
+STATUS_INTERVAL = 2
+PROTOCOLS = ("udp16", "text", "text4", "tcp22", "tcp16")
+
+
+class SyntheticSource:
+    """Sine mix plus noise on each axis, roughly at the MPU6050 raw levels seen in rec/."""
+
+    def __init__(self, rate, seed=0):
+        self.rate = rate or DEFAULT_RATE
+        self.index = 0
+        rng = np.random.default_rng(seed)
+        self.offsets = np.array([-380, -40, -85, 17450, 360, 2300], dtype=np.float64)
+        self.freqs = rng.uniform(5, 200, size=6)
+        self.amplitudes = rng.uniform(20, 400, size=6)
+        self.rng = rng
+
+    def read(self, n):
+        t = (self.index + np.arange(n))[:, None] / self.rate
+        self.index += n
+        values = self.offsets + self.amplitudes * np.sin(2 * np.pi * self.freqs * t)
+        values += self.rng.normal(0, 8, size=values.shape)
+        return np.clip(values, -32768, 32767).astype(np.int16)
+
+
+class CSVSource:
+    """Loops over a recorded CSV (4-column gyro-only, 7-column UDP or 9-column TCP layouts)."""
+
+    def __init__(self, path):
+        with open(path, newline="") as file:
+            first = next(csv.reader(file))
+        skip = 0 if first[0].lstrip("-").isdigit() else 1  # Header row in main_client_ga exports
+        data = np.loadtxt(path, delimiter=",", skiprows=skip, ndmin=2)
+        if data.shape[1] == 4:  # GyX, GyY, GyZ, timestamp
+            values = np.zeros((len(data), 6))
+            values[:, :3] = data[:, :3]
+        else:
+            values = data[:, :6]
+        self.values = values.astype(np.int16)
+        self.index = 0
+
+    def read(self, n):
+        idx = (self.index + np.arange(n)) % len(self.values)
+        self.index += n
+        return self.values[idx]
+
+
+class VirtualDevice:
+    """Paces samples for one simulated device and keeps its own micros()-style clock."""
+
+    def __init__(self, name, source, rate, host_clock=False):
+        self.name = name
+        self.source = source
+        self.rate = rate
+        self.host_clock = host_clock  # Timestamps from the host monotonic clock (for latency measurement)
+        self.boot_offset = random.randrange(1 << 32)
+        self.sent = 0
+        self.sent_since_status = 0
+        self.start = None
+
+    def next_samples(self, n):
+        """Return (values, micros, millis) for the next n samples."""
+        if self.start is None:
+            self.start = time.monotonic()
+        values = self.source.read(n)
+        if self.host_clock:
+            now_us = time.monotonic_ns() // 1000
+            micros = np.full(n, now_us, dtype=np.uint64)
+        else:
+            elapsed_us = (self.sent + np.arange(n)) * (1_000_000 / (self.rate or DEFAULT_RATE))
+            micros = self.boot_offset + elapsed_us.astype(np.uint64)
+        self.sent += n
+        self.sent_since_status += n
+        return values, (micros % (1 << 32)).astype(np.uint32), (micros // 1000 % (1 << 32)).astype(np.uint32)
+
+    async def wait_for(self, n):
+        """Sleep until n more samples are due at the configured rate (no wait when rate is 0)."""
+        if not self.rate:
+            await asyncio.sleep(0)
+            return
+        if self.start is None:
+            self.start = time.monotonic()
+        due = self.start + (self.sent + n) / self.rate
+        delay = due - time.monotonic()
+        await asyncio.sleep(max(delay, 0))
+
+
+def pack_udp16(values, micros):
+    packed = np.zeros(len(values), dtype=[("v", "<i2", 6), ("t", "<u4")])
+    packed["v"] = values
+    packed["t"] = micros
+    return packed.tobytes()
+
+
+def pack_tcp22(values, micros, cps):
+    packed = np.zeros(len(values), dtype=[("v", "<i2", 6), ("t", "<u4"), ("cps", "<u4"), ("num", "<i2")])
+    packed["v"] = values
+    packed["t"] = micros
+    packed["cps"] = cps
+    packed["num"] = np.arange(len(values)) % TCP_CAPTURES_PER_PACKET
+    return packed.tobytes()
+
+
+def pack_text(values, millis, gyro_only=False):
+    columns = values[:, :3] if gyro_only else values
+    rows = np.column_stack((columns.astype(np.int64), millis.astype(np.int64)))
+    return ("\n".join(",".join(map(str, row)) for row in rows.tolist()) + "\n").encode()
+
+
+class UDPDeviceProtocol(asyncio.DatagramProtocol):
+    """UDP firmware: answers DISCOVER with SERVER_ACK and streams to the last client that asked."""
+
+    def __init__(self, device, protocol, batch):
+        self.device = device
+        self.protocol = protocol
+        self.batch = batch
+        self.transport = None
+        self.client = None
+        self.last_discovery = 0.0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if data.strip(b"\0") == DISCOVER_MSG:
+            if self.client is None:
+                print(f"✅ [{self.device.name}] New client connected: {addr[0]}:{addr[1]}")
+            self.client = addr
+            self.last_discovery = time.monotonic()
+            self.transport.sendto(ACK_MSG, addr)
+
+    async def stream(self, stop_event):
+        unit = TEXT_BATCH_SIZE if self.protocol.startswith("text") else self.batch
+        while not stop_event.is_set():
+            if self.client is None or time.monotonic() - self.last_discovery > DISCOVERY_TIMEOUT:
+                self.client = None
+                await asyncio.sleep(0.05)
+                continue
+            await self.device.wait_for(unit)
+            values, micros, millis = self.device.next_samples(unit)
+            if self.protocol == "udp16":
+                payload = pack_udp16(values, micros)
+            else:
+                payload = pack_text(values, millis, gyro_only=self.protocol == "text4")
+            self.transport.sendto(payload, self.client)
+
+
+async def run_tcp_device(device, host, port, stop_event, protocol="tcp22"):
+    """TCP firmware: packets of 100 captures (tcp22) or batches of 8 samples (tcp16) to every client."""
+    handlers = set()
+    unit = TCP_CAPTURES_PER_PACKET if protocol == "tcp22" else TCP16_BATCH_SIZE
+
+    async def handle(reader, writer):
+        handlers.add(asyncio.current_task())
+        print(f"✅ [{device.name}] Client connected.")
+        try:
+            while not stop_event.is_set():
+                await device.wait_for(unit)
+                values, micros, _ = device.next_samples(unit)
+                if protocol == "tcp22":
+                    writer.write(pack_tcp22(values, micros, device.rate or 0))
+                else:
+                    writer.write(pack_udp16(values, micros))
+                await writer.drain()
+        except (ConnectionError, OSError, asyncio.CancelledError):
+            pass  # Client gone, or simulator stopping
+        finally:
+            writer.close()
+            print(f"🛑 [{device.name}] Client disconnected.")
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await stop_event.wait()
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+
+async def run_udp_device(device, host, port, protocol, batch, stop_event):
+    loop = asyncio.get_running_loop()
+    transport, udp = await loop.create_datagram_endpoint(
+        lambda: UDPDeviceProtocol(device, protocol, batch), local_addr=(host, port))
+    try:
+        await udp.stream(stop_event)
+    finally:
+        transport.close()
+
+
+def device_address(index, protocol, host, port):
+    """UDP devices get their own loopback IP (clients demux by source IP), TCP devices their own port."""
+    if protocol.startswith("tcp"):
+        return host, port + index
+    if host.startswith("127.") and index:
+        base = host.rsplit(".", 1)
+        return f"{base[0]}.{int(base[1]) + index}", port
+    return host, port + index
+
+
+async def print_status(devices, stop_event):
+    while not stop_event.is_set():
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=STATUS_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        total = sum(d.sent_since_status for d in devices)
+        print(f"📤 {len(devices)} devices, {total / STATUS_INTERVAL:.0f} samples/s sent")
+        for d in devices:
+            d.sent_since_status = 0
+
+
+async def run_simulator(protocol="tcp22", devices=1, rate=DEFAULT_RATE, host="127.0.0.1", port=ESP_PORT,
+                        batch=1, csv_path=None, host_clock=False, stop_event=None, quiet=False):
+    """Run `devices` virtual ESP32s until stop_event is set (runs forever when it is None)."""
+    stop_event = stop_event or asyncio.Event()
+    virtual = []
+    tasks = []
+    for index in range(devices):
+        source = CSVSource(csv_path) if csv_path else SyntheticSource(rate, seed=index)
+        device = VirtualDevice(f"{protocol}-{index}", source, rate, host_clock)
+        virtual.append(device)
+        dev_host, dev_port = device_address(index, protocol, host, port)
+        if protocol.startswith("tcp"):
+            tasks.append(run_tcp_device(device, dev_host, dev_port, stop_event, protocol))
+        else:
+            tasks.append(run_udp_device(device, dev_host, dev_port, protocol, batch, stop_event))
+        if not quiet:
+            print(f"🛜 [{device.name}] {protocol} on {dev_host}:{dev_port} at {rate or 'max'} samples/s")
+    if not quiet:
+        tasks.append(print_status(virtual, stop_event))
+    await asyncio.gather(*tasks)
+    return virtual
+
+
+class SimulatorThread:
+    """Runs the simulator on a background event loop; used by benchmarks and manual tests."""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.loop = asyncio.new_event_loop()
+        self.stop_event = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.stop_event = asyncio.Event()
+        self.loop.call_soon(self.ready.set)
+        self.loop.run_until_complete(run_simulator(stop_event=self.stop_event, **self.kwargs))
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+        time.sleep(0.1)  # Let the servers bind
+        return self
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.stop_event.set)
+        self.thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate one or more ESP32 vibration sensors.")
+    parser.add_argument("--protocol", choices=PROTOCOLS, default="tcp22")
+    parser.add_argument("--devices", type=int, default=1, help="Number of virtual devices")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Samples/s per device (0 = max speed)")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address of the first device")
+    parser.add_argument("--port", type=int, default=ESP_PORT)
+    parser.add_argument("--batch", type=int, default=1, help="Samples per udp16 datagram (firmware sends 1)")
+    parser.add_argument("--csv", help="Play back a recorded CSV instead of a synthetic signal")
+    parser.add_argument("--host-clock", action="store_true", help="Stamp samples with the host monotonic clock")
+    args = parser.parse_args()
+
+    if args.csv and not os.path.exists(args.csv):
+        parser.error(f"CSV not found: {args.csv}")
+    try:
+        asyncio.run(run_simulator(args.protocol, args.devices, args.rate, args.host, args.port,
+                                  args.batch, args.csv, args.host_clock))
+    except KeyboardInterrupt:
+        print("\n🚪 Simulator stopped.")
@@ -0,0 +1,246 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+
+# Repeatable ingestion benchmark: esp32_simulator.py plays the devices on loopback, each client under
+# test decodes the stream, and a sink measures throughput, client CPU and socket-to-sink latency.
+# The simulator runs in its own process so process_time() only counts the client side.
+#
+#   python ingest_benchmark.py --output baseline.json
+#   python ingest_benchmark.py --compare baseline.json
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SYNC_DIR = os.path.join(TEST_DIR, "..", "Python client", "sync")
+sys.path.insert(0, SYNC_DIR)
+
+import tcp_mpu6050_client
+import tcp_mpu6050_client_dual
+import udp_mpu6050_client
+from text_protocol import FULL_FIELDS, parse_csv_datagrams, receive_datagram_batch
+
+SIMULATOR = os.path.join(TEST_DIR, "esp32_simulator.py")
+BASE_PORT = 24000
+SIM_HOST_UDP = "127.0.0.2"    # First UDP device; the next ones get 127.0.0.3, ...
+SIM_HOST_TCP = "127.0.0.1"    # TCP devices listen on consecutive ports instead
+CLIENT_NET = "127.0.1."       # UDP client i binds 127.0.1.(i+1) so every client has its own socket
+DEFAULT_DURATION = 3.0        # Measured seconds per case
+WARMUP = 0.5                  # Seconds received but not measured at the start of each case
+STARTUP_TIMEOUT = 5
+DEFAULT_TOLERANCE = 0.10      # Relative change reported as a regression by --compare
+TIMESTAMP_MODULO = 1 << 32
+
+# (client, batch sizes); batch is samples per datagram for udp16, fixed by the firmware elsewhere
+CLIENTS = {
+    "udp16": [1, 10, 50],
+    "text": [10],
+    "tcp22": [100],
+    "tcp16": [8],
+}
+DEFAULT_DEVICES = [1, 4]
+# Lower is better for these metrics, higher for the others
+LOWER_IS_BETTER = ("cpu_ms_per_1k", "latency_p50_ms", "latency_p99_ms")
+
+
+class LatencySink:
+    """Counts decoded samples and their socket-to-sink latency from host-clock device timestamps."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.measuring = False
+        self.samples = 0
+        self.latencies = []
+
+    def consume(self, timestamps, unit_us=1):
+        """timestamps: device stamps (µs, or ms for the text protocol with unit_us=1000)."""
+        if not self.measuring or not len(timestamps):
+            return
+        now = (time.monotonic_ns() // 1000 // unit_us) % TIMESTAMP_MODULO
+        age = (now - np.asarray(timestamps, dtype=np.int64)) % TIMESTAMP_MODULO * unit_us
+        with self.lock:
+            self.samples += len(timestamps)
+            self.latencies.append(age)
+
+
+def run_udp16(index, port, sink, stop):
+    client = udp_mpu6050_client.UDPSensorClient(f"{CLIENT_NET}{index + 1}", f"127.0.0.{2 + index}", port,
+                                                timeout=1)
+    try:
+        if not client.discover_server():
+            return
+        while not stop.is_set():
+            block = client.receive_block()
+            if block is not None:
+                sink.consume(block["timestamp"])
+    finally:
+        client.close()
+
+
+def run_text(index, port, sink, stop):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((f"{CLIENT_NET}{index + 1}", port))
+    sock.settimeout(1)
+    sock.sendto(b"DISCOVER_VIBS_SERVER", (f"127.0.0.{2 + index}", port))
+    try:
+        while not stop.is_set():
+            try:
+                datagrams, _ = receive_datagram_batch(sock)
+            except socket.timeout:
+                continue
+            rows, _ = parse_csv_datagrams(datagrams, FULL_FIELDS)
+            sink.consume(rows[:, FULL_FIELDS - 1], unit_us=1000)
+    finally:
+        sock.close()
+
+
+def run_tcp22(index, port, sink, stop):
+    client = tcp_mpu6050_client_dual.TCPSensorClient(SIM_HOST_TCP, port + index)
+    try:
+        while not stop.is_set() and client.connected:
+            block = client.receive_block()
+            if block is not None:
+                sink.consume(block["timestamp"])
+    finally:
+        client.close()
+
+
+def run_tcp16(index, port, sink, stop):
+    client = tcp_mpu6050_client.TCPSensorClient(SIM_HOST_TCP, port + index)
+    try:
+        while not stop.is_set() and client.sock is not None:
+            _, _, timestamp = client.receive_data()
+            if timestamp is not None:
+                sink.consume([timestamp])
+    finally:
+        client.close()
+
+
+RUNNERS = {"udp16": run_udp16, "text": run_text, "tcp22": run_tcp22, "tcp16": run_tcp16}
+
+
+def start_simulator(client, devices, batch, rate, port):
+    host = SIM_HOST_TCP if client.startswith("tcp") else SIM_HOST_UDP
+    command = [sys.executable, SIMULATOR, "--protocol", client, "--devices", str(devices),
+               "--rate", str(rate), "--host", host, "--port", str(port), "--batch", str(batch), "--host-clock"]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(STARTUP_TIMEOUT / 10)  # Let the servers bind
+    return process
+
+
+def run_case(client, devices, batch, rate, duration, port):
+    """Run one client/device-count/batch combination; returns its metrics."""
+    simulator = start_simulator(client, devices, batch, rate, port)
+    sink = LatencySink()
+    stop = threading.Event()
+    threads = [threading.Thread(target=RUNNERS[client], args=(i, port, sink, stop), daemon=True)
+               for i in range(devices)]
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for thread in threads:
+                thread.start()
+            time.sleep(WARMUP)
+            sink.measuring = True
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            time.sleep(duration)
+            sink.measuring = False
+            cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+            stop.set()
+            for thread in threads:
+                thread.join(timeout=STARTUP_TIMEOUT)
+    finally:
+        simulator.terminate()
+        simulator.wait()
+
+    latencies = np.concatenate(sink.latencies) / 1000 if sink.latencies else np.empty(0)
+    return {
+        "client": client,
+        "devices": devices,
+        "batch": batch,
+        "samples": sink.samples,
+        "samples_per_s": round(sink.samples / wall, 1),
+        "cpu_ms_per_1k": round(cpu * 1000 / (sink.samples / 1000), 4) if sink.samples else None,
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+        "latency_p99_ms": round(float(np.percentile(latencies, 99)), 3) if len(latencies) else None,
+    }
+
+
+def case_key(result):
+    return f"{result['client']}/devices={result['devices']}/batch={result['batch']}"
+
+
+def compare(results, baseline, tolerance):
+    """Print the change of every metric against a baseline; returns the number of regressions."""
+    previous = baseline["results"]
+    regressions = 0
+    for key, result in results.items():
+        if key not in previous:
+            print(f"🆕 {key}: not in baseline")
+            continue
+        for metric in ("samples_per_s", "cpu_ms_per_1k", "latency_p50_ms", "latency_p99_ms"):
+            old, new = previous[key].get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > tolerance if metric in LOWER_IS_BETTER else change < -tolerance
+            regressions += worse
+            print(f"{'❌' if worse else '✅'} {key} {metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sensor clients against the local simulator.")
+    parser.add_argument("--clients", nargs="+", choices=list(CLIENTS), default=list(CLIENTS))
+    parser.add_argument("--devices", nargs="+", type=int, default=DEFAULT_DEVICES)
+    parser.add_argument("--batches", nargs="+", type=int, help="udp16 samples per datagram (default 1 10 50)")
+    parser.add_argument("--rate", type=float, default=0, help="Samples/s per device (0 = as fast as possible)")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION)
+    parser.add_argument("--output", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", help="Compare against a baseline written by --output")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = {}
+    port = BASE_PORT
+    for client in args.clients:
+        batches = args.batches if args.batches and client == "udp16" else CLIENTS[client]
+        for devices in args.devices:
+            for batch in batches:
+                result = run_case(client, devices, batch, args.rate, args.duration, port)
+                results[case_key(result)] = result
+                print(f"⏱️ {case_key(result)}: {result['samples_per_s']:.0f} samples/s, "
+                      f"{result['cpu_ms_per_1k']} ms CPU/1k, p50 {result['latency_p50_ms']} ms, "
+                      f"p99 {result['latency_p99_ms']} ms")
+                port += 10  # Fresh ports so lingering sockets of the previous case do not interfere
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "rate": args.rate,
+            "duration": args.duration,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"💾 Baseline saved to {args.output}")
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"{'❌' if regressions else '✅'} {regressions} regression(s) beyond {args.tolerance:.0%}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
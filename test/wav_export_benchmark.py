@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+import numpy as np
+
+# Times the WAV export of a long recording: the previous path (CSV read, then interpolate, normalize and
+# write each axis separately) against wav_export.py (session loaded once, one 2D interpolation pass),
+# and checks that both produce the same per-axis audio.
+#
+#   python wav_export_benchmark.py --minutes 30 --output results.json
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SYNC_DIR = os.path.join(TEST_DIR, "..", "Python client", "sync")
+sys.path.insert(0, SYNC_DIR)
+
+from csv_loader import load_recording
+from session_format import SENSOR_FIELDS, open_session, write_session
+from session_recorder import export_csv
+from wav_export import export_session_wavs, nearest_standard_rate
+
+DEFAULT_MINUTES = 10
+SAMPLE_RATE = 1000
+MAX_PCM_DIFFERENCE = 2  # LSBs after matching gains; the paths round differently
+
+
+def synthetic_session(path, minutes):
+    """A tcp22-like session: vibration-like axes, jittered µs timestamps that wrap."""
+    rng = np.random.default_rng(2)
+    count = int(minutes * 60 * SAMPLE_RATE)
+    t = np.arange(count) / SAMPLE_RATE
+    block = np.zeros(count, dtype=[(name, "<i2") for name in SENSOR_FIELDS] + [("timestamp", "<u4")])
+    for axis, name in enumerate(SENSOR_FIELDS):
+        block[name] = 3000 * np.sin(2 * np.pi * (37 + 11 * axis) * t) + rng.normal(0, 200, count)
+    block["timestamp"] = (4_290_000_000 + np.arange(count) * 1000 + rng.integers(-20, 20, count)) % (1 << 32)
+    write_session(path, block)
+
+
+def legacy_export(csv_file, folder, name):
+    """The previous process_realtime_wav: per-axis np.interp, per-file normalization, one write per axis."""
+    block, _ = load_recording(csv_file, use_cache=False)
+    timestamps = block["timestamp"]
+    sample_rate = nearest_standard_rate(timestamps)
+    for label in SENSOR_FIELDS:
+        duration = (timestamps[-1] - timestamps[0]) / 1_000_000.0
+        uniform_time = np.linspace(timestamps[0], timestamps[-1], int(duration * sample_rate))
+        resampled = np.interp(uniform_time, timestamps, block[label])
+        peak = np.max(np.abs(resampled)) or 1
+        pcm = np.int16(resampled / peak * 32767)
+        with wave.open(os.path.join(folder, f"{name}_{label}.wav"), "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(pcm.tobytes())
+
+
+def read_wav(path):
+    with wave.open(path) as wav_file:
+        return np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype="<i2")
+
+
+def pcm_difference(legacy_file, new_file):
+    """Largest sample difference once the gains are matched: the previous path mapped the peak of the
+    resampled signal to full scale, wav_export maps the peak of the recorded samples."""
+    legacy, new = read_wav(legacy_file).astype(np.float64), read_wav(new_file).astype(np.float64)
+    ratio = np.abs(legacy).max() / max(np.abs(new).max(), 1)
+    return int(np.ceil(np.abs(legacy - new * ratio).max()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WAV export benchmark: previous per-axis path vs wav_export")
+    parser.add_argument("--minutes", type=float, default=DEFAULT_MINUTES, help="Length of the synthetic session")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        session_path = os.path.join(folder, "bench.vibs")
+        synthetic_session(session_path, args.minutes)
+        csv_file = export_csv(open_session(session_path), os.path.join(folder, "bench_raw_data.csv"))
+        legacy_folder, new_folder, multi_folder = (os.path.join(folder, sub) for sub in ("legacy", "new", "multi"))
+        for sub in (legacy_folder, new_folder, multi_folder):
+            os.makedirs(sub)
+
+        start = time.perf_counter()
+        legacy_export(csv_file, legacy_folder, "bench")
+        legacy_s = time.perf_counter() - start
+        start = time.perf_counter()
+        export_session_wavs(session_path, new_folder, "bench", "per-axis")
+        per_axis_s = time.perf_counter() - start
+        start = time.perf_counter()
+        export_session_wavs(session_path, multi_folder, "bench", "multichannel")
+        multichannel_s = time.perf_counter() - start
+
+        difference = max(pcm_difference(os.path.join(legacy_folder, f"bench_{label}.wav"),
+                                        os.path.join(new_folder, f"bench_{label}.wav"))
+                         for label in SENSOR_FIELDS)
+        multi = read_wav(os.path.join(multi_folder, "bench_axes.wav")).reshape(-1, len(SENSOR_FIELDS))
+        same_multi = np.array_equal(multi[:, 0], read_wav(os.path.join(new_folder, "bench_GyX.wav")))
+
+    results = {
+        "samples": int(args.minutes * 60 * SAMPLE_RATE),
+        "legacy_s": round(legacy_s, 3),
+        "per_axis_s": round(per_axis_s, 3),
+        "multichannel_s": round(multichannel_s, 3),
+        "speedup_per_axis": round(legacy_s / per_axis_s, 1),
+        "speedup_multichannel": round(legacy_s / multichannel_s, 1),
+        "max_pcm_difference": difference,
+        "multichannel_matches_per_axis": bool(same_multi),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if difference > MAX_PCM_DIFFERENCE or not same_multi:
+        print("❌ Exports differ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()